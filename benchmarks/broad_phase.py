@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+"""time of a frame with each broad phase backend: every collidable
+moves a little and is updated, then all_collisions() is run to the
+end. the mixed size populations also run collides() for every
+collidable. run from anywhere: python benchmarks/broad_phase.py"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import kidgine.collision
+from kidgine.collision import rectangle
+from kidgine.math.vector import Vector
+
+
+class Body(object):
+    def __init__(self, x, y, size):
+        self.position = Vector(x, y)
+        half = size / 2.0
+        self.collidable = rectangle.Rectangle(self, Vector(-half, -half), Vector(half, half))
+
+
+def uniform(count):
+    """32x32 bodies at about one per 64x64 px"""
+    rng = random.Random(count)
+    side = 64 * count ** 0.5
+    return [Body(rng.uniform(0, side), rng.uniform(0, side), 32) for i in xrange(count)]
+
+
+def pile(count):
+    """32x32 bodies all inside one 128px cell"""
+    rng = random.Random(count)
+    return [Body(rng.uniform(0, 96), rng.uniform(0, 96), 32) for i in xrange(count)]
+
+
+def mixed(count, side, small, large=None, every=None):
+    """bodies of small (min, max) px spread over a side x side px
+    square, with one of large px every so many if given"""
+    rng = random.Random(count)
+    bodies = list()
+    for i in xrange(count):
+        if large is not None and i % every == 0:
+            size = large
+        else:
+            size = rng.uniform(*small)
+        bodies.append(Body(rng.uniform(0, side), rng.uniform(0, side), size))
+    return bodies
+
+
+def frame_time(backend, population, frames, queries=False):
+    """best time of one frame, in ms"""
+    bodies = population()
+    detector = kidgine.collision.CollisionDetector(broad_phase=backend())
+    for i,body in enumerate(bodies):
+        detector.update_collidable(i, body.collidable)
+
+    rng = random.Random(1)
+    best = None
+    for f in xrange(frames):
+        start = time.time()
+        for i,body in enumerate(bodies):
+            body.position.x += rng.uniform(-2, 2)
+            body.position.y += rng.uniform(-2, 2)
+            detector.update_collidable(i, body.collidable)
+        if queries:
+            for i in xrange(len(bodies)):
+                detector.collides(token=i)
+        for c in detector.all_collisions():
+            pass
+        elapsed = (time.time() - start) * 1000
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+BACKENDS = [('hash', kidgine.collision.SpatialHash),
+            ('sap', kidgine.collision.SortAndSweep),
+            ('hgrid', kidgine.collision.HierarchicalGrid)]
+
+POPULATIONS = [('100 x 32px',        lambda: uniform(100),   10),
+               ('1000 x 32px',       lambda: uniform(1000),  5),
+               ('10000 x 32px',      lambda: uniform(10000), 2),
+               ('300 x 32px, 1 cell', lambda: pile(300),     3)]
+
+# the spatial hash can not hold anything larger than its cells
+MIXED = [('1000 x 4-12px + 64px', lambda: mixed(1000, 1000, (4, 12), 64, 50), 3, True),
+         ('1000 x 8-96px',        lambda: mixed(1000, 2000, (8, 96)),         3, True),
+         ('3000 x 4-12px + 96px', lambda: mixed(3000, 2000, (4, 12), 96, 30), 3, True),
+         ('500 x 8-32px + 300px', lambda: mixed(500, 2000, (8, 32), 300, 25), 3, False)]
+
+
+def main():
+    print 'ms per frame, best of the frames run'
+    print '{:<22}'.format('population') + ''.join('{:>10}'.format(name) for name,_ in BACKENDS)
+    for name,population,frames in POPULATIONS:
+        times = [frame_time(backend, population, frames) for _,backend in BACKENDS]
+        print '{:<22}'.format(name) + ''.join('{:10.1f}'.format(t) for t in times)
+
+    print
+    print 'mixed sizes, with collides() for every collidable'
+    for name,population,frames,hashable in MIXED:
+        line = '{:<22}'.format(name)
+        for backend_name,backend in BACKENDS:
+            if backend is kidgine.collision.SpatialHash and not hashable:
+                line += '{:>10}'.format('n/a')
+            else:
+                line += '{:10.1f}'.format(frame_time(backend, population, frames, True))
+        print line
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+"""cost of FixedVector against the float Vector, per operation and for
+a small simulation. run from anywhere: python benchmarks/fixed_point.py"""
+import os
+import random
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from kidgine.math.fixed import FixedVector
+from kidgine.math.vector import Vector
+
+
+def operations(cls):
+    a = cls(3.5, 4.25)
+    b = cls(-1., 2.)
+    # c goes back where it was, so a is left alone and nothing grows
+    c = a.copy()
+    return [('add',        lambda: a + b),
+            ('iadd+isub',  lambda: c.iadd(b).isub(b)),
+            ('mul',        lambda: a * 0.5),
+            ('dot',        lambda: a.dot(b)),
+            ('magnitude',  lambda: a.magnitude()),
+            ('normalized', lambda: a.normalized()),
+            ('rotate',     lambda: a.rotate(0.7))]
+
+
+def simulate(cls, bodies, steps, reverse=False):
+    """positions of bodies pushed by the same velocities for steps
+    frames, applying them in order or in reverse"""
+    rng = random.Random(3)
+    velocities = [cls(rng.uniform(-100, 100), rng.uniform(-100, 100)) for i in xrange(bodies)]
+    order = range(bodies)
+    if reverse:
+        order.reverse()
+
+    position = cls()
+    for step in xrange(steps):
+        for i in order:
+            position = position + velocities[i] * (1 / 60.)
+    return position
+
+
+def main():
+    print 'ns per operation, best of 5'
+    number = 50000
+    for (name,float_op),(_,fixed_op) in zip(operations(Vector), operations(FixedVector)):
+        float_time = min(timeit.repeat(float_op, number=number, repeat=5)) / number * 1e9
+        fixed_time = min(timeit.repeat(fixed_op, number=number, repeat=5)) / number * 1e9
+        print '{:<10} float {:6.0f}  fixed {:6.0f}  x{:.1f}'.format(
+            name, float_time, fixed_time, fixed_time / float_time)
+
+    print
+    print '100 velocities summed over 600 frames, in order and reversed'
+    for name,cls in (('float', Vector), ('fixed', FixedVector)):
+        start = time.time()
+        forward = simulate(cls, 100, 600)
+        elapsed = (time.time() - start) * 1000
+        backward = simulate(cls, 100, 600, reverse=True)
+        print '{:<6} {:7.1f} ms  same either way: {}'.format(
+            name, elapsed, forward.x == backward.x and forward.y == backward.y)
+
+
+if __name__ == '__main__':
+    main()
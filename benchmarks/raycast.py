@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+"""ray casts through the spatial hash against testing every shape.
+run from anywhere: python benchmarks/raycast.py"""
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import kidgine.collision
+from kidgine.collision import circle
+from kidgine.collision import rectangle
+from kidgine.math import vector
+from kidgine.math.vector import Vector
+
+
+RAYS = 300
+
+
+class Body(object):
+    def __init__(self, x, y):
+        self.position = Vector(x, y)
+
+
+def scene(count, rng):
+    """rectangles and circles of 8-32px at about one per 64x64 px"""
+    detector = kidgine.collision.CollisionDetector()
+    side = 64 * count ** 0.5
+    for i in xrange(count):
+        body = Body(rng.uniform(0, side), rng.uniform(0, side))
+        half = rng.uniform(4, 16)
+        if i % 2:
+            c = rectangle.Rectangle(body, Vector(-half, -half), Vector(half, half))
+        else:
+            c = circle.Circle(body, vector.zero(), half)
+        detector.update_collidable(i, c)
+    return detector, side
+
+
+def rays(count, side, rng):
+    all = list()
+    for i in xrange(count):
+        angle = rng.uniform(0, 2 * math.pi)
+        all.append((Vector(rng.uniform(0, side), rng.uniform(0, side)),
+                    Vector(math.cos(angle), math.sin(angle)),
+                    rng.uniform(50, 500)))
+    return all
+
+
+def brute_force(detector, origin, direction, max_distance):
+    """(distance, token) of every shape the ray hits, nearest first"""
+    # as CollisionDetector.raycast() does, so distances match exactly
+    direction = direction.normalized()
+    hits = list()
+    for token,info in detector.backend.collidables.iteritems():
+        hit = info.collidable.raycast(origin, direction, max_distance)
+        if hit is not None:
+            hits.append((hit[0], token))
+    hits.sort()
+    return hits
+
+
+def timed(fn):
+    start = time.time()
+    result = fn()
+    return result, (time.time() - start) * 1000
+
+
+def main():
+    print 'ms for {} rays'.format(RAYS)
+    print '{:>11} {:>10} {:>10} {:>11} {:>25}'.format(
+        'collidables', 'brute', 'raycast', 'first_only', 'raycast_all(first_only)')
+    for count in (100, 1000, 5000):
+        rng = random.Random(count)
+        detector,side = scene(count, rng)
+        all = rays(RAYS, side, rng)
+
+        expected,brute = timed(lambda: [brute_force(detector, *ray) for ray in all])
+        found,cast = timed(lambda: [detector.raycast(*ray) for ray in all])
+        first,cast_first = timed(lambda: [detector.raycast(*ray, first_only=True) for ray in all])
+        batched,cast_all = timed(lambda: detector.raycast_all(all, first_only=True))
+
+        for want,hits,nearest,batch_nearest in zip(expected, found, first, batched):
+            # hits at the same distance (rays starting inside several
+            # shapes) may come in any order
+            if sorted((h.distance, h.token) for h in hits) != want:
+                raise AssertionError('raycast hits differ from brute force')
+            for h in nearest + batch_nearest:
+                if want[0][0] != h.distance:
+                    raise AssertionError('first_only hit differs from brute force')
+
+        print '{:11d} {:10.1f} {:10.1f} {:11.1f} {:25.1f}'.format(
+            count, brute, cast, cast_first, cast_all)
+
+
+if __name__ == '__main__':
+    main()
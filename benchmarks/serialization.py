@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+"""pack and unpack of a gamestate update with the code generated for
+each SerializedObject class against the generic SerializedObject
+methods it replaced. run from anywhere: python benchmarks/serialization.py"""
+import contextlib
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from kidgine.math.fixed import FixedVector
+from kidgine.net import classtags
+from kidgine.net import dispatcher
+from kidgine.net import serializedobject
+from kidgine.netgame import entity
+from kidgine.netgame import gamestate
+from kidgine.netgame import messages
+
+
+class BenchEntity(entity.Entity):
+    _SERIALIZED_MEMBERS = dict(entity.Entity._SERIALIZED_MEMBERS)
+
+    def after_unpack(self):
+        # no collidable to hand ourselves to
+        pass
+
+
+serializedobject.set_class_tags(classtags.ClassTags(
+        [classtags.NoneType, BenchEntity, FixedVector]))
+
+
+def update_msg(count):
+    random.seed(5)
+    state = gamestate.DynamicGamestate()
+    for i in xrange(count):
+        state.entities[10000 + i] = BenchEntity(
+            FixedVector(random.uniform(0, 2000), random.uniform(0, 2000)))
+
+    life = gamestate.LifeMessages()
+    for i in xrange(3):
+        life.births[20000 + i] = gamestate.LifeMsgHolder(1.5 + i, BenchEntity(FixedVector(i, i)))
+        life.deaths[30000 + i] = gamestate.LifeMsgHolder(2.5, None)
+
+    delta = gamestate.GamestateDelta.create(gamestate.snapshot_fields(state), None)
+    return messages._GamestateUpdateMsg(1234, 1, 0, delta, life)
+
+
+@contextlib.contextmanager
+def generic_methods():
+    """every class packs and unpacks with SerializedObject's own methods
+    instead of its generated ones, nested objects included"""
+    base = serializedobject.SerializedObject
+    swapped = list()
+    classes = base.__subclasses__()
+    while classes:
+        cls = classes.pop()
+        classes.extend(cls.__subclasses__())
+        for name in ('pack', 'pack_into', 'unpack', 'unpack_from'):
+            fn = cls.__dict__.get(name)
+            if hasattr(fn, 'source'):
+                swapped.append((cls, name, fn))
+                setattr(cls, name, base.__dict__[name])
+    try:
+        yield
+    finally:
+        for cls,name,fn in swapped:
+            setattr(cls, name, fn)
+
+
+def best(fn, number, repeat=5):
+    """best time of one call, in microseconds"""
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number * 1e6
+
+
+def compare(name, obj, number):
+    cls = type(obj)
+
+    def unpack():
+        cls().unpack(data)
+
+    data = obj.pack()
+    pack_time = best(obj.pack, number)
+    unpack_time = best(unpack, number)
+    with generic_methods():
+        if obj.pack() != data or cls().unpack(data + 'rest') != 'rest':
+            raise AssertionError('{}: generic and generated bytes differ'.format(name))
+        generic_pack_time = best(obj.pack, number)
+        generic_unpack_time = best(unpack, number)
+
+    print '{:<34} {:6d} bytes  pack {:8.1f} -> {:7.1f} us  unpack {:8.1f} -> {:7.1f} us'.format(
+        name, len(data), generic_pack_time, pack_time, generic_unpack_time, unpack_time)
+
+
+def main():
+    print 'generic -> generated, best of 5'
+    for count in (10, 100, 1000):
+        compare('GamestateUpdateMsg, {} entities'.format(count),
+                update_msg(count), max(2000 / (count + 10), 3))
+
+    compare('MessageHeader', dispatcher.MessageHeader(7, 300, 42, 3, 9), 20000)
+    compare('TimestampMsg', messages._TimestampMsg(3.25), 20000)
+
+
+if __name__ == '__main__':
+    main()
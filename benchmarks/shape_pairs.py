@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+"""collides() between every combination of rectangle, circle and
+semicircle, on random overlapping and nearly overlapping pairs. run
+from anywhere: python benchmarks/shape_pairs.py"""
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import kidgine.collision
+from kidgine.collision import circle
+from kidgine.collision import rectangle
+from kidgine.collision import semicircle
+from kidgine.math import vector
+
+
+PAIRS = 400
+
+
+def position(rng):
+    return vector.Vector(rng.uniform(-20, 20), rng.uniform(-20, 20))
+
+
+def make_rectangle(rng):
+    return rectangle.Rectangle(
+        None,
+        vector.Vector(-rng.uniform(2, 10), -rng.uniform(2, 10)),
+        vector.Vector(rng.uniform(2, 10), rng.uniform(2, 10)),
+        center=position(rng))
+
+
+def make_circle(rng):
+    c = circle.Circle(None, vector.zero(), rng.uniform(2, 10))
+    c.center = position(rng)
+    return c
+
+
+def make_semicircle(rng):
+    s = semicircle.Semicircle(None, vector.zero(), rng.uniform(2, 10),
+                              rng.uniform(0.5, math.pi), rng.uniform(0, 2 * math.pi))
+    s.center = position(rng)
+    return s
+
+
+MAKERS = {'rect'   : make_rectangle,
+          'circle' : make_circle,
+          'semi'   : make_semicircle}
+
+COMBINATIONS = [('rect', 'rect'), ('circle', 'rect'), ('circle', 'circle'),
+                ('semi', 'rect'), ('semi', 'circle'), ('semi', 'semi')]
+
+
+def main():
+    rng = random.Random(7)
+    print 'collides() on {} random pairs, best of 7'.format(PAIRS)
+    for a,b in COMBINATIONS:
+        pairs = list()
+        for i in xrange(PAIRS):
+            shape1 = MAKERS[a](rng)
+            shape2 = MAKERS[b](rng)
+            shape1.update()
+            shape2.update()
+            pairs.append((shape1, shape2))
+
+        hits = sum(1 for shape1,shape2 in pairs
+                   if kidgine.collision.collides(shape1, shape2) is not None)
+
+        best = None
+        for repeat in xrange(7):
+            start = time.time()
+            for shape1,shape2 in pairs:
+                kidgine.collision.collides(shape1, shape2)
+            elapsed = time.time() - start
+            if best is None or elapsed < best:
+                best = elapsed
+
+        print '{:<14} {:3d} colliding  {:6.1f} us/pair'.format(
+            a + '-' + b, hits, best / PAIRS * 1e6)
+
+
+if __name__ == '__main__':
+    main()
@@ -5,6 +5,8 @@ import random
 import collision
 import kidgine.collision.circle
 import kidgine.collision.rectangle
+import kidgine.collision.shape
+import kidgine.math.vector
 import renderable
 import updatable
 from kidgine.math.vector import Vector
@@ -36,11 +38,19 @@ class Ability(object):
 # stays around for a certain duration applying an effect to all collidables
 class TimedAbility(object):
     tags = set([updatable.Tags.ability])
-    filter = set([collision.Tags.ENEMY])
+    filter = kidgine.collision.shape.TagSet([collision.Tags.ENEMY])
     pulse = False
     order = 5
+    # abilities are placed at offset from their parent by follow(), once
+    # the parent has moved for the frame. most stay where they were
+    # cast; these keep following it
+    follows_parent = False
 
-    def __init__(self):
+    def __init__(self, parent, offset):
+        self.parent = parent
+        self.offset = offset
+        self.position = parent.position + offset
+        self.placed = False
         self.time_left = self.duration
         self.rotation = 0.0
         self.last_trigger_time = -60
@@ -50,6 +60,17 @@ class TimedAbility(object):
         collision_detector.remove_collidable(self.token)
 
 
+    def follow(self, collision_detector):
+        """called by the scene after every mover has settled"""
+        if self.placed and not self.follows_parent:
+            return
+
+        self.placed = True
+        self.position.set(self.parent.position.x + self.offset.x,
+                          self.parent.position.y + self.offset.y)
+        collision_detector.update_collidable(self.token, self.collidable)
+
+
     def update(self, inputs, t, dt, collision_detector):
         self.time_left -= dt
 
@@ -88,14 +109,11 @@ class Firebolt(TimedAbility):
     order = 15
 
     def __init__(self, parent, collision_detector):
-        super(Firebolt, self).__init__()
-        self.rotation = parent.move_direction * 45.0
-
-        offset = kidgine.math.vector.from_radians(math.radians(self.rotation)) * 48
+        rotation = parent.move_direction * 45.0
+        offset = kidgine.math.vector.from_radians(math.radians(rotation)) * 48
         offset.y = -offset.y
-        self.position = (parent.position
-                         + offset
-                         + Vector(0, 16))
+        super(Firebolt, self).__init__(parent, offset + Vector(0, 16))
+        self.rotation = rotation
 
         self.token = 'firebolt'
 
@@ -103,7 +121,8 @@ class Firebolt(TimedAbility):
         br = Vector( 48,  48)
 
         self.collidable = kidgine.collision.rectangle.Rectangle(self, tl, br)
-        self.collidable.rotation = self.rotation
+        # shapes turn in radians; self.rotation is for the sprite
+        self.collidable.rotation = math.radians(self.rotation)
         collision_detector.update_collidable(self.token, self.collidable)
 
 
@@ -115,7 +134,7 @@ class Firebolt(TimedAbility):
 
 
 class Earthquake(TimedAbility):
-    filter = set([collision.Tags.ENEMY, collision.Tags.NOT_SLOWED])
+    filter = kidgine.collision.shape.TagSet([collision.Tags.ENEMY, collision.Tags.NOT_SLOWED])
     duration = 1.4
     slow = 0.5
     sprite_name = 'earth_peak'
@@ -124,9 +143,7 @@ class Earthquake(TimedAbility):
     pulse_rate = 0.4
 
     def __init__(self, parent, collision_detector):
-        super(Earthquake, self).__init__()
-
-        self.position = parent.position + Vector(0, 16)
+        super(Earthquake, self).__init__(parent, Vector(0, 16))
 
         tl = Vector(-self.size, -self.size)
         br = Vector( self.size,  self.size)
@@ -147,7 +164,7 @@ class Earthquake(TimedAbility):
 
 
 class Windblast(TimedAbility):
-    filter = set([collision.Tags.PUSHABLE])
+    filter = kidgine.collision.shape.TagSet([collision.Tags.PUSHABLE])
     duration = 0.7
     force = 500
 
@@ -158,12 +175,10 @@ class Windblast(TimedAbility):
     duration = 1.0
 
     order = 15
+    follows_parent = True
 
     def __init__(self, parent, collision_detector):
-        super(Windblast, self).__init__()
-
-        self.parent = parent
-        self.position = parent.position + Vector(0, 16)
+        super(Windblast, self).__init__(parent, Vector(0, 16))
 
         tl = Vector(-self.size, -self.size)
         br = Vector( self.size,  self.size)
@@ -176,24 +191,22 @@ class Windblast(TimedAbility):
     def apply(self, t, dt, c):
         p1 = c.shape1.owner.position
         p2 = c.shape2.owner.position
-        start_vector = Vector(p2.x - p1.x, p2.y - p1.y)
-        eject_mag = self.force  / (start_vector.magnitude() / self.size )
-        eject_vector = start_vector.normalized().rotate((random.random() - 0.5) * self.spread)
+        mark = kidgine.math.vector.scratch.mark()
+        eject_vector = kidgine.math.vector.scratch.get(p2.x - p1.x, p2.y - p1.y)
+        eject_mag = self.force  / (eject_vector.magnitude() / self.size )
+        eject_vector.inormalize().irotate((random.random() - 0.5) * self.spread)
         eject_vector *= (eject_mag * dt)
+        # apply_force adds it in, so the scratch vector can go back
         c.shape2.owner.apply_force(eject_vector)
+        kidgine.math.vector.scratch.release(mark)
         try:
             c.shape2.owner.slow(t, self.slow, self)
         except AttributeError:
             pass
 
-    def update(self, inputs, t, dt, collision_detector):
-        self.position = self.parent.position + Vector(0, 16)
-        collision_detector.update_collidable(self.token, self.collidable)
-        super(Windblast, self).update(inputs, t, dt, collision_detector)
-
 
 class Whirlpool(TimedAbility):
-    filter = set([collision.Tags.PUSHABLE])
+    filter = kidgine.collision.shape.TagSet([collision.Tags.PUSHABLE])
     duration = 4
     sprite_name = 'water_peak'
     size = 48
@@ -205,14 +218,11 @@ class Whirlpool(TimedAbility):
     slow_scale = 0.08
 
     def __init__(self, parent, collision_detector):
-        super(Whirlpool, self).__init__()
-
-        self.rotation = parent.move_direction * 45
-
-        offset = kidgine.math.vector.from_radians(math.radians(self.rotation)) * 132
+        rotation = parent.move_direction * 45
+        offset = kidgine.math.vector.from_radians(math.radians(rotation)) * 132
         offset.y = -offset.y
-        self.position = (parent.position
-                         + offset)
+        super(Whirlpool, self).__init__(parent, offset)
+        self.rotation = rotation
 
         tl = Vector(-self.size, -self.size)
         br = Vector( self.size,  self.size)
@@ -230,12 +240,14 @@ class Whirlpool(TimedAbility):
             # Slow is weak, getting stronger toward the middle.
             p1 = c.shape1.owner.position
             p2 = c.shape2.owner.position
-            start_vector = Vector(p1.x - p2.x, p1.y - p2.y)
-            svmag = start_vector.magnitude()
+            mark = kidgine.math.vector.scratch.mark()
+            pull_vector = kidgine.math.vector.scratch.get(p1.x - p2.x, p1.y - p2.y)
+            svmag = pull_vector.magnitude()
             pull_mag = svmag * self.force_mult * self.pulse_rate
-            pull_vector = start_vector.normalized().rotate(math.radians(-(45*(1-(self.size / (self.size + svmag))))))
+            pull_vector.inormalize().irotate(math.radians(-(45*(1-(self.size / (self.size + svmag))))))
             pull_vector *= pull_mag**0.5
             c.shape2.owner.apply_force(pull_vector)
+            kidgine.math.vector.scratch.release(mark)
             c.shape2.owner.slow(t, min(self.min_slow, self.min_slow / (pull_mag * self.slow_scale)), self)
         except AttributeError:
             pass
@@ -47,10 +47,12 @@ class Character(object):
         else:
             self.health = self.max_health * health_scaling
         self.last_hit = 0
+        self.last = Vector()
 
     def update(self, t, dt, direction):
         if direction.magnitude_sqr() > 0.1:
-            self.last = direction
+            # direction may be a scratch vector
+            self.last.set(direction.x, direction.y)
             self.moving = True
             if math.fabs(direction.x) > math.fabs(direction.y):
                 if direction.x > 0:
@@ -116,7 +118,11 @@ class Character(object):
 
 class CollidableCharacter(Character):
     counter = 0
-    environment_filters = set([collision.Tags.ENVIRONMENT, kidgine.collision.shape.tags.IMPEEDS_MOVEMENT])
+    environment_filters = kidgine.collision.shape.TagSet([collision.Tags.ENVIRONMENT, kidgine.collision.shape.tags.IMPEEDS_MOVEMENT])
+    # push out of level tiles using the level's TileGrid instead of
+    # collides(); only level tiles match environment_filters. off until
+    # TileGrid.resolve() pushes the same way as collides() does
+    use_tile_grid = False
 
     def __init__(self, position):
         super(CollidableCharacter, self).__init__(position)
@@ -129,7 +135,26 @@ class CollidableCharacter(Character):
         self.collidable = kidgine.collision.rectangle.Rectangle(self, tl, br)
         self.collidable.tags = set([kidgine.collision.shape.tags.IMPEEDS_MOVEMENT])
 
+        # our own until the scene adds us; added() moves them into a
+        # slot of the scene's movers
+        self.velocity = Vector()
         self.forces = Vector()
+        self.motion = Vector()
+        self.movers = None
+
+
+    def added(self, movers):
+        """position, velocity and forces become views of a slot in
+        movers, keeping their values"""
+        velocity, forces = self.velocity, self.forces
+        self.movers = movers
+        self.slot = movers.add(self.position)
+        self.position = movers.position(self.slot)
+        self.velocity = movers.velocity(self.slot)
+        self.velocity.set(velocity.x, velocity.y)
+        self.forces = movers.forces(self.slot)
+        self.forces.set(forces.x, forces.y)
+        self.motion = movers.motion(self.slot)
 
 
     def apply_force(self, force, debug=False):
@@ -143,30 +168,47 @@ class CollidableCharacter(Character):
 
 
     def reset_force(self):
-        self.forces = Vector()
+        self.forces.set(0., 0.)
 
 
     def removed(self, collision_detector):
         collision_detector.remove_collidable(self.token)
+        # the slot is cleared for reuse; keep where we ended up
+        self.position = self.position.copy()
+        self.movers.remove(self.slot)
+        self.movers = None
 
 
     def update(self, inputs, t, dt, direction, collision_detector):
         super(CollidableCharacter, self).update(t, dt, direction)
-        self.position = self.position + direction * dt + self.forces
-
-        all = collision_detector.collides(token=self.token,
-                                          filters=self.environment_filters)
-        if len(all) > 0:
-            normal = Vector()
-            for c in all:
-                if normal.dot(c.translation_vector) == 0:
-                    normal += c.translation_vector
-            self.position += normal
+        # the scene moves everyone by velocity and forces once all
+        # updatables ran, then calls settle()
+        self.velocity.set(direction.x, direction.y)
+
+
+    def settle(self, collision_detector):
+        """fix up the move the scene's movers.integrate() just made:
+        stop at walls in the way and get pushed out of any overlap"""
+        collision.settle_motion(collision_detector, self.token, self.position,
+                                self.motion, self.environment_filters)
+
+        grid = collision_detector.tile_grid
+        if self.use_tile_grid and grid is not None:
+            push = grid.resolve(*self.collidable.aabb_at(self.position))
+            if push is not None:
+                self.position += push
+        else:
+            all = collision_detector.collides(token=self.token,
+                                              filters=self.environment_filters)
+            if len(all) > 0:
+                normal = Vector()
+                for c in all:
+                    if normal.dot(c.translation_vector) == 0:
+                        normal += c.translation_vector
+                self.position += normal
 
         collision_detector.update_collidable(self.token, self.collidable)
 
-        self.reset_force()
-
 
 class HermitCharacter(Character):
     renderable_type = renderable.HermitRenderable
@@ -205,10 +247,13 @@ class GirlCharacter(CollidableCharacter):
 
     def update(self, inputs, t, dt, collision_detector):
         # move to new position
-        direction = Vector(inputs.leftright, inputs.updown)
+        mark = kidgine.math.vector.scratch.mark()
+        direction = kidgine.math.vector.scratch.get(inputs.leftright, inputs.updown)
         self._set_move_dir(inputs.leftright, inputs.updown)
-        direction = direction.normalized() * 140.0
+        direction.inormalize()
+        direction *= 140.0
         super(GirlCharacter, self).update(inputs, t, dt, direction, collision_detector)
+        kidgine.math.vector.scratch.release(mark)
 
         # activate abilities
         new_objs = list()
@@ -249,7 +294,7 @@ class GirlCharacter(CollidableCharacter):
 
 class MeleeEnemy(CollidableCharacter):
     tags = set([updatable.Tags.enemy])
-    player_filter = set([collision.Tags.PLAYER])
+    player_filter = kidgine.collision.shape.TagSet([collision.Tags.PLAYER])
     damage_delay = 0.5
     max_health = 60.0
     base_damage = 10
@@ -300,12 +345,16 @@ class MeleeEnemy(CollidableCharacter):
 
 
     def update(self, inputs, t, dt, collision_detector):
+        mark = kidgine.math.vector.scratch.mark()
         direction = kidgine.math.vector.constant_zero
         if self.target:
-            direction = (self.target.position - self.position).normalized()
+            direction = kidgine.math.vector.scratch.get(
+                self.target.position.x - self.position.x,
+                self.target.position.y - self.position.y).inormalize()
             direction *= self.speed * self.slow_factor
 
         super(MeleeEnemy, self).update(inputs, t, dt, direction, collision_detector)
+        kidgine.math.vector.scratch.release(mark)
 
         self.reset_slow(t)
 
@@ -329,23 +378,27 @@ class BombEnemy(MeleeEnemy):
     def update(self, inputs, t, dt, collision_detector):
         bomb = None
 
-        direction = Vector(0.0,0.0)
+        scratch = kidgine.math.vector.scratch
+        mark = scratch.mark()
+        direction = scratch.get(0.0, 0.0)
         if self.target:
-            target_vector = self.target.position - self.position
+            target_vector = scratch.get(self.target.position.x - self.position.x,
+                                        self.target.position.y - self.position.y)
             if target_vector.shorter_than(128):
                 # move away from target
-                direction = -target_vector.normalized()
+                direction.set(-target_vector.x, -target_vector.y).inormalize()
             elif target_vector.shorter_than(256) and t - self.last_damage_time > self.throw_delay:
                 self.last_damage_time = t
                 # throw bomb
-                bomb = updatable.Bomb(self.position, target_vector.normalized() * self.bomb_speed)
+                bomb = updatable.Bomb(self.position.copy(), target_vector.normalized() * self.bomb_speed)
             elif target_vector.shorter_than(512):
                 # move toward target
-                direction = target_vector.normalized()
+                direction.set(target_vector.x, target_vector.y).inormalize()
 
             direction *= self.speed * self.slow_factor
 
         super(MeleeEnemy, self).update(inputs, t, dt, direction, collision_detector)
+        scratch.release(mark)
 
         self.reset_slow(t)
 
@@ -369,23 +422,27 @@ class SpearEnemy(MeleeEnemy):
     def update(self, inputs, t, dt, collision_detector):
         spear = None
 
-        direction = Vector(0.0,0.0)
+        scratch = kidgine.math.vector.scratch
+        mark = scratch.mark()
+        direction = scratch.get(0.0, 0.0)
         if self.target:
-            target_vector = self.target.position - self.position
+            target_vector = scratch.get(self.target.position.x - self.position.x,
+                                        self.target.position.y - self.position.y)
             if target_vector.shorter_than(128):
                 # move away from target
-                direction = -target_vector.normalized()
+                direction.set(-target_vector.x, -target_vector.y).inormalize()
             elif target_vector.shorter_than(256) and t - self.last_damage_time > self.throw_delay:
                 self.last_damage_time = t
                 # throw spear
-                spear = updatable.Spear(self.position, target_vector.normalized() * self.spear_speed)
+                spear = updatable.Spear(self.position.copy(), target_vector.normalized() * self.spear_speed)
             elif target_vector.shorter_than(512):
                 # move toward target
-                direction = target_vector.normalized()
+                direction.set(target_vector.x, target_vector.y).inormalize()
 
             direction *= self.speed * self.slow_factor
 
         super(MeleeEnemy, self).update(inputs, t, dt, direction, collision_detector)
+        scratch.release(mark)
 
         self.reset_slow(t)
 
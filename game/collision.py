@@ -8,3 +8,34 @@ Tags = kidgine.utils.enum(
     NOT_SLOWED = 5,
     PROJECTILE = 6,
     PUSHABLE = 7)
+
+# anything moving further than this in one frame is swept against the
+# environment first so it can not pass through thin walls
+SWEEP_DISTANCE = 8
+
+
+def sweep_motion(collision_detector, token, motion, filters):
+    """clip motion against the first thing in its way and slide the
+    rest along it. short motions are returned untouched"""
+    if motion.shorter_than(SWEEP_DISTANCE):
+        return motion
+
+    hit = collision_detector.sweep(token=token, motion=motion, filters=filters)
+    if hit is None:
+        return motion
+
+    travelled = motion * hit.time
+    remaining = motion - travelled
+    return travelled + (remaining - hit.normal * remaining.dot(hit.normal))
+
+
+def settle_motion(collision_detector, token, position, motion, filters):
+    """redo a move by motion that was already added to position (by
+    the scene's movers.integrate()) as sweep_motion would have clipped
+    it. short motions are left alone"""
+    if motion.shorter_than(SWEEP_DISTANCE):
+        return
+
+    # sweeps start from the owner's position; go back first
+    position.isub(motion)
+    position.iadd(sweep_motion(collision_detector, token, motion, filters))
@@ -7,6 +7,7 @@ import pyglet.sprite
 
 import kidgine.collision.rectangle
 import kidgine.collision.shape
+import kidgine.collision.tilegrid
 import kidgine.utils
 import tileset
 from kidgine.math.vector import Vector
@@ -29,6 +30,9 @@ class Level(object):
 
         self.filename = filename
 
+        # collect the solid tiles first so that runs and blocks of them
+        # can be registered as a few large rectangles
+        solid = set()
         for layer in json_level['layers']:
             if not layer['visible']:
                 continue
@@ -41,17 +45,35 @@ class Level(object):
                 if not tiles.collides(tile):
                     continue
 
-                x = 32 * (i % width)
-                y = 32 * (height - i / width)
+                solid.add((i % width, i / width))
 
-                center = Vector(x + 16, y + 16)
-                tl = Vector(-16, -16)
-                br = Vector(16, 16)
+        # the same tiles as a bitmap in world rows, for characters that
+        # resolve against the grid directly
+        self.tile_grid = kidgine.collision.tilegrid.TileGrid(32)
+        for column,row in solid:
+            self.tile_grid.add(column, height - row)
+        collision_detector.tile_grid = self.tile_grid
 
-                token = '{}_{}_{}'.format(filename, x, y)
-                c = kidgine.collision.rectangle.Rectangle(None, tl, br, center = center)
-                c.tags = set([kidgine.collision.shape.tags.IMPEEDS_MOVEMENT, Tags.ENVIRONMENT])
-                collision_detector.update_collidable(token, c)
+        rectangles = _merge_tiles(solid)
+        logger.info('{}: {} collision tiles merged into {} rectangles'.format(
+                filename, len(solid), len(rectangles)))
+
+        for column,row,columns,rows in rectangles:
+            # rows count down from the top of the level
+            x = 32 * column
+            y = 32 * (height - (row + rows - 1))
+            half = Vector(16 * columns, 16 * rows)
+
+            center = Vector(x, y) + half
+            tl = -half
+            br = half
+
+            # named after its bottom left tile; the other tiles it
+            # covers have no token of their own
+            token = '{}_{}_{}'.format(filename, x, y)
+            c = kidgine.collision.rectangle.Rectangle(None, tl, br, center = center)
+            c.tags = set([kidgine.collision.shape.tags.IMPEEDS_MOVEMENT, Tags.ENVIRONMENT])
+            collision_detector.add_static_collidable(token, c)
 
 
     def update(self, inputs, t, dt, collision_detector):
@@ -82,3 +104,31 @@ def _get_tileset(filename, path):
         # this is hacky: pyglet.resource expects forward slashes
         tileset_path = tileset_path.replace('\\', '/')
         return tileset.get_tileset(tileset_path)
+
+
+def _merge_tiles(solid):
+    """cover a set of (column, row) tiles with non-overlapping
+    rectangles, returned as (column, row, columns, rows). each
+    rectangle grabs the longest run along its first row and then
+    as many rows below as are solid across the whole run"""
+    remaining = set(solid)
+    rectangles = list()
+    for column,row in sorted(solid, key=lambda tile: (tile[1], tile[0])):
+        if (column, row) not in remaining:
+            continue
+
+        columns = 1
+        while (column + columns, row) in remaining:
+            columns += 1
+
+        rows = 1
+        while all((c, row + rows) in remaining for c in xrange(column, column + columns)):
+            rows += 1
+
+        for c in xrange(column, column + columns):
+            for r in xrange(row, row + rows):
+                remaining.discard((c, r))
+
+        rectangles.append((column, row, columns, rows))
+
+    return rectangles
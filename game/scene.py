@@ -10,6 +10,7 @@ import character
 import game
 import inputs
 import kidgine.collision
+import kidgine.movers
 import level
 import renderer
 import trigger
@@ -22,7 +23,11 @@ logger = logging.getLogger(__name__)
 
 class Scene(object):
     def __init__(self, level_name):
-        self._collision_detector = kidgine.collision.CollisionDetector()
+        self._collision_detector = kidgine.collision.CollisionDetector(batch_narrow_phase=True)
+        # positions, velocities and forces of everything that moves
+        # itself, integrated at once after the updatables ran. movers
+        # take a slot when added, so a scene's slots go away with it
+        self.movers = kidgine.movers.Movers()
         self.drawable = renderer.SceneRenderer()
         self._inputs = inputs.Inputs()
 
@@ -66,8 +71,11 @@ class Scene(object):
         self._scene_time += dt
 
         # calculate collision forces
-        all = self._collision_detector.all_collisions()
-        for c in all:
+        contacts = self._collision_detector.update_contacts()
+        for c in contacts.began:
+            self._dispatch_contact('contact_begin', t, c)
+
+        for c in contacts.collisions:
             try:
                 c.shape1.owner.collides(t, c.shape2)
             except AttributeError:
@@ -85,6 +93,9 @@ class Scene(object):
             self._add_force(c.shape1.owner, c.shape1.tags, force)
             self._add_force(c.shape2.owner, c.shape2.tags, -force)
 
+        for c in contacts.ended:
+            self._dispatch_contact('contact_end', t, c)
+
         # run all updatables
         all_new_objs = list()
         for obj in self.updatables:
@@ -92,10 +103,25 @@ class Scene(object):
             if new_things is not None:
                 all_new_objs.extend(new_things)
 
+        # move everything the updatables set going in one pass, then
+        # let each mover settle against the environment
+        self.movers.integrate(dt)
+        for obj in self.updatables:
+            settle = getattr(obj, 'settle', None)
+            if settle is not None:
+                settle(self._collision_detector)
+
         # add new things
         for o in all_new_objs:
             self.add_updatable(o)
 
+        # then place whatever goes relative to a mover (abilities at
+        # their caster) where it ended up this frame
+        for obj in self.updatables:
+            follow = getattr(obj, 'follow', None)
+            if follow is not None:
+                follow(self._collision_detector)
+
         # remove dead things
         to_remove = list()
         for obj in self.updatables:
@@ -118,6 +144,15 @@ class Scene(object):
             pass
 
 
+    def _dispatch_contact(self, event, t, c):
+        # owners opt in to contact transitions by defining contact_begin
+        # and/or contact_end(t, shape); collides() still runs every frame
+        for owner,shape in ((c.shape1.owner, c.shape2), (c.shape2.owner, c.shape1)):
+            handler = getattr(owner, event, None)
+            if handler is not None:
+                handler(t, shape)
+
+
     def _add_force(self, obj, tags, force):
         if Tags.PLAYER in tags:
             force *= 0.2
@@ -173,10 +208,13 @@ class Scene(object):
     def remove_abilities(self):
         for u in list(self.updatables):
             if updatable.Tags.ability in u.get_tags():
-                self.updatables.remove(u)
+                self.remove_updatable(u)
 
 
     def add_updatable(self, c):
+        added = getattr(c, 'added', None)
+        if added is not None:
+            added(self.movers)
         self.updatables.add(c)
         self.drawable.add_renderable(c)
 
@@ -186,12 +186,14 @@ class Spike(object):
     counter = 0
     tags = set([Tags.spike])
     damage = 20
-    added = False
-    last_damage_time = 0
+    registered = False
+    # while someone stays on the spike, they are hit again this often
     cooldown = 0.4
 
     def __init__(self, position):
         self.position = position
+        # owners standing on the spike -> when they were last hit
+        self.touching = dict()
 
         tl = Vector(-16, -16)
         br = Vector( 16,  16)
@@ -203,12 +205,25 @@ class Spike(object):
                 collision.Tags.ENVIRONMENT])
 
 
-    def collides(self, t, shape):
+    def contact_begin(self, t, shape):
         if collision.Tags.PLAYER in shape.tags or collision.Tags.ENEMY in shape.tags:
-            if t - self.last_damage_time > self.cooldown:
-                self.last_damage_time = t
-                shape.owner.damage(t, self.damage)
-                shape.owner.apply_force(-shape.owner.last.normalized() * 24)
+            self._hit(t, shape)
+
+
+    def collides(self, t, shape):
+        last = self.touching.get(shape.owner)
+        if last is not None and t - last > self.cooldown:
+            self._hit(t, shape)
+
+
+    def contact_end(self, t, shape):
+        self.touching.pop(shape.owner, None)
+
+
+    def _hit(self, t, shape):
+        self.touching[shape.owner] = t
+        shape.owner.damage(t, self.damage)
+        shape.owner.apply_force(-shape.owner.last.normalized() * 24)
 
 
     def slow(self, t, slow_factor, thing_that_is_slowing):
@@ -236,9 +251,9 @@ class Spike(object):
 
 
     def update(self, inputs, t, dt, collision_detector):
-        if not self.added:
+        if not self.registered:
             collision_detector.update_collidable(self.token, self.collidable)
-            self.added = True
+            self.registered = True
 
 
     def create_renderable(self):
@@ -253,7 +268,7 @@ class Bomb(object):
     time = 1.5
     tags = set([Tags.projectile])
     counter = 0
-    environment_filters = set([collision.Tags.ENVIRONMENT, kidgine.collision.shape.tags.IMPEEDS_MOVEMENT])
+    environment_filters = kidgine.collision.shape.TagSet([collision.Tags.ENVIRONMENT, kidgine.collision.shape.tags.IMPEEDS_MOVEMENT])
     damage = 10
     slow_time = 0
     slow_factor = 1.0
@@ -261,6 +276,7 @@ class Bomb(object):
     def __init__(self, position, throw_vector):
         self.position = position
         self.forces = throw_vector
+        self.moving = False
         self.time_left = self.time
         self.explosion_time_left = self.explosion_time
         self.explosion_triggered = False
@@ -308,12 +324,27 @@ class Bomb(object):
 
     def removed(self, collision_detector):
         collision_detector.remove_collidable(self.token)
+        # the slot is cleared for reuse; keep where we ended up
+        self.position = self.position.copy()
+        self.movers.remove(self.slot)
+        self.movers = None
 
 
     def get_tags(self):
         return self.tags
 
 
+    def added(self, movers):
+        # the position moves into a slot of the scene's movers. forces
+        # stays our own: it is the distance thrown per frame and is
+        # copied into the slot's forces (the impulse) each update
+        self.movers = movers
+        self.slot = movers.add(self.position)
+        self.position = movers.position(self.slot)
+        self.impulse = movers.forces(self.slot)
+        self.motion = movers.motion(self.slot)
+
+
     def _trigger(self):
         self.explosion_triggered = True
 
@@ -325,25 +356,38 @@ class Bomb(object):
             if self.time_left <= 0.0:
                 self._trigger()
 
-            self.position = self.position + self.forces * self.slow_factor
-
-            all = collision_detector.collides(token=self.token,
-                                              filters=self.environment_filters)
-            if len(all) > 0:
-                normal = Vector()
-                for c in all:
-                    if normal.dot(c.translation_vector) == 0:
-                        normal += c.translation_vector
-                self.position += normal
-
-            collision_detector.update_collidable(self.token, self.collidable)
+            # moved by the scene along with everything else; see settle()
+            self.impulse.set(self.forces.x * self.slow_factor,
+                             self.forces.y * self.slow_factor)
+            self.moving = True
 
         else:
             self.explosion_time_left -= dt
+            self.moving = False
 
         self.reset_slow(t)
 
 
+    def settle(self, collision_detector):
+        """fix up the move the scene's movers.integrate() just made"""
+        if not self.moving:
+            return
+
+        collision.settle_motion(collision_detector, self.token, self.position,
+                                self.motion, self.environment_filters)
+
+        all = collision_detector.collides(token=self.token,
+                                          filters=self.environment_filters)
+        if len(all) > 0:
+            normal = Vector()
+            for c in all:
+                if normal.dot(c.translation_vector) == 0:
+                    normal += c.translation_vector
+            self.position += normal
+
+        collision_detector.update_collidable(self.token, self.collidable)
+
+
     def reset_slow(self, t):
         # if we haven't been slowed in a while, reset
         if t - self.slow_time > 0.4:
@@ -363,12 +407,13 @@ class Spear(Bomb):
     time_left = 0
     tags = set([Tags.projectile])
     counter = 0
-    environment_filters = set([collision.Tags.ENVIRONMENT, kidgine.collision.shape.tags.IMPEEDS_MOVEMENT])
+    environment_filters = kidgine.collision.shape.TagSet([collision.Tags.ENVIRONMENT, kidgine.collision.shape.tags.IMPEEDS_MOVEMENT])
     damage = 10
 
     def __init__(self, position, throw_vector):
         self.position = position
         self.forces = throw_vector
+        self.moving = False
         self.forced = False
         self.time_left = self.time
 
@@ -398,18 +443,9 @@ class Spear(Bomb):
     def update(self, inputs, t, dt, collision_detector):
         self.time_left -= dt
 
-        self.position = self.position + self.forces
-
-        all = collision_detector.collides(token=self.token,
-                                          filters=self.environment_filters)
-        if len(all) > 0:
-            normal = Vector()
-            for c in all:
-                if normal.dot(c.translation_vector) == 0:
-                    normal += c.translation_vector
-            self.position += normal
-
-        collision_detector.update_collidable(self.token, self.collidable)
+        # moved by the scene; Bomb.settle() does the rest
+        self.impulse.set(self.forces.x, self.forces.y)
+        self.moving = True
 
     def create_renderable(self):
         def wrapped(batch, group):
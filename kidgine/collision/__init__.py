@@ -1,7 +1,17 @@
+import collections
+import functools
 import itertools
 import logging
 
+import batch
+import compound
+import gridwalk
+import hierarchicalgrid
+import rectangle
 import shape
+import sortandsweep
+import staticgrid
+import tilegrid
 from ..math import vector
 
 
@@ -19,27 +29,90 @@ class CollisionInfo(object):
         self.token2 = token2
 
 
+class Contacts(object):
+    """what changed between two calls to
+    CollisionDetector.update_contacts. collisions is every collision
+    this frame, as all_collisions() reports them; began, persisted and
+    ended hold one CollisionInfo per pair of collidables (ended ones as
+    they were last seen)"""
+    def __init__(self, collisions, began, persisted, ended):
+        self.collisions = collisions
+        self.began = began
+        self.persisted = persisted
+        self.ended = ended
+
+
+class SweepInfo(object):
+    def __init__(self, time, normal, shape1, shape2, token1, token2):
+        # fraction of the motion that can be travelled before touching
+        self.time = time
+        # unit vector pointing from shape2 back towards shape1
+        self.normal = normal
+        self.shape1 = shape1
+        self.shape2 = shape2
+        self.token1 = token1
+        self.token2 = token2
+
+
+class RaycastInfo(object):
+    def __init__(self, distance, point, normal, shape, token):
+        self.distance = distance
+        self.point = point
+        self.normal = normal
+        self.shape = shape
+        self.token = token
+
+
 def collides(shape1, shape2, shape1_pos=None, shape2_pos=None):
+    if isinstance(shape1, compound.CompoundShape) or isinstance(shape2, compound.CompoundShape):
+        return _collides_compound(shape1, shape2, shape1_pos, shape2_pos)
+
     all_axes = (shape1.all_projecting_axes(shape1_pos, shape2, shape2_pos) +
                 shape2.all_projecting_axes(shape2_pos, shape1, shape1_pos))
 
     min_distance = None
-    min_translation_vector = None
+    min_axis = None
+    min_mult = None
 
     for axis in all_axes:
         min_a, max_a = shape1.project_onto_axis(shape1_pos, axis)
         min_b, max_b = shape2.project_onto_axis(shape2_pos, axis)
 
         dist, mult = _overlap(min_a, max_a, min_b, max_b)
-        translation_vector = None
         if dist > 0:
             if min_distance is None or dist < min_distance:
                 min_distance = dist
-                min_translation_vector = axis * dist * mult
+                min_axis = axis
+                min_mult = mult
         else:
             return None
 
-    return CollisionInfo(min_distance, -min_translation_vector, shape1, shape2, None, None)
+    # -(axis * dist * mult), built once for the winning axis
+    translation_vector = vector.Vector(-(min_axis.x * min_distance * min_mult),
+                                       -(min_axis.y * min_distance * min_mult))
+    return CollisionInfo(min_distance, translation_vector, shape1, shape2, None, None)
+
+
+def _collides_compound(shape1, shape2, shape1_pos, shape2_pos):
+    """collides() part by part; the deepest overlap is reported
+    against the compound shapes themselves"""
+    parts1 = getattr(shape1, 'parts', (shape1,))
+    parts2 = getattr(shape2, 'parts', (shape2,))
+
+    deepest = None
+    for a in parts1:
+        a_aabb = a.aabb_at(shape1_pos)
+        for b in parts2:
+            if not shape.aabb_overlap(a_aabb, b.aabb_at(shape2_pos)):
+                continue
+            c = collides(a, b, shape1_pos, shape2_pos)
+            if c is not None and (deepest is None or c.distance > deepest.distance):
+                deepest = c
+
+    if deepest is None:
+        return None
+
+    return CollisionInfo(deepest.distance, deepest.translation_vector, shape1, shape2, None, None)
 
 
 def _overlap(min_a, max_a, min_b, max_b):
@@ -49,26 +122,233 @@ def _overlap(min_a, max_a, min_b, max_b):
         return -(min_a - max_b), -1
 
 
+SWEEP_ITERATIONS = 8
+# pixels; a sweep passing closer than this may step over the shape
+SWEEP_MIN_STEP = 0.1
+
+def sweep(shape1, shape2, motion, shape1_pos=None):
+    """find the first time shape1 touches shape2 when moved by motion
+    from shape1_pos. shapes that already overlap before moving are not
+    reported; use collides() for those"""
+    start = shape1._position(shape1_pos)
+    a = shape1.aabb_at(start)
+    b = shape2.aabb
+
+    entry = _sweep_aabb(a, b, motion)
+    if entry is None:
+        return None
+    t_entry, t_exit, axis = entry
+
+    if _box_shaped(shape1) and _box_shaped(shape2):
+        # the boxes are the shapes; the box sweep is exact
+        if t_entry < 0:
+            return None
+        return SweepInfo(t_entry, _entry_normal(axis, motion), shape1, shape2, None, None)
+
+    # the shapes can only touch while their boxes overlap. step through
+    # that interval by the gap between the shapes, which they can not
+    # close in less, then bisect the first step that hits
+    free = max(t_entry, 0.0)
+    end = min(t_exit, 1.0)
+    if collides(shape1, shape2, start + motion * free) is not None:
+        if t_entry <= 0:
+            return None
+        # touching a flat side right where the boxes meet
+        return SweepInfo(free, _entry_normal(axis, motion), shape1, shape2, None, None)
+
+    length = motion.magnitude()
+    t = free
+    while True:
+        gap = _separation(shape1, shape2, start + motion * t)
+        if gap <= 0:
+            hit = collides(shape1, shape2, start + motion * t)
+            if hit is not None:
+                break
+        free = t
+        if t >= end:
+            return None
+        t = min(t + max(gap, SWEEP_MIN_STEP) / length, end)
+
+    for i in range(SWEEP_ITERATIONS):
+        middle = (free + t) / 2.0
+        c = collides(shape1, shape2, start + motion * middle)
+        if c is None:
+            free = middle
+        else:
+            t = middle
+            hit = c
+
+    return SweepInfo(free, hit.translation_vector.normalized(), shape1, shape2, None, None)
+
+
+def _separation(shape1, shape2, shape1_pos):
+    """the widest gap between the shapes along any of their separating
+    axes, or 0 if they overlap along all of them. they are at least
+    this far apart"""
+    if isinstance(shape1, compound.CompoundShape) or isinstance(shape2, compound.CompoundShape):
+        return min(_separation(a, b, shape1_pos)
+                   for a in getattr(shape1, 'parts', (shape1,))
+                   for b in getattr(shape2, 'parts', (shape2,)))
+
+    all_axes = (shape1.all_projecting_axes(shape1_pos, shape2, None) +
+                shape2.all_projecting_axes(None, shape1, shape1_pos))
+
+    gap = 0.0
+    for axis in all_axes:
+        min_a, max_a = shape1.project_onto_axis(shape1_pos, axis)
+        min_b, max_b = shape2.project_onto_axis(None, axis)
+        gap = max(gap, min_b - max_a, min_a - max_b)
+    return gap
+
+
+def _entry_normal(axis, motion):
+    """normal of the box face entered along axis when moving by motion"""
+    normal = vector.zero()
+    if axis == 0:
+        normal.x = -1.0 if motion.x > 0 else 1.0
+    else:
+        normal.y = -1.0 if motion.y > 0 else 1.0
+    return normal
+
+
+def _box_shaped(s):
+    return isinstance(s, rectangle.Rectangle) and s.rotation == 0
+
+
+def _sweep_aabb(a, b, motion):
+    """times at which box a, moving by motion, starts and stops
+    overlapping box b, and the axis (0 for x, 1 for y) it enters
+    along. None if they never overlap during the motion"""
+    t_entry = float('-inf')
+    t_exit = float('inf')
+    entry_axis = None
+
+    for axis,distance in ((0, motion.x), (1, motion.y)):
+        a_min, a_max = a[axis], a[axis + 2]
+        b_min, b_max = b[axis], b[axis + 2]
+
+        if distance == 0:
+            if a_max <= b_min or a_min >= b_max:
+                return None
+            continue
+
+        t1 = (b_min - a_max) / float(distance)
+        t2 = (b_max - a_min) / float(distance)
+        if t1 > t2:
+            t1,t2 = t2,t1
+
+        if t1 > t_entry:
+            t_entry = t1
+            entry_axis = axis
+        t_exit = min(t_exit, t2)
+
+    if entry_axis is None or t_entry >= t_exit or t_entry > 1 or t_exit <= 0:
+        return None
+
+    return t_entry, t_exit, entry_axis
+
+
 
 class SpatialHash(object):
-    GRID_SIZE = 128 # must not be smaller than the largest collidable
+    GRID_SIZE = 128 # must not be smaller than the largest collidable; see HierarchicalGrid
 
     @staticmethod
     def _hash_func(position):
-        return (int(position.x / SpatialHash.GRID_SIZE), int(position.y / SpatialHash.GRID_SIZE))
+        # float division: integer coordinates must truncate the same way
+        size = float(SpatialHash.GRID_SIZE)
+        return (int(position.x / size), int(position.y / size))
+
+    @staticmethod
+    def _cell_index(cell):
+        # _hash_func truncates, so hash cell 0 spans both sides of the
+        # axis; map a floored grid cell onto the hash cell holding it
+        if cell < 0:
+            return cell + 1
+        return cell
 
     class _Info:
         def __init__(self, collidable, new_pos=None):
             if new_pos is None:
-                new_pos = collidable.transformed_point(vector.constant_zero)
+                new_pos = collidable._position()
 
             self.collidable = collidable
             self.index = SpatialHash._hash_func(new_pos)
 
 
+    class _Bucket(dict):
+        """the collidables hashed to one cell by token, plus an index of
+        them by tag so a filtered query only visits those that can
+        match. by_tag never holds empty entries"""
+        def __init__(self):
+            super(SpatialHash._Bucket, self).__init__()
+            self.by_tag = dict()
+
+
+        def insert(self, token, info):
+            self[token] = info
+            self._index(token, info)
+
+
+        def discard(self, token):
+            info = self.pop(token)
+            self._unindex(token, info)
+
+
+        def retag(self, token):
+            """re-index a collidable after its tags changed in place"""
+            info = self[token]
+            self._unindex(token, info)
+            self._index(token, info)
+
+
+        def matches(self, tags):
+            """false if no collidable in the bucket can have all of tags"""
+            for tag in tags:
+                if tag not in self.by_tag:
+                    return False
+            return True
+
+
+        def candidates(self, tags):
+            """(token, info) for every collidable that may have all of
+            tags, taken from the smallest index among them"""
+            if len(tags) == 0:
+                return self.iteritems()
+
+            smallest = None
+            for tag in tags:
+                indexed = self.by_tag.get(tag)
+                if indexed is None:
+                    return ()
+                if smallest is None or len(indexed) < len(smallest):
+                    smallest = indexed
+            return smallest.iteritems()
+
+
+        def _index(self, token, info):
+            info.indexed_tags = tuple(info.collidable.tags)
+            for tag in info.indexed_tags:
+                if tag not in self.by_tag:
+                    self.by_tag[tag] = dict()
+                self.by_tag[tag][token] = info
+
+
+        def _unindex(self, token, info):
+            for tag in info.indexed_tags:
+                indexed = self.by_tag[tag]
+                del indexed[token]
+                if len(indexed) == 0:
+                    del self.by_tag[tag]
+
+
     def __init__(self):
         self.collidables = dict()
         self.hash = dict()
+        # updates that kept the collidable in its bucket, and those
+        # where it had not moved at all so its transformed points were
+        # not recomputed either
+        self.rehashes_avoided = 0
+        self.transforms_skipped = 0
 
 
     def clear(self):
@@ -86,16 +366,35 @@ class SpatialHash(object):
 
 
     def update(self, token, collidable):
-        if token in self.collidables:
-            old = self.collidables[token]
-            del self.hash[old.index][token]
+        info = self.collidables.get(token)
+        if info is not None and info.collidable is collidable:
+            # same collidable; move its entry only if it changed cells
+            if not collidable.update_if_moved():
+                self.transforms_skipped += 1
+                self.rehashes_avoided += 1
+                return
+
+            index = SpatialHash._hash_func(collidable._position())
+            if index == info.index:
+                self.rehashes_avoided += 1
+                return
+
+            self.hash[info.index].discard(token)
+            info.index = index
+        else:
+            if info is not None:
+                self.hash[info.index].discard(token)
+
+            collidable.update()
+            info = SpatialHash._Info(collidable)
+            self.collidables[token] = info
 
-        collidable.update()
-        info = SpatialHash._Info(collidable)
         if info.index not in self.hash:
-            self.hash[info.index] = dict()
-        self.collidables[token] = info
-        self.hash[info.index][token] = info
+            self.hash[info.index] = SpatialHash._Bucket()
+        bucket = self.hash[info.index]
+        bucket.insert(token, info)
+        # keeps the bucket's tag index in step with in-place changes
+        collidable.tag_listener = functools.partial(bucket.retag, token)
 
 
     def size(self):
@@ -103,12 +402,16 @@ class SpatialHash(object):
 
 
     def remove(self, token):
-        del self.hash[self.collidables[token].index][token]
-        del self.collidables[token]
+        info = self.collidables.pop(token)
+        self.hash[info.index].discard(token)
+        info.collidable.tag_listener = None
 
 
-    def all_potential_collidables(self):
+    def all_potential_collidables(self, mask=0):
+        """mask skips pairs of buckets where neither can match it"""
+        tags = shape.mask_tags(mask)
         for index,bucket in self.hash.iteritems():
+            bucket_matches = bucket.matches(tags)
             adjacent = (
                 index,
                 (index[0] + 1, index[1] - 1),
@@ -117,11 +420,16 @@ class SpatialHash(object):
                 (index[0]    , index[1] + 1))
             for index in adjacent:
                 if index in self.hash:
-                    for a,b in itertools.product(bucket.iteritems(), self.hash[index].iteritems()):
+                    other = self.hash[index]
+                    if not bucket_matches and not other.matches(tags):
+                        continue
+                    for a,b in itertools.product(bucket.iteritems(), other.iteritems()):
                         yield a,b
 
 
-    def potential_collidables(self, token=None, collidable=None, new_pos=None):
+    def potential_collidables(self, token=None, collidable=None, new_pos=None, mask=0):
+        """with a mask only collidables that may match it are
+        visited"""
         if token is not None and collidable is not None:
             raise RuntimeError('may pass in token or collidable but not both')
 
@@ -150,17 +458,95 @@ class SpatialHash(object):
             (index[0],     index[1] + 1),
         )
 
+        tags = shape.mask_tags(mask)
         for index in potential_indices:
             if index in self.hash:
-                for token, info in self.hash[index].iteritems():
+                for token, info in self.hash[index].candidates(tags):
                     yield token,info.collidable
 
 
-class CollisionDetector(object):
-    def __init__(self):
-        self.can_move_filters = set([shape.tags.IMPEEDS_MOVEMENT])
+    def collidables_in(self, min_x, min_y, max_x, max_y, mask=0):
+        """yield (token, collidable) for everything that may overlap
+        the given bounds"""
+        # collidables are hashed by position but may extend up to a
+        # cell away from it
+        min_index = SpatialHash._hash_func(
+            vector.Vector(min_x - SpatialHash.GRID_SIZE, min_y - SpatialHash.GRID_SIZE))
+        max_index = SpatialHash._hash_func(
+            vector.Vector(max_x + SpatialHash.GRID_SIZE, max_y + SpatialHash.GRID_SIZE))
+
+        tags = shape.mask_tags(mask)
+        for x in xrange(min_index[0], max_index[0] + 1):
+            for y in xrange(min_index[1], max_index[1] + 1):
+                if (x,y) in self.hash:
+                    for token, info in self.hash[(x,y)].candidates(tags):
+                        yield token,info.collidable
+
+
+    def collidables_along(self, origin, direction, max_distance, mask=0):
+        """walk the cells a ray crosses in order. yields (exit, found)
+        where found lists the (token, collidable) pairs first seen at
+        that cell and exit is the distance at which the ray leaves it.
+        anything not yet found can only be hit further along than exit"""
+        # collidables may extend up to a cell away from the cell they
+        # are hashed in, so look at the neighbours of every cell crossed
+        tags = shape.mask_tags(mask)
+        visited = set()
+        for x,y,exit in gridwalk.cells(origin, direction, max_distance, SpatialHash.GRID_SIZE):
+            found = list()
+            for i in (x - 1, x, x + 1):
+                for j in (y - 1, y, y + 1):
+                    index = (SpatialHash._cell_index(i), SpatialHash._cell_index(j))
+                    if index in visited:
+                        continue
+                    visited.add(index)
+                    if index in self.hash:
+                        for token, info in self.hash[index].candidates(tags):
+                            found.append((token, info.collidable))
+            yield exit, found
+
+
+# broad phase backends a CollisionDetector can be created with. each
+# stores (token, collidable) pairs and answers the queries used by the
+# detector: update, remove, potential_collidables,
+# all_potential_collidables, collidables_in and collidables_along. the
+# queries take an optional tag mask that lets a backend skip groups of
+# collidables that can not match
+SortAndSweep = sortandsweep.SortAndSweep
+HierarchicalGrid = hierarchicalgrid.HierarchicalGrid
 
-        self.spatial_hash = SpatialHash()
+
+class CollisionDetector(object):
+    # below this many rectangle pairs the batch narrow phase costs more
+    # than it saves
+    BATCH_MIN_PAIRS = 32
+    # updates a collidable must go through without moving or touching
+    # anything before it is put to sleep
+    SLEEP_FRAMES = 30
+
+    def __init__(self, broad_phase=None, batch_narrow_phase=False):
+        """broad_phase is the backend used to find potentially
+        colliding pairs; defaults to a SpatialHash. batch_narrow_phase
+        resolves rectangle pairs in all_collisions with one vectorized
+        pass (needs numpy; ignored without it)"""
+        self.can_move_filters = shape.TagSet([shape.tags.IMPEEDS_MOVEMENT])
+        self.batch_narrow_phase = batch_narrow_phase and batch.available()
+
+        if broad_phase is None:
+            broad_phase = SpatialHash()
+        self.backend = broad_phase
+        self.static = staticgrid.StaticGrid()
+        # optional tilegrid.TileGrid mirroring static tiles, for callers
+        # that can resolve against the grid directly
+        self.tile_grid = None
+        # (token1, token2) -> (shape1, shape2, revision1, revision2,
+        # CollisionInfo or None) for the pairs seen last frame
+        self._pair_cache = dict()
+        # unordered pair -> CollisionInfo for the current contacts
+        self._contacts = collections.OrderedDict()
+        # token -> ((x, y, rotation), updates without moving or touching)
+        self._stillness = dict()
+        self._sleeping = set()
         self.total_vectors = 0
         self.start_frame()
 
@@ -170,6 +556,12 @@ class CollisionDetector(object):
         self.num_checks = 0
         self.broad_phase_checks = 0
         self.narrow_phase_checks = 0
+        self.sat_tests_avoided = 0
+        self.sat_tests_cached = 0
+        self.sleeping_pairs_skipped = 0
+        if isinstance(self.backend, SpatialHash):
+            self.backend.rehashes_avoided = 0
+            self.backend.transforms_skipped = 0
         self.vectors_per_frame = vector.counter - self.total_vectors
         self.total_vectors = vector.counter
 
@@ -186,27 +578,115 @@ class CollisionDetector(object):
         stats1 = '\t {:4d} collision checks; avg. {:6.1f} broad phase checks and {:6.1f} narrow phase checks'
         stats2 = '\t                       total {:6d} broad phase checks and {:6d} narrow phase checks'
         stats3 = '\t {} vector creations last frame'
+        stats4 = '\t {} dynamic and {} static collidables'
+        stats5 = '\t {:6d} SAT tests avoided by bounding box rejection'
+        stats6 = '\t {:6d} SAT results reused for pairs that did not move'
+        stats7 = '\t {} active and {} sleeping collidables; {:6d} sleeping pairs skipped'
         print(stats1.format(self.num_checks, broad, narrow))
         print(stats2.format(self.broad_phase_checks, self.narrow_phase_checks))
         print(stats3.format(self.vectors_per_frame))
+        print(stats4.format(self.backend.size(), self.static.size()))
+        print(stats5.format(self.sat_tests_avoided))
+        print(stats6.format(self.sat_tests_cached))
+        print(stats7.format(self.backend.size() - len(self._sleeping), len(self._sleeping),
+                            self.sleeping_pairs_skipped))
+        if isinstance(self.backend, SpatialHash):
+            stats8 = '\t {:6d} rehashes avoided; {:6d} of those had not moved at all'
+            print(stats8.format(self.backend.rehashes_avoided, self.backend.transforms_skipped))
 
 
     def size(self):
-        return self.spatial_hash.size()
+        return self.backend.size() + self.static.size()
 
 
     def clear(self):
         """remove ALL collidables"""
-        self.spatial_hash.clear()
+        self.backend.clear()
+        self.static.clear()
+        self._pair_cache.clear()
+        self._contacts.clear()
+        self._stillness.clear()
+        self._sleeping.clear()
 
 
     def update_collidable(self, token, collidable):
-        self.spatial_hash.update(token, collidable)
+        """move a collidable to where its owner is now. one that has
+        neither moved nor touched anything for SLEEP_FRAMES updates
+        goes to sleep: it is no longer re-inserted while it stays put,
+        and all_collisions() stops pairing it with other sleeping or
+        static collidables. while asleep only its position and rotation
+        are checked for changes. nothing goes to sleep while its
+        bounding box overlaps another collidable's"""
+        position = collidable._position()
+        pose = (position.x, position.y, collidable.rotation)
+        still = self._stillness.get(token)
+
+        if (still is not None and still[0] == pose
+            and self.backend.get(token) is collidable):
+            frames = still[1] + 1
+            if token in self._sleeping:
+                self._stillness[token] = (pose, frames)
+                return
+        else:
+            frames = 0
+            self._sleeping.discard(token)
+
+        self._stillness[token] = (pose, frames)
+        added = not self.backend.contains(token)
+        self.backend.update(token, collidable)
+
+        if added:
+            self._wake_overlapping(token, collidable.aabb)
+        if (frames >= CollisionDetector.SLEEP_FRAMES
+            and not self._overlaps_any(token, collidable.aabb)):
+            self._sleeping.add(token)
+
+
+    def _wake(self, token):
+        # touching something restarts the count towards sleeping
+        if token in self._stillness:
+            self._stillness[token] = (self._stillness[token][0], 0)
+            self._sleeping.discard(token)
+
+
+    def _wake_overlapping(self, token, aabb):
+        # sleepers are not paired with each other or with static
+        # collidables, so one turning up on top of them has to wake them
+        if not self._sleeping:
+            return
+        for other,c in self.backend.collidables_in(*aabb):
+            if (other in self._sleeping and other != token
+                and shape.aabb_overlap(aabb, c.aabb)):
+                self._wake(other)
+
+
+    def _overlaps_any(self, token, aabb):
+        """true if aabb overlaps the bounding box of any collidable
+        other than token"""
+        for other,c in self.backend.collidables_in(*aabb):
+            if other != token and shape.aabb_overlap(aabb, c.aabb):
+                return True
+        for other,c in self.static.potential_collidables(*aabb):
+            if shape.aabb_overlap(aabb, c.aabb):
+                return True
+        return False
+
+
+    def add_static_collidable(self, token, collidable):
+        """register a collidable that will never move. static
+        collidables are only ever tested against dynamic ones, also
+        when collides() is asked about one by token"""
+        self.static.add(token, collidable)
+        self._wake_overlapping(token, collidable.aabb)
 
 
     def remove_collidable(self, token):
-        if self.spatial_hash.contains(token):
-            self.spatial_hash.remove(token)
+        if self.backend.contains(token):
+            self.backend.remove(token)
+            self._stillness.pop(token, None)
+            self._sleeping.discard(token)
+        elif self.static.contains(token):
+            self.static.remove(token)
 
 
     def collides(self, token=None, collidable=None, position=None, filters=set()):
@@ -222,7 +702,7 @@ class CollisionDetector(object):
     def can_move_to(self, token, new_pos):
         self.num_checks += 1
 
-        collidable = self.spatial_hash.get(token)
+        collidable = self.backend.get(token)
 
         potential_collidables = self._broad_phase(
             token=token, new_pos=new_pos, filters=self.can_move_filters)
@@ -249,21 +729,230 @@ class CollisionDetector(object):
         return collision
 
 
+    def sweep(self, token=None, collidable=None, motion=None, filters=set()):
+        """move a collidable from where its owner is now by motion and
+        return a SweepInfo for the first thing it would touch, or
+        None. only collidables within the swept bounds are tested"""
+        self.num_checks += 1
+
+        if collidable is None:
+            if not self.backend.contains(token):
+                return None
+            collidable = self.backend.get(token)
+
+        start = collidable._position()
+        min_x, min_y, max_x, max_y = collidable.aabb_at(start)
+        swept = (min(min_x, min_x + motion.x), min(min_y, min_y + motion.y),
+                 max(max_x, max_x + motion.x), max(max_y, max_y + motion.y))
+
+        mask = shape.filter_mask(filters)
+        first = None
+        potential = itertools.chain(self.backend.collidables_in(*swept, mask=mask),
+                                    self.static.potential_collidables(*swept))
+        for t,other in potential:
+            if token == t:
+                continue
+
+            if collidable.owner == other.owner:
+                continue
+
+            if other.tag_mask & mask != mask:
+                continue
+
+            self.broad_phase_checks += 1
+
+            if not shape.aabb_overlap(swept, other.aabb):
+                self.sat_tests_avoided += 1
+                continue
+
+            self.narrow_phase_checks += 1
+            hit = sweep(collidable, other, motion, start)
+            if hit is not None and (first is None or hit.time < first.time):
+                hit.token1 = token
+                hit.token2 = t
+                first = hit
+
+        return first
+
+
+    def raycast(self, origin, direction, max_distance, filters=set(), owner=None, first_only=False):
+        """list of RaycastInfo for every collidable a ray from origin
+        along direction hits within max_distance, nearest first.
+        collidables belonging to owner are ignored. with first_only
+        the walk stops as soon as the nearest hit is known"""
+        self.num_checks += 1
+        return self._raycast(origin, direction.normalized(), max_distance,
+                             shape.filter_mask(filters), owner, first_only, dict())
+
+
+    def raycast_all(self, rays, filters=set(), owner=None, first_only=False):
+        """raycast() for every (origin, direction, max_distance) in
+        rays. returns one list of hits per ray"""
+        self.num_checks += 1
+        mask = shape.filter_mask(filters)
+        accepted = dict()
+        return [self._raycast(origin, direction.normalized(), max_distance,
+                              mask, owner, first_only, accepted)
+                for origin,direction,max_distance in rays]
+
+
+    def _raycast(self, origin, direction, max_distance, mask, owner, first_only, accepted):
+        # accepted caches the filter result per token across rays
+        hits = list()
+        walks = (self.backend.collidables_along(origin, direction, max_distance, mask=mask),
+                 self.static.collidables_along(origin, direction, max_distance))
+        for walk in walks:
+            for exit,found in walk:
+                for token,collidable in found:
+                    self.broad_phase_checks += 1
+                    if token not in accepted:
+                        accepted[token] = ((owner is None or collidable.owner != owner)
+                                           and collidable.tag_mask & mask == mask)
+                    if not accepted[token]:
+                        continue
+
+                    self.narrow_phase_checks += 1
+                    hit = collidable.raycast(origin, direction, max_distance)
+                    if hit is None:
+                        continue
+
+                    distance,normal = hit
+                    info = RaycastInfo(distance, origin + direction * distance, normal,
+                                       collidable, token)
+                    if first_only:
+                        hits = [info]
+                        max_distance = distance
+                    else:
+                        hits.append(info)
+
+                if first_only and len(hits) > 0 and hits[0].distance <= exit:
+                    break
+
+        hits.sort(key=lambda hit: hit.distance)
+        return hits
+
+
+    def update_contacts(self, filters=set()):
+        """find every collision like all_collisions() and compare them
+        with the previous call to report which contacts began,
+        persisted and ended. meant to be called once per frame with
+        the same filters. pairs where neither shape moved since the
+        last call reuse the last result instead of running SAT again"""
+        candidates = list(self._all_broad_phase(filters))
+        results = [None] * len(candidates)
+
+        cache = self._pair_cache
+        pair_cache = dict()
+        misses = list()
+        for i,(a_token,a,b_token,b) in enumerate(candidates):
+            entry = cache.get((a_token, b_token))
+            if (entry is not None and entry[0] is a and entry[1] is b
+                and entry[2] == a.revision and entry[3] == b.revision):
+                self.sat_tests_cached += 1
+                results[i] = entry[4]
+            else:
+                misses.append(i)
+
+        if self.batch_narrow_phase:
+            resolved = self._batch_narrow_phase([candidates[i] for i in misses])
+        else:
+            resolved = [self._single_narrow_phase(*candidates[i]) for i in misses]
+        for i,c in itertools.izip(misses, resolved):
+            results[i] = c
+
+        for (a_token,a,b_token,b),c in itertools.izip(candidates, results):
+            pair_cache[(a_token, b_token)] = (a, b, a.revision, b.revision, c)
+        self._pair_cache = pair_cache
+
+        collisions = list()
+        contacts = collections.OrderedDict()
+        began = list()
+        persisted = list()
+        for c in results:
+            if c is None:
+                continue
+            collisions.append(c)
+            self._wake(c.token1)
+            self._wake(c.token2)
+
+            pair = frozenset((c.token1, c.token2))
+            if pair in contacts:
+                continue
+            contacts[pair] = c
+            if pair in self._contacts:
+                persisted.append(c)
+            else:
+                began.append(c)
+
+        ended = [c for pair,c in self._contacts.iteritems() if pair not in contacts]
+        self._contacts = contacts
+
+        return Contacts(collisions, began, persisted, ended)
+
+
     def all_collisions(self, filters = set()):
-        for a,b in self._all_broad_phase(filters):
-            c = self._single_narrow_phase(a[0], a[1].collidable, b[0], b[1].collidable)
+        if self.batch_narrow_phase:
+            for c in self._batch_narrow_phase(list(self._all_broad_phase(filters))):
+                if c is not None:
+                    self._wake(c.token1)
+                    self._wake(c.token2)
+                    yield c
+            return
+
+        for a_token,a_collidable,b_token,b_collidable in self._all_broad_phase(filters):
+            c = self._single_narrow_phase(a_token, a_collidable, b_token, b_collidable)
             if c is not None:
+                self._wake(a_token)
+                self._wake(b_token)
                 yield c
 
 
+    def _batch_narrow_phase(self, candidates):
+        """resolve rectangle pairs with one vectorized SAT pass and
+        everything else with collides(). returns the CollisionInfo or
+        None for each candidate, in order"""
+        batched = [i for i,(a_token,a,b_token,b) in enumerate(candidates)
+                   if batch.batchable(a) and batch.batchable(b)]
+
+        results = dict()
+        if len(batched) >= CollisionDetector.BATCH_MIN_PAIRS:
+            self.narrow_phase_checks += len(batched)
+            colliding, distance, translation = batch.rectangle_collisions(
+                [(candidates[i][1], candidates[i][3]) for i in batched])
+            for j,i in enumerate(batched):
+                if colliding[j]:
+                    a_token,a,b_token,b = candidates[i]
+                    results[i] = CollisionInfo(
+                        float(distance[j]),
+                        vector.Vector(float(translation[j][0]), float(translation[j][1])),
+                        a, b, a_token, b_token)
+                else:
+                    results[i] = None
+
+        all = list()
+        for i,(a_token,a,b_token,b) in enumerate(candidates):
+            if i in results:
+                all.append(results[i])
+            else:
+                all.append(self._single_narrow_phase(a_token, a, b_token, b))
+
+        return all
+
+
     def _all_broad_phase(self, filters):
-        for a,b in self.spatial_hash.all_potential_collidables():
+        # sleeping collidables overlapped nothing when they fell asleep
+        # and have not moved since; anything added on top of them since
+        # woke them. so pairs of them (or of one and a static
+        # collidable) can not have started colliding
+        sleeping = self._sleeping
+        mask = shape.filter_mask(filters)
+        for a,b in self.backend.all_potential_collidables(mask=mask):
 
             a_token,a_info = a
             b_token,b_info = b
 
-            if (not filters.issubset(a_info.collidable.tags)
-                and not filters.issubset(b_info.collidable.tags)):
+            if (a_info.collidable.tag_mask & mask != mask
+                and b_info.collidable.tag_mask & mask != mask):
                 continue
 
             if a_info.collidable.owner == b_info.collidable.owner:
@@ -272,49 +961,102 @@ class CollisionDetector(object):
             if a_token == b_token:
                 continue
 
+            if a_token in sleeping and b_token in sleeping:
+                self.sleeping_pairs_skipped += 1
+                continue
+
             self.broad_phase_checks += 1
 
-            a_pos = a_info.collidable.transformed_point(vector.constant_zero)
-            b_pos = b_info.collidable.transformed_point(vector.constant_zero)
-            if(a_pos.closer_than(b_pos, 2 * SpatialHash.GRID_SIZE)):
-                yield a,b
+            if not shape.aabb_overlap(a_info.collidable.aabb, b_info.collidable.aabb):
+                self.sat_tests_avoided += 1
+                continue
 
+            yield a_token, a_info.collidable, b_token, b_info.collidable
 
-    def _broad_phase(self, token=None, collidable=None, new_pos=None, filters=None):
-        """return a list of potentially-colliding objects"""
+        if self.static.size() == 0:
+            return
 
-        if new_pos is None:
-            if collidable is not None:
-                #new_pos = collidable.transformed_point(vector.constant_zero)
-                new_pos = collidable.owner.position
-            elif token is not None:
-                if self.spatial_hash.contains(token):
-                    new_pos = self.spatial_hash.get(token).owner.position
-                else:
-                    return list()
+        # dynamic vs. static; static pairs are never generated
+        for a_token,a_info in self.backend.collidables.iteritems():
+            if a_token in sleeping:
+                continue
+
+            a_collidable = a_info.collidable
+            a_matches = a_collidable.tag_mask & mask == mask
+            aabb = a_collidable.aabb
+
+            for b_token,b_collidable in self.static.potential_collidables(*aabb):
+                if not a_matches and b_collidable.tag_mask & mask != mask:
+                    continue
+
+                if a_collidable.owner == b_collidable.owner:
+                    continue
 
+                self.broad_phase_checks += 1
+
+                if not shape.aabb_overlap(aabb, b_collidable.aabb):
+                    self.sat_tests_avoided += 1
+                    continue
+
+                yield a_token, a_collidable, b_token, b_collidable
+
+
+    def _broad_phase(self, token=None, collidable=None, new_pos=None, filters=None):
+        """return a list of potentially-colliding objects"""
         all = list()
-        potential = self.spatial_hash.potential_collidables(
-            token=token, collidable=collidable, new_pos=new_pos)
+        mask = shape.filter_mask(filters)
+        static = False
+
+        if collidable is not None or self.backend.contains(token):
+            potential = self.backend.potential_collidables(
+                token=token, collidable=collidable, new_pos=new_pos, mask=mask)
+            if collidable is None:
+                collidable = self.backend.get(token)
+        elif self.static.contains(token):
+            # static collidables are only tested against dynamic ones
+            static = True
+            collidable = self.static.get(token)
+            potential = self.backend.collidables_in(*collidable.aabb_at(new_pos), mask=mask)
+        else:
+            return all
 
-        if collidable is None:
-            collidable = self.spatial_hash.get(token)
+        # the narrow phase tests the shape where it was last updated
+        # unless new_pos overrides it; reject by the same box
+        aabb = collidable.aabb_at(new_pos)
 
-        for t,shape in potential:
+        for t,other in potential:
             if token == t:
                 continue
 
-            if collidable.owner == shape.owner:
+            if collidable.owner == other.owner:
                 continue
 
-            if not filters.issubset(shape.tags):
+            if other.tag_mask & mask != mask:
                 continue
 
             self.broad_phase_checks += 1
 
-            pos = shape.transformed_point(vector.constant_zero)
-            if(pos.closer_than(new_pos, 2 * SpatialHash.GRID_SIZE)):
-                all.append((t,shape))
+            if not shape.aabb_overlap(aabb, other.aabb):
+                self.sat_tests_avoided += 1
+                continue
+
+            all.append((t,other))
+
+        if not static and self.static.size() > 0:
+            for t,other in self.static.potential_collidables(*aabb):
+                if collidable.owner == other.owner:
+                    continue
+
+                if other.tag_mask & mask != mask:
+                    continue
+
+                self.broad_phase_checks += 1
+
+                if not shape.aabb_overlap(aabb, other.aabb):
+                    self.sat_tests_avoided += 1
+                    continue
+
+                all.append((t,other))
 
         return all
 
@@ -337,18 +1079,26 @@ class CollisionDetector(object):
             return collidable_list
 
         if collidable is None:
-            collidable = self.spatial_hash.get(token)
+            if self.backend.contains(token):
+                collidable = self.backend.get(token)
+            else:
+                collidable = self.static.get(token)
 
-        self.narrow_phase_checks += len(collidable_list)
+        aabb = collidable.aabb_at(new_pos)
 
         all = list()
         d = 0
 
-        for t,shape in collidable_list:
+        for t,other in collidable_list:
             if token == t:
                 continue
 
-            collision_info = collides(collidable, shape, new_pos)
+            if not shape.aabb_overlap(aabb, other.aabb):
+                self.sat_tests_avoided += 1
+                continue
+
+            self.narrow_phase_checks += 1
+            collision_info = collides(collidable, other, new_pos)
             if collision_info is not None:
                 collision_info.token1 = token
                 collision_info.token2 = t
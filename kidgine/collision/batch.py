@@ -0,0 +1,80 @@
+import rectangle
+
+# vectorized SAT for many rectangle pairs at once. numpy is optional;
+# when it is not installed available() is false and callers fall back
+# to collides()
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def available():
+    return numpy is not None
+
+
+def batchable(collidable):
+    """true if collidable can go through rectangle_collisions"""
+    return (isinstance(collidable, rectangle.Rectangle)
+            and len(collidable._transformed_points) == 4
+            and len(collidable._cached_axes) == 4)
+
+
+def rectangle_collisions(pairs):
+    """run SAT on a list of (rectangle, rectangle) pairs using their
+    cached transformed points and axes.
+
+    returns (colliding, distance, translation) arrays: colliding[i] is
+    true if pair i overlaps, distance[i] is the penetration depth and
+    translation[i] the (x, y) minimum translation vector, computed with
+    exactly the same arithmetic as collides()"""
+    count = len(pairs)
+    coords = list()
+    axis_coords = list()
+    for a,b in pairs:
+        for p in a._transformed_points:
+            coords.append(p.x)
+            coords.append(p.y)
+        for p in b._transformed_points:
+            coords.append(p.x)
+            coords.append(p.y)
+        for axis in a._cached_axes:
+            axis_coords.append(axis.x)
+            axis_coords.append(axis.y)
+        for axis in b._cached_axes:
+            axis_coords.append(axis.x)
+            axis_coords.append(axis.y)
+
+    points = numpy.array(coords, dtype=numpy.float64).reshape(count, 2, 4, 2)
+    axes = numpy.array(axis_coords, dtype=numpy.float64).reshape(count, 8, 2)
+
+    # project every point of both shapes onto all eight axes:
+    # (pairs, shape, axis, point)
+    ax = axes[:, numpy.newaxis, :, numpy.newaxis, 0]
+    ay = axes[:, numpy.newaxis, :, numpy.newaxis, 1]
+    px = points[:, :, numpy.newaxis, :, 0]
+    py = points[:, :, numpy.newaxis, :, 1]
+    dots = ax * px + ay * py
+
+    min_a = dots[:, 0].min(axis=2)
+    max_a = dots[:, 0].max(axis=2)
+    min_b = dots[:, 1].min(axis=2)
+    max_b = dots[:, 1].max(axis=2)
+
+    # same as _overlap()
+    a_first = min_a < min_b
+    dist = numpy.where(a_first, -(min_b - max_a), -(min_a - max_b))
+    mult = numpy.where(a_first, 1.0, -1.0)
+
+    colliding = (dist > 0).all(axis=1)
+
+    # first axis with the smallest overlap, as in the scalar loop
+    best = dist.argmin(axis=1)
+    rows = numpy.arange(count)
+    distance = dist[rows, best]
+    best_axes = axes[rows, best]
+    best_mult = mult[rows, best]
+
+    translation = -((best_axes * distance[:, numpy.newaxis]) * best_mult[:, numpy.newaxis])
+
+    return colliding, distance, translation
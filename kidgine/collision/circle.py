@@ -1,3 +1,5 @@
+import math
+
 import shape
 from ..math import vector
 from ..net import serializedobject
@@ -15,29 +17,72 @@ class Circle(shape.Shape):
         self.radius = radius
 
 
-    def all_projecting_axes(self, pos_override, shape, shape_override):
-        center = self.transformed_point(self._points[0], pos_override)
-
-        min_dist_sqr = None
-        closest = None
-        for point in shape._points:
-            point = shape.transformed_point(point, shape_override)
+    def all_projecting_axes(self, pos_override, shape, shape_override, calculate = False):
+        if calculate:
+            # a circle has no axes of its own; its one axis depends on
+            # the other shape
+            return []
 
-            dist_sqr = point.distance_sqr(center)
-            if min_dist_sqr is None or dist_sqr < min_dist_sqr:
-                min_dist_sqr = dist_sqr
-                closest = point
-
-        return [(closest - center).normalized()]
+        return [closest_axis(self._center(pos_override), shape, shape_override)]
 
 
     def project_onto_axis(self, pos_override, axis):
-        center = self.transformed_point(self._points[0], pos_override)
+        center = self._center(pos_override)
 
         dot = axis.x * center.x + axis.y * center.y
         return dot - self.radius, dot + self.radius
 
 
+    def _center(self, pos_override):
+        if pos_override is None and self._transformed_points:
+            return self._transformed_points[0]
+        return self.transformed_point(self._points[0], pos_override)
+
+
+    def raycast(self, origin, direction, max_distance):
+        center = self._center(None)
+        hit = shape.ray_circle(origin, direction, center, self.radius)
+        if hit is None:
+            return None
+
+        near,far = hit
+        if far < 0 or near > max_distance:
+            return None
+        if near < 0:
+            return 0.0, -direction
+
+        point = origin + direction * near
+        return near, (point - center).normalized()
+
+
+    def _bounding_box(self, points):
+        center = points[0]
+        return (center.x - self.radius, center.y - self.radius,
+                center.x + self.radius, center.y + self.radius)
+
+
     def __str__(self):
         pos = self.transformed_point(self._points[0])
         return '<circle at {} of radius {}>'.format(pos, self.radius)
+
+
+def closest_axis(center, shape, shape_override):
+    """unit axis from center towards the closest point of shape, using
+    its cached transformed points unless shape_override is given"""
+    min_dist_sqr = None
+    closest_x = closest_y = 0
+    for point in shape._all(shape_override):
+        dx = point.x - center.x
+        dy = point.y - center.y
+        dist_sqr = dx * dx + dy * dy
+        if min_dist_sqr is None or dist_sqr < min_dist_sqr:
+            min_dist_sqr = dist_sqr
+            closest_x = dx
+            closest_y = dy
+
+    if not min_dist_sqr:
+        # on top of each other; any axis will do
+        return vector.right()
+
+    distance = math.sqrt(min_dist_sqr)
+    return vector.Vector(closest_x / distance, closest_y / distance)
@@ -0,0 +1,73 @@
+import shape
+
+
+class CompoundShape(shape.Shape):
+    """several convex shapes moving together under one token. the
+    parts are given relative to the compound's position and turn with
+    its rotation; their own owner, center and rotation are overwritten.
+    collides() tests the parts pairwise and reports the deepest
+    overlap against the compound"""
+
+    def __init__(self, owner, parts, center = None):
+        super(CompoundShape, self).__init__(owner)
+
+        if not parts:
+            raise RuntimeError('a compound shape needs at least one part')
+
+        self.parts = list(parts)
+        self.center = center
+        self._points = [p for part in self.parts for p in part._points]
+
+
+    def update(self):
+        self._sync_parts()
+        for part in self.parts:
+            part.update()
+        super(CompoundShape, self).update()
+
+
+    def all_projecting_axes(self, pos_override, shape, shape_override, calculate = False):
+        # the compound is not convex; only its parts project
+        return []
+
+
+    def aabb_at(self, pos_override=None):
+        if self.aabb is None:
+            self._sync_parts()
+            return _union([part.aabb_at(pos_override) for part in self.parts])
+        return super(CompoundShape, self).aabb_at(pos_override)
+
+
+    def raycast(self, origin, direction, max_distance):
+        best = None
+        for part in self.parts:
+            hit = part.raycast(origin, direction, max_distance)
+            if hit is not None and (best is None or hit[0] < best[0]):
+                best = hit
+        return best
+
+
+    def _bounding_box(self, points):
+        # the parts are updated first; circles reach past their points
+        return _union([part.aabb for part in self.parts])
+
+
+    def _sync_parts(self):
+        for part in self.parts:
+            part.owner = self.owner
+            part.center = self.center
+            part.rotation = self.rotation
+
+
+    def __str__(self):
+        return '<compound shape of {}>'.format(', '.join(str(part) for part in self.parts))
+
+
+def _union(boxes):
+    min_x, min_y, max_x, max_y = boxes[0]
+    for box in boxes[1:]:
+        min_x = min(min_x, box[0])
+        min_y = min(min_y, box[1])
+        max_x = max(max_x, box[2])
+        max_y = max(max_y, box[3])
+    return min_x, min_y, max_x, max_y
@@ -0,0 +1,38 @@
+import math
+
+
+def cells(origin, direction, max_distance, size):
+    """walk the square grid cells of the given size that a ray from
+    origin along the unit vector direction passes through, in order.
+    yields (x, y, exit) where exit is the distance along the ray at
+    which it leaves the cell. cell (x, y) covers [x * size, (x + 1) *
+    size) on each axis"""
+    size = float(size)
+    x = int(math.floor(origin.x / size))
+    y = int(math.floor(origin.y / size))
+
+    step_x,next_x,delta_x = _axis(origin.x, direction.x, x, size)
+    step_y,next_y,delta_y = _axis(origin.y, direction.y, y, size)
+
+    while True:
+        exit = min(next_x, next_y)
+        yield x, y, exit
+        if exit >= max_distance:
+            return
+
+        if next_x < next_y:
+            x += step_x
+            next_x += delta_x
+        else:
+            y += step_y
+            next_y += delta_y
+
+
+def _axis(start, direction, cell, size):
+    # step direction, distance to the first cell boundary and distance
+    # between boundaries along one axis
+    if direction > 0:
+        return 1, ((cell + 1) * size - start) / direction, size / direction
+    elif direction < 0:
+        return -1, (cell * size - start) / direction, -size / direction
+    return 0, float('inf'), float('inf')
@@ -0,0 +1,201 @@
+import math
+
+
+class HierarchicalGrid(object):
+    """broad phase made of several uniform grids whose cell sizes
+    double from one level to the next. each collidable lives in one
+    cell of the finest level whose cells are at least as large as it
+    is, keyed by the corner of its bounding box, so it can only reach
+    into the next cell along each axis. small collidables get small
+    cells no matter how large the largest collidable is, and queries
+    only visit levels that hold something"""
+    MIN_CELL_SIZE = 16
+
+    class _Info(object):
+        __slots__ = ('token', 'collidable', 'serial', 'level', 'cell',
+                     'min_x', 'min_y', 'max_x', 'max_y')
+
+        def __init__(self, token, collidable, serial):
+            self.token = token
+            self.collidable = collidable
+            self.serial = serial
+            self.level = None
+            self.cell = None
+
+
+    def __init__(self):
+        self.collidables = dict()
+        # one dict of cell -> {token: info} per level
+        self._levels = list()
+        self._counts = list()
+        self._serial = 0
+
+
+    def clear(self):
+        """remove ALL collidables"""
+        self.collidables.clear()
+        self._levels = list()
+        self._counts = list()
+
+
+    def contains(self, token):
+        return token in self.collidables
+
+
+    def get(self, token):
+        return self.collidables[token].collidable
+
+
+    def size(self):
+        return len(self.collidables)
+
+
+    def update(self, token, collidable):
+        info = self.collidables.get(token)
+        if info is not None and info.collidable is collidable:
+            if not collidable.update_if_moved():
+                return
+        else:
+            collidable.update()
+
+        min_x, min_y, max_x, max_y = collidable.aabb
+        level = HierarchicalGrid._level(max(max_x - min_x, max_y - min_y))
+        size = HierarchicalGrid._cell_size(level)
+        cell = (int(math.floor(min_x / size)), int(math.floor(min_y / size)))
+
+        if info is None:
+            self._serial += 1
+            info = HierarchicalGrid._Info(token, collidable, self._serial)
+            self.collidables[token] = info
+        elif info.level != level or info.cell != cell:
+            self._unlink(info)
+
+        info.collidable = collidable
+        info.min_x, info.min_y, info.max_x, info.max_y = min_x, min_y, max_x, max_y
+
+        if info.level is None:
+            while len(self._levels) <= level:
+                self._levels.append(dict())
+                self._counts.append(0)
+
+            cells = self._levels[level]
+            if cell not in cells:
+                cells[cell] = dict()
+            cells[cell][token] = info
+            self._counts[level] += 1
+            info.level = level
+            info.cell = cell
+
+
+    def remove(self, token):
+        self._unlink(self.collidables.pop(token))
+
+
+    def all_potential_collidables(self, mask=0):
+        """every pair is yielded once, found from the smaller of the
+        two. mask skips pairs where neither collidable matches it"""
+        for level,cells in enumerate(self._levels):
+            if self._counts[level] == 0:
+                continue
+
+            for bucket in cells.itervalues():
+                for a in bucket.itervalues():
+                    a_matches = a.collidable.tag_mask & mask == mask
+                    for b in self._overlapping(a.min_x, a.min_y, a.max_x, a.max_y, level):
+                        if b.level == level and b.serial <= a.serial:
+                            continue
+                        if not a_matches and b.collidable.tag_mask & mask != mask:
+                            continue
+                        yield (a.token, a), (b.token, b)
+
+
+    def potential_collidables(self, token=None, collidable=None, new_pos=None, mask=0):
+        if token is not None and collidable is not None:
+            raise RuntimeError('may pass in token or collidable but not both')
+
+        if token is not None:
+            info = self.collidables[token]
+            if new_pos is None:
+                min_x, min_y, max_x, max_y = info.min_x, info.min_y, info.max_x, info.max_y
+            else:
+                min_x, min_y, max_x, max_y = info.collidable.aabb_at(new_pos)
+        elif collidable is not None:
+            min_x, min_y, max_x, max_y = collidable.aabb_at(new_pos)
+        else:
+            raise RuntimeError('need a token or collidable')
+
+        return self.collidables_in(min_x, min_y, max_x, max_y, mask)
+
+
+    def collidables_in(self, min_x, min_y, max_x, max_y, mask=0):
+        """yield (token, collidable) for everything overlapping the
+        given bounds and matching mask"""
+        for info in self._overlapping(min_x, min_y, max_x, max_y):
+            if info.collidable.tag_mask & mask != mask:
+                continue
+            yield info.token, info.collidable
+
+
+    def collidables_along(self, origin, direction, max_distance, mask=0):
+        """yields (exit, found) like SpatialHash.collidables_along,
+        with everything within the bounds of the ray found at once"""
+        end_x = origin.x + direction.x * max_distance
+        end_y = origin.y + direction.y * max_distance
+        yield max_distance, list(self.collidables_in(min(origin.x, end_x), min(origin.y, end_y),
+                                                     max(origin.x, end_x), max(origin.y, end_y),
+                                                     mask))
+
+
+    def _overlapping(self, min_x, min_y, max_x, max_y, first_level=0):
+        # a collidable keyed in cell c at a level spans at most cells c
+        # and c + 1, so only one extra cell below the bounds is needed
+        for level in xrange(first_level, len(self._levels)):
+            if self._counts[level] == 0:
+                continue
+
+            cells = self._levels[level]
+            size = HierarchicalGrid._cell_size(level)
+            x0 = int(math.floor(min_x / size)) - 1
+            y0 = int(math.floor(min_y / size)) - 1
+            x1 = int(math.floor(max_x / size))
+            y1 = int(math.floor(max_y / size))
+
+            if (x1 - x0 + 1) * (y1 - y0 + 1) > len(cells):
+                # large bounds on a fine level; fewer cells are occupied
+                # than covered
+                buckets = [bucket for (x, y),bucket in cells.iteritems()
+                           if x0 <= x <= x1 and y0 <= y <= y1]
+            else:
+                buckets = [cells[(x, y)] for x in xrange(x0, x1 + 1)
+                           for y in xrange(y0, y1 + 1) if (x, y) in cells]
+
+            for bucket in buckets:
+                for info in bucket.itervalues():
+                    if (info.min_x > max_x or info.max_x < min_x or
+                        info.min_y > max_y or info.max_y < min_y):
+                        continue
+                    yield info
+
+
+    def _unlink(self, info):
+        cells = self._levels[info.level]
+        bucket = cells[info.cell]
+        del bucket[info.token]
+        if len(bucket) == 0:
+            del cells[info.cell]
+        self._counts[info.level] -= 1
+        info.level = None
+        info.cell = None
+
+
+    @staticmethod
+    def _cell_size(level):
+        return float(HierarchicalGrid.MIN_CELL_SIZE << level)
+
+
+    @staticmethod
+    def _level(extent):
+        level = 0
+        while HierarchicalGrid._cell_size(level) < extent:
+            level += 1
+        return level
@@ -0,0 +1,78 @@
+import shape
+from ..math import vector
+
+
+class Polygon(shape.Shape):
+    """convex polygon. the convex hull of the given points is used, so
+    they may come in any order"""
+
+    def __init__(self, owner, points, center = None):
+        super(Polygon, self).__init__(owner)
+
+        self._points = convex_hull(points)
+        if len(self._points) < 3:
+            raise RuntimeError('a polygon needs at least three points not on one line')
+
+        # edge normals before rotation. opposite edges are kept apart:
+        # _overlap() measures penetration from one side of an axis
+        self._normals = list()
+        last = self._points[-1]
+        for p in self._points:
+            self._normals.append(vector.Vector(last.y - p.y, p.x - last.x).normalized())
+            last = p
+
+        if center is not None:
+            self.center = center
+
+
+    def all_projecting_axes(self, pos_override, shape, shape_override, calculate = False):
+        # moving the polygon does not turn its edges, so the cached
+        # axes hold for any position
+        if not calculate:
+            if self._cached_axes:
+                return self._cached_axes
+            axes = list()
+        else:
+            # refreshed in place like the base class does
+            axes = self._cached_axes
+
+        cos, sin = self._cos_sin()
+        for i,n in enumerate(self._normals):
+            if self.rotation == 0:
+                x, y = n.x, n.y
+            else:
+                x, y = n.x * cos - n.y * sin, n.x * sin + n.y * cos
+            if i < len(axes):
+                axes[i].set(x, y)
+            else:
+                axes.append(vector.Vector(x, y))
+
+        return axes
+
+
+    def __str__(self):
+        return '<polygon at {} with points {}>'.format(
+            self._position(), ', '.join(str(p) for p in self._points))
+
+
+def convex_hull(points):
+    """the convex hull of points in counter-clockwise order, without
+    collinear points"""
+    points = sorted(set((p.x, p.y) for p in points))
+    if len(points) < 3:
+        return [vector.Vector(x, y) for x,y in points]
+
+    def cross(o, a, b):
+        return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+    def chain(points):
+        hull = list()
+        for p in points:
+            while len(hull) >= 2 and cross(hull[-2], hull[-1], p) <= 0:
+                hull.pop()
+            hull.append(p)
+        return hull
+
+    lower = chain(points)
+    upper = chain(reversed(points))
+    return [vector.Vector(x, y) for x,y in lower[:-1] + upper[:-1]]
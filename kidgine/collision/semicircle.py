@@ -1,107 +1,164 @@
 import math
 
 from ..net import serializedobject
+import circle
 import shape
 from ..math import vector
 
 
 class Semicircle(shape.Shape):
-    _SERIALIZED_MEMBERS = shape.Shape._SERIALIZED_MEMBERS.copy()
-    _SERIALIZED_MEMBERS.update({
-        'radius'   : serializedobject.float,
-        'arc'      : serializedobject.float, }) # in radians
+#    _SERIALIZED_MEMBERS = shape.Shape._SERIALIZED_MEMBERS.copy()
+#    _SERIALIZED_MEMBERS.update({
+#        'radius'   : serializedobject.float,
+#        'arc'      : serializedobject.float, }) # in radians
 
     def __init__(self, owner=None, position=vector.zero(), radius=1, arc=math.pi, rotation=0.):
         super(Semicircle, self).__init__(owner)
 
-        self._points  = [position]
-        self.radius   = radius
-
         if arc > math.pi:
             raise RuntimeError('arc length must be pi or less')
 
+        self.radius   = radius
         self.arc      = arc
         self.rotation = rotation
 
+        # the center and both ends of the arc before rotation; the arc
+        # is centered on the shape's rotation
+        half = arc / 2.0
+        self._points = [position,
+                        position + vector.from_radians(-half) * radius,
+                        position + vector.from_radians(half) * radius]
 
-    def all_projecting_axes(self, pos_override, shape, shape_override):
+        # a unit direction d is within the arc when d . middle >= this
+        self._cos_half_arc = math.cos(half)
+        self._middle_rotation = None
+        self._middle = None
 
 
-        axes = list()
+    def update(self):
+        self._middle_direction()
+        super(Semicircle, self).update()
 
-        min_dist_sqr  = None
-        closest_other = None
-        closest_mine  = None
 
-        for my_point in self._get_points():
-            my_point = self.transformed_point(my_point, pos_override)
+    def all_projecting_axes(self, pos_override, shape, shape_override, calculate = False):
+        if pos_override is None and not calculate:
+            edges = self._cached_axes
+        else:
+            edges = self._edge_normals(self._world(pos_override))
 
-            for other_point in shape._get_points():
-                other_point = shape.transformed_point(other_point, shape_override)
+        if calculate:
+            return edges
 
-                dist_sqr = other_point.distance_sqr(my_point)
-                if(min_dist_sqr is None or dist_sqr < min_dist_sqr) and dist_sqr > 0:
-                    min_dist_sqr = dist_sqr
-                    closest_other = other_point
-                    closest_mine = my_point
-
-        return [(closest_other - closest_mine).normalized()]
+        center = self._world(pos_override)[0]
+        return edges + [circle.closest_axis(center, shape, shape_override)]
 
 
     def project_onto_axis(self, pos_override, axis):
-        candidates = list()
-
-        # candidate candidates:
-
-        # center
-        candidates.append(self._project(self._points[0], pos_override, axis))
-        # endpoints of the semicircle
-        direction = self.rotation - self.arc / 2.0
-        endpoint = self._points[0] + vector.from_radians(direction) * self.radius
-        candidates.append(self._project(endpoint, pos_override, axis))
-        direction = self.rotation + self.arc / 2.0
-        endpoint = self._points[0] + vector.from_radians(direction) * self.radius
-        candidates.append(self._project(endpoint, pos_override, axis))
-
-        # look at bounds of circle and determine if they're in the semicircle
-        axis_direction = axis.to_radians()
-        if(axis_direction >= self.rotation - self.arc / 2.0 and
-           axis_direction <= self.rotation + self.arc / 2.0):
-            candidates.append(self._project(self._points[0] + self.radius * axis, pos_override, axis))
-
-        axis_direction = (-axis).to_radians()
-        if(axis_direction >= self.rotation - self.arc / 2.0 and
-           axis_direction <= self.rotation + self.arc / 2.0):
-            candidates.append(self._project(self._points[0] + self.radius * -axis, pos_override, axis))
-
-        return min(candidates), max(candidates)
-
-
-    def _get_points(self):
-        points = list()
-        points.append(self._points[0])
-
-        direction = self.rotation - self.arc / 2.0
-        import logging
-        logger = logging.getLogger(__name__)
-        endpoint = self._points[0] + vector.from_radians(direction) * self.radius
-        points.append(endpoint)
-        direction = self.rotation + self.arc / 2.0
-        endpoint = self._points[0] + vector.from_radians(direction) * self.radius
-        points.append(endpoint)
-
-        end = self._points[0] + vector.from_radians(self.rotation) * self.radius
-        points.append(end)
-
-        return points
-
-
-
-    def _project(self, point, override, axis):
-        # first transform
-        point = self.transformed_point(point, override)
-        # then project
-        return axis.x * point.x + axis.y * point.y
+        center,start,end = self._world(pos_override)
+
+        dot = axis.x * center.x + axis.y * center.y
+        dot_start = axis.x * start.x + axis.y * start.y
+        dot_end = axis.x * end.x + axis.y * end.y
+        low = min(dot, dot_start, dot_end)
+        high = max(dot, dot_start, dot_end)
+
+        # the arc reaches a full radius along the axis (or against it)
+        # when that direction is within the arc
+        middle = self._middle_direction()
+        along = axis.x * middle.x + axis.y * middle.y
+        if along >= self._cos_half_arc:
+            high = dot + self.radius
+        if -along >= self._cos_half_arc:
+            low = dot - self.radius
+
+        return low, high
+
+
+    def raycast(self, origin, direction, max_distance):
+        center,start,end = self._world(None)
+        middle = self._middle_direction()
+
+        def in_arc(x, y):
+            dx = x - center.x
+            dy = y - center.y
+            distance = math.sqrt(dx * dx + dy * dy)
+            return dx * middle.x + dy * middle.y >= self._cos_half_arc * distance
+
+        if (origin.distance_sqr(center) <= self.radius * self.radius
+            and in_arc(origin.x, origin.y)):
+            return 0.0, -direction
+
+        # the first boundary crossing is where the ray enters: either
+        # the arc or one of the two straight edges
+        best = None
+        hit = shape.ray_circle(origin, direction, center, self.radius)
+        if hit is not None:
+            for t in hit:
+                point = origin + direction * t
+                if t >= 0 and (best is None or t < best[0]) and in_arc(point.x, point.y):
+                    best = t, (point - center).normalized()
+
+        for end_point,normal in zip((start, end), self._edge_normals((center, start, end))):
+            t = shape.ray_segment(origin, direction, center, end_point)
+            if t is not None and (best is None or t < best[0]):
+                best = t, normal
+
+        if best is None or best[0] > max_distance:
+            return None
+
+        return best
+
+
+    def _bounding_box(self, points):
+        center = points[0]
+        min_x = max_x = center.x
+        min_y = max_y = center.y
+        for p in points[1:]:
+            min_x = min(min_x, p.x)
+            max_x = max(max_x, p.x)
+            min_y = min(min_y, p.y)
+            max_y = max(max_y, p.y)
+
+        # a full radius along each axis the arc faces
+        middle = self._middle_direction()
+        if middle.x >= self._cos_half_arc:
+            max_x = center.x + self.radius
+        if -middle.x >= self._cos_half_arc:
+            min_x = center.x - self.radius
+        if middle.y >= self._cos_half_arc:
+            max_y = center.y + self.radius
+        if -middle.y >= self._cos_half_arc:
+            min_y = center.y - self.radius
+
+        return min_x, min_y, max_x, max_y
+
+
+    def _world(self, pos_override):
+        """center, start and end of the arc in world space"""
+        if pos_override is None and self._transformed_points:
+            return self._transformed_points
+        return [self.transformed_point(p, pos_override) for p in self._points]
+
+
+    def _edge_normals(self, points):
+        # outward normals of the two straight edges
+        center,start,end = points
+        middle = self._middle_direction()
+        normals = list()
+        for p in (start, end):
+            normal = vector.Vector(center.y - p.y, p.x - center.x).normalized()
+            if normal.x * middle.x + normal.y * middle.y > 0:
+                normal = -normal
+            normals.append(normal)
+        return normals
+
+
+    def _middle_direction(self):
+        # world direction of the middle of the arc
+        if self._middle_rotation != self.rotation:
+            self._middle = vector.Vector(*self._cos_sin())
+            self._middle_rotation = self.rotation
+        return self._middle
 
 
     def __str__(self):
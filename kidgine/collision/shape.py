@@ -1,4 +1,7 @@
+import math
+
 from .. import utils
+from ..math import trig
 from ..math import vector
 from ..net import serializedobject
 
@@ -6,50 +9,289 @@ from ..net import serializedobject
 tags = utils.enum(*['IMPEEDS_MOVEMENT'])
 
 
+def tag_mask(tags):
+    """bitmask with a bit set for each tag. tags are small ints such
+    as utils.enum values"""
+    mask = 0
+    for tag in tags:
+        mask |= 1 << tag
+    return mask
+
+
+def mask_tags(mask):
+    """the tags set in a bitmask"""
+    tags = list()
+    tag = 0
+    while mask:
+        if mask & 1:
+            tags.append(tag)
+        mask >>= 1
+        tag += 1
+    return tags
+
+
+def filter_mask(filters):
+    """compile a set of filter tags into a mask. TagSets already
+    carry theirs, so filters kept as TagSets are only compiled once"""
+    if isinstance(filters, TagSet):
+        return filters.mask
+    return tag_mask(filters)
+
+
+def _changes_contents(name):
+    method = getattr(set, name)
+    def wrapped(self, *args):
+        result = method(self, *args)
+        self._changed()
+        return result
+    wrapped.__name__ = name
+    return wrapped
+
+
+class TagSet(set):
+    """a set of tags that keeps a bitmask of its contents up to date,
+    so matching a filter is an integer comparison instead of
+    set.issubset. listener, if given, is called with no arguments
+    whenever the contents change"""
+    _mask = None
+    listener = None
+
+    def __init__(self, tags=(), listener=None):
+        super(TagSet, self).__init__(tags)
+        self._mask = tag_mask(self)
+        self.listener = listener
+
+
+    @property
+    def mask(self):
+        # sets made by copy() or the binary operators skip __init__
+        if self._mask is None:
+            self._mask = tag_mask(self)
+        return self._mask
+
+
+    def add(self, tag):
+        if tag not in self:
+            super(TagSet, self).add(tag)
+            self._changed(self.mask | 1 << tag)
+
+
+    def discard(self, tag):
+        if tag in self:
+            super(TagSet, self).discard(tag)
+            self._changed(self.mask & ~(1 << tag))
+
+
+    remove = _changes_contents('remove')
+    pop = _changes_contents('pop')
+    clear = _changes_contents('clear')
+    update = _changes_contents('update')
+    difference_update = _changes_contents('difference_update')
+    intersection_update = _changes_contents('intersection_update')
+    symmetric_difference_update = _changes_contents('symmetric_difference_update')
+    __ior__ = _changes_contents('__ior__')
+    __iand__ = _changes_contents('__iand__')
+    __isub__ = _changes_contents('__isub__')
+    __ixor__ = _changes_contents('__ixor__')
+
+
+    def _changed(self, mask=None):
+        if mask is None:
+            mask = tag_mask(self)
+        self._mask = mask
+        if self.listener is not None:
+            self.listener()
+
+
 class Shape(object):#serializedobject.SerializedObject):
 #    _SERIALIZED_MEMBERS = {
 #        '_points' : serializedobject.Array(vector.Vector, 1),
 #        'rotation': serializedobject.float, } # in radians
 
+    # rotation as of the last _cos_sin() and its cos and sin
+    _trig_rotation = 0.0
+    _trig = (1., 0.)
+
     def __init__(self, owner=None):
         self._points = list()
         self._transformed_points = list()
         self._cached_axes = list()
         self.owner = owner
+        # called with no arguments when the tags change; set by
+        # whatever indexes the shape by its tags
+        self.tag_listener = None
+        # bitmask of tags, kept in step with them; see TagSet
+        self.tag_mask = 0
         self.tags = set()
         self.rotation = 0.0
+        # world space bounding box as (min_x, min_y, max_x, max_y),
+        # refreshed in update()
+        self.aabb = None
+        self._aabb_origin = None
+        # bumped by update() whenever the shape ends up somewhere new,
+        # so results computed from its transformed points can be reused
+        # while it stays put
+        self.revision = 0
+        # (x, y, rotation) as of the last update(); None when the shape
+        # has to be updated regardless
+        self._pose = None
 
 
-    def all_projecting_axes(self, pos_override, shape, shape_override, calculate = False):
-        if pos_override is None and not calculate:
-            return self._cached_axes
-        axes = []
+    @property
+    def tags(self):
+        return self._tags
 
-        last_point = None
-        for point in self._all(pos_override):
-            if last_point is None:
-                if pos_override is None:
-                    last_point = self._transformed_points[-1]
-                else:
-                    last_point = self.transformed_point(self._points[-1], pos_override)
 
-            axis = vector.Vector(last_point.y - point.y, point.x - last_point.x)
-            if axis.magnitude_sqr() > 0:
-                axis = axis.normalized()
-                axes.append(axis)
+    @tags.setter
+    def tags(self, tags):
+        # plain sets assigned by callers are wrapped so the mask stays
+        # in step with them
+        self._tags = TagSet(tags, self._tags_changed)
+        self._tags_changed()
 
-            last_point = point
 
-        return axes
+    def _tags_changed(self):
+        self.tag_mask = self._tags.mask
+        if self.tag_listener is not None:
+            self.tag_listener()
+
+
+    def all_projecting_axes(self, pos_override, shape, shape_override, calculate = False):
+        if pos_override is None:
+            if calculate:
+                # refreshed in place; nothing keeps the old axes
+                return _edge_axes(self._transformed_points, self._cached_axes)
+            return self._cached_axes
+
+        return _edge_axes(list(self._all(pos_override)), list())
 
 
     def update(self):
-        del self._transformed_points[0:len(self._transformed_points)]
-        for p in self._points:
-            self._transformed_points.append(self.transformed_point(p))
+        # the transformed points are refreshed in place for the same
+        # reason as the axes
+        points = self._transformed_points
+        if len(points) != len(self._points):
+            points[:] = [vector.Vector() for p in self._points]
+
+        position = self._position()
+        if self.rotation != 0:
+            cos, sin = self._cos_sin()
+            for point,p in zip(points, self._points):
+                point.x = p.x * cos - p.y * sin + position.x
+                point.y = p.x * sin + p.y * cos + position.y
+        else:
+            for point,p in zip(points, self._points):
+                point.x = p.x + position.x
+                point.y = p.y + position.y
 
         self._cached_axes = self.all_projecting_axes(None, None, None, calculate = True)
 
+        self.aabb = self._bounding_box(self._transformed_points)
+        self._aabb_origin = (position.x, position.y)
+
+        pose = (position.x, position.y, self.rotation)
+        if pose != self._pose:
+            self._pose = pose
+            self.revision += 1
+
+
+    def geometry_changed(self):
+        """call after changing the shape's points or size: the next
+        update() or update_if_moved() counts it as moved"""
+        self._pose = None
+
+
+    def update_if_moved(self):
+        """update() unless the position and rotation are the same as
+        at the last update. returns true if it updated"""
+        position = self._position()
+        if self._pose == (position.x, position.y, self.rotation):
+            return False
+
+        self.update()
+        return True
+
+
+    def aabb_at(self, pos_override=None):
+        """bounding box with the shape moved to pos_override"""
+        if self.aabb is None:
+            return self._bounding_box(
+                [self.transformed_point(p, pos_override) for p in self._points])
+
+        if pos_override is None:
+            return self.aabb
+
+        min_x, min_y, max_x, max_y = self.aabb
+        dx = pos_override.x - self._aabb_origin[0]
+        dy = pos_override.y - self._aabb_origin[1]
+        return min_x + dx, min_y + dy, max_x + dx, max_y + dy
+
+
+    def _bounding_box(self, points):
+        """bounding box of the shape given its transformed points"""
+        min_x = max_x = points[0].x
+        min_y = max_y = points[0].y
+        for p in points:
+            if p.x < min_x:
+                min_x = p.x
+            elif p.x > max_x:
+                max_x = p.x
+            if p.y < min_y:
+                min_y = p.y
+            elif p.y > max_y:
+                max_y = p.y
+
+        return min_x, min_y, max_x, max_y
+
+
+    def raycast(self, origin, direction, max_distance):
+        """distance along the unit vector direction at which a ray from
+        origin enters this shape, and the surface normal there, as
+        (distance, normal). None if it misses or only hits further than
+        max_distance. a ray starting inside hits at distance 0"""
+        points = self._transformed_points
+        if len(points) < 3:
+            return None
+
+        center_x = sum(p.x for p in points) / float(len(points))
+        center_y = sum(p.y for p in points) / float(len(points))
+
+        # clip the ray against the inside of every edge
+        t_enter = float('-inf')
+        t_exit = float('inf')
+        enter_normal = None
+        last = points[-1]
+        for p in points:
+            normal = vector.Vector(p.y - last.y, last.x - p.x)
+            if normal.x * (center_x - p.x) + normal.y * (center_y - p.y) > 0:
+                normal = -normal
+
+            numerator = normal.x * (p.x - origin.x) + normal.y * (p.y - origin.y)
+            denominator = normal.x * direction.x + normal.y * direction.y
+            last = p
+
+            if denominator == 0:
+                if numerator < 0:
+                    return None
+            elif denominator < 0:
+                t = numerator / denominator
+                if t > t_enter:
+                    t_enter = t
+                    enter_normal = normal
+            else:
+                t_exit = min(t_exit, numerator / denominator)
+
+            if t_enter > t_exit:
+                return None
+
+        if t_exit < 0 or t_enter > max_distance:
+            return None
+
+        if enter_normal is None or t_enter < 0:
+            return 0.0, -direction
+
+        return t_enter, enter_normal.normalized()
+
 
     def _all(self, pos_override):
         if pos_override:
@@ -61,17 +303,37 @@ class Shape(object):#serializedobject.SerializedObject):
 
 
     def project_onto_axis(self, pos_override, axis):
-        min = None
-        max = None
+        if pos_override is None:
+            min = max = None
+            for point in self._transformed_points:
+                dot = axis.x * point.x + axis.y * point.y
+                if min is None or dot < min:
+                    min = dot
+                if max is None or dot > max:
+                    max = dot
+            return min, max
+
+        # same as projecting transformed_point(p, pos_override) without
+        # creating the points. instead of turning every point into the
+        # world, the axis is turned into the shape once, so a rotated
+        # shape costs no more than an unrotated one
+        axis_x = axis.x
+        axis_y = axis.y
+        if self.rotation != 0:
+            cos, sin = self._cos_sin()
+            axis_x, axis_y = (axis.x * cos + axis.y * sin,
+                              axis.y * cos - axis.x * sin)
 
-        for point in self._all(pos_override):
-            dot = axis.x * point.x + axis.y * point.y
+        min = max = None
+        for p in self._points:
+            dot = axis_x * p.x + axis_y * p.y
             if min is None or dot < min:
                 min = dot
             if max is None or dot > max:
                 max = dot
 
-        return min, max
+        offset = axis.x * pos_override.x + axis.y * pos_override.y
+        return min + offset, max + offset
 
 
     def _get_points(self):
@@ -82,15 +344,94 @@ class Shape(object):#serializedobject.SerializedObject):
         return self._points
 
     def transformed_point(self, p, override = None):
+        position = self._position(override)
         if self.rotation != 0:
-            p = p.rotate(self.rotation)
+            cos, sin = self._cos_sin()
+            return vector.Vector(p.x * cos - p.y * sin + position.x,
+                                 p.x * sin + p.y * cos + position.y)
+
+        return vector.Vector(p.x + position.x, p.y + position.y)
+
+
+    def _cos_sin(self):
+        """cos and sin of the rotation, looked up again only when the
+        rotation changes"""
+        if self._trig_rotation != self.rotation:
+            self._trig = trig.cos_sin(self.rotation)
+            self._trig_rotation = self.rotation
+        return self._trig
+
 
-        center = vector.constant_zero
+    def _position(self, override = None):
         if override is not None:
-            center = override
+            return override
         elif self.owner is not None:
-            center = self.owner.position
+            return self.owner.position
         elif self.center is not None:
-            center = self.center
+            return self.center
+
+        return vector.constant_zero
+
+
+
+
+def _edge_axes(points, axes):
+    """unit normals of the edges of the polygon points into axes,
+    reusing the vectors already in it. degenerate edges are skipped"""
+    count = 0
+    last = points[-1] if points else None
+    for point in points:
+        x = last.y - point.y
+        y = point.x - last.x
+        last = point
+
+        mag_sqr = x * x + y * y
+        if mag_sqr > 0:
+            mag = math.sqrt(mag_sqr)
+            if count < len(axes):
+                axes[count].set(x / mag, y / mag)
+            else:
+                axes.append(vector.Vector(x / mag, y / mag))
+            count += 1
+
+    del axes[count:]
+    return axes
+
+
+def ray_segment(origin, direction, a, b):
+    """distance along direction at which a ray from origin crosses the
+    segment from a to b, or None"""
+    edge_x = b.x - a.x
+    edge_y = b.y - a.y
+    denominator = direction.x * edge_y - direction.y * edge_x
+    if denominator == 0:
+        return None
+
+    offset_x = a.x - origin.x
+    offset_y = a.y - origin.y
+    t = (offset_x * edge_y - offset_y * edge_x) / denominator
+    s = (offset_x * direction.y - offset_y * direction.x) / denominator
+    if t < 0 or s < 0 or s > 1:
+        return None
+
+    return t
+
+
+def ray_circle(origin, direction, center, radius):
+    """both distances along direction at which a ray from origin
+    crosses a circle, nearest first, or None"""
+    offset_x = origin.x - center.x
+    offset_y = origin.y - center.y
+    b = offset_x * direction.x + offset_y * direction.y
+    c = offset_x * offset_x + offset_y * offset_y - radius * radius
+    discriminant = b * b - c
+    if discriminant < 0:
+        return None
+
+    root = math.sqrt(discriminant)
+    return -b - root, -b + root
+
 
-        return p + center
+def aabb_overlap(a, b):
+    """true if two (min_x, min_y, max_x, max_y) boxes overlap or touch"""
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
@@ -0,0 +1,167 @@
+import bisect
+import operator
+
+
+class SortAndSweep(object):
+    """broad phase that keeps every collidable in a list ordered by the
+    left edge of its bounding box and sweeps along the x axis to find
+    overlapping pairs. collidables move very little between frames, so
+    the list stays nearly sorted and re-sorting it (timsort finds the
+    existing runs) costs close to a single linear pass"""
+
+    class _Info(object):
+        __slots__ = ('token', 'collidable', 'removed',
+                     'min_x', 'min_y', 'max_x', 'max_y')
+
+        def __init__(self, token, collidable):
+            self.token = token
+            self.removed = False
+            self.set(collidable)
+
+
+        def set(self, collidable):
+            self.collidable = collidable
+            self.min_x, self.min_y, self.max_x, self.max_y = collidable.aabb
+
+
+    _sort_key = operator.attrgetter('min_x')
+
+
+    def __init__(self):
+        self.collidables = dict()
+        self._sorted = list()
+        self._keys = list()
+        self._max_width = 0
+        self._dirty = False
+
+
+    def clear(self):
+        """remove ALL collidables"""
+        self.collidables.clear()
+        del self._sorted[:]
+        del self._keys[:]
+        self._max_width = 0
+        self._dirty = False
+
+
+    def contains(self, token):
+        return token in self.collidables
+
+
+    def get(self, token):
+        return self.collidables[token].collidable
+
+
+    def update(self, token, collidable):
+        info = self.collidables.get(token)
+        if info is not None and info.collidable is collidable:
+            if not collidable.update_if_moved():
+                return
+        else:
+            collidable.update()
+
+        if info is not None:
+            # keep the entry where it is; the next sort only has to
+            # move it as far as it actually travelled
+            info.set(collidable)
+        else:
+            info = SortAndSweep._Info(token, collidable)
+            self.collidables[token] = info
+            self._sorted.append(info)
+        self._dirty = True
+
+
+    def size(self):
+        return len(self.collidables)
+
+
+    def remove(self, token):
+        # removed entries are dropped from the sorted list on the next sort
+        self.collidables.pop(token).removed = True
+        self._dirty = True
+
+
+    def all_potential_collidables(self, mask=0):
+        """mask skips pairs where neither collidable matches it"""
+        self._sort()
+
+        entries = self._sorted
+        count = len(entries)
+        for i,a in enumerate(entries):
+            max_x = a.max_x
+            a_matches = a.collidable.tag_mask & mask == mask
+            for j in xrange(i + 1, count):
+                b = entries[j]
+                if b.min_x > max_x:
+                    break
+                if b.min_y > a.max_y or b.max_y < a.min_y:
+                    continue
+                if not a_matches and b.collidable.tag_mask & mask != mask:
+                    continue
+                yield (a.token, a), (b.token, b)
+
+
+    def potential_collidables(self, token=None, collidable=None, new_pos=None, mask=0):
+        if token is not None and collidable is not None:
+            raise RuntimeError('may pass in token or collidable but not both')
+
+        if token is not None:
+            info = self.collidables[token]
+            if new_pos is None:
+                min_x, min_y, max_x, max_y = info.min_x, info.min_y, info.max_x, info.max_y
+            else:
+                min_x, min_y, max_x, max_y = info.collidable.aabb_at(new_pos)
+        elif collidable is not None:
+            min_x, min_y, max_x, max_y = collidable.aabb_at(new_pos)
+        else:
+            raise RuntimeError('need a token or collidable')
+
+        return self.collidables_in(min_x, min_y, max_x, max_y, mask)
+
+
+    def collidables_in(self, min_x, min_y, max_x, max_y, mask=0):
+        """yield (token, collidable) for everything overlapping the
+        given bounds and matching mask"""
+        self._sort()
+
+        # nothing wider than _max_width can reach us from further left
+        entries = self._sorted
+        start = bisect.bisect_left(self._keys, min_x - self._max_width)
+        end = bisect.bisect_right(self._keys, max_x)
+        for i in xrange(start, end):
+            info = entries[i]
+            if info.max_x < min_x or info.min_y > max_y or info.max_y < min_y:
+                continue
+            if info.collidable.tag_mask & mask != mask:
+                continue
+            yield info.token, info.collidable
+
+
+    def collidables_along(self, origin, direction, max_distance, mask=0):
+        """yields (exit, found) like SpatialHash.collidables_along.
+        there are no cells to walk, so everything within the bounds
+        of the ray is found at once"""
+        end_x = origin.x + direction.x * max_distance
+        end_y = origin.y + direction.y * max_distance
+        yield max_distance, list(self.collidables_in(min(origin.x, end_x), min(origin.y, end_y),
+                                                     max(origin.x, end_x), max(origin.y, end_y),
+                                                     mask))
+
+
+    def _sort(self):
+        if not self._dirty:
+            return
+
+        entries = [info for info in self._sorted if not info.removed]
+        entries.sort(key=SortAndSweep._sort_key)
+        self._sorted = entries
+        self._keys = [info.min_x for info in entries]
+
+        self._max_width = 0
+        for info in entries:
+            width = info.max_x - info.min_x
+            if width > self._max_width:
+                self._max_width = width
+
+        self._dirty = False
+
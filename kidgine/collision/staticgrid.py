@@ -0,0 +1,104 @@
+import math
+
+import gridwalk
+
+
+class StaticGrid(object):
+    """read-only layer for collidables that never move (level
+    geometry). each collidable is registered once into every cell its
+    bounding box covers, so finding the static collidables near a
+    moving one is a handful of direct cell lookups. static collidables
+    are never tested against each other"""
+    CELL_SIZE = 32
+
+    def __init__(self):
+        self.collidables = dict()
+        self.cells = dict()
+
+
+    def clear(self):
+        """remove ALL collidables"""
+        self.collidables.clear()
+        self.cells.clear()
+
+
+    def contains(self, token):
+        return token in self.collidables
+
+
+    def get(self, token):
+        return self.collidables[token][0]
+
+
+    def size(self):
+        return len(self.collidables)
+
+
+    def add(self, token, collidable):
+        if token in self.collidables:
+            raise RuntimeError('static collidable {} already exists'.format(token))
+
+        collidable.update()
+        indices = list(StaticGrid._cells(*collidable.aabb))
+        self.collidables[token] = (collidable, indices)
+
+        for index in indices:
+            if index not in self.cells:
+                self.cells[index] = list()
+            self.cells[index].append((token, collidable))
+
+
+    def remove(self, token):
+        collidable,indices = self.collidables.pop(token)
+        for index in indices:
+            self.cells[index].remove((token, collidable))
+            if len(self.cells[index]) == 0:
+                del self.cells[index]
+
+
+    def potential_collidables(self, min_x, min_y, max_x, max_y):
+        """yield (token, collidable) for every static collidable
+        sharing a cell with the given bounds"""
+        seen = None
+        for index in StaticGrid._cells(min_x, min_y, max_x, max_y):
+            if index not in self.cells:
+                continue
+
+            for token,collidable in self.cells[index]:
+                # collidables spanning several cells are only reported once
+                if len(self.collidables[token][1]) > 1:
+                    if seen is None:
+                        seen = set()
+                    if token in seen:
+                        continue
+                    seen.add(token)
+
+                yield token,collidable
+
+
+    def collidables_along(self, origin, direction, max_distance):
+        """walk the cells a ray crosses in order. yields (exit, found)
+        where found lists the (token, collidable) pairs first seen in
+        that cell and exit is the distance at which the ray leaves it"""
+        seen = set()
+        for x,y,exit in gridwalk.cells(origin, direction, max_distance, StaticGrid.CELL_SIZE):
+            found = list()
+            for token,collidable in self.cells.get((x, y), ()):
+                if token not in seen:
+                    seen.add(token)
+                    found.append((token, collidable))
+            yield exit, found
+
+
+    @staticmethod
+    def _cells(min_x, min_y, max_x, max_y):
+        # cells are half-open; touching a cell's edge does not count as
+        # being in it since touching shapes do not collide
+        size = float(StaticGrid.CELL_SIZE)
+        x0 = int(math.floor(min_x / size))
+        y0 = int(math.floor(min_y / size))
+        x1 = int(math.ceil(max_x / size))
+        y1 = int(math.ceil(max_y / size))
+        for x in xrange(x0, max(x1, x0 + 1)):
+            for y in xrange(y0, max(y1, y0 + 1)):
+                yield x,y
@@ -0,0 +1,98 @@
+import math
+
+from ..math import vector
+
+
+class TileGrid(object):
+    """occupancy bitmap of a regular grid of solid tiles, one int per
+    row with a bit per column. tile (x, y) covers [x * size, (x + 1) *
+    size) by [y * size, (y + 1) * size). boxes are pushed out of the
+    tiles directly from the bitmap, without going through shapes"""
+
+    def __init__(self, size=32):
+        self.size = size
+        self.rows = dict()
+        self.count = 0
+        # column of bit 0 of every row. it moves left when a tile left
+        # of it is added, so columns can be negative
+        self.min_x = 0
+
+
+    def add(self, x, y):
+        if x < self.min_x:
+            shift = self.min_x - x
+            for row_y in self.rows:
+                self.rows[row_y] <<= shift
+            self.min_x = x
+
+        bit = 1 << (x - self.min_x)
+        row = self.rows.get(y, 0)
+        if not row & bit:
+            self.rows[y] = row | bit
+            self.count += 1
+
+
+    def solid(self, x, y):
+        x -= self.min_x
+        if x < 0:
+            return False
+        return (self.rows.get(y, 0) >> x) & 1 == 1
+
+
+    def tiles_in(self, min_x, min_y, max_x, max_y):
+        """(x, y) of every solid tile overlapping the box; touching
+        does not count"""
+        size = float(self.size)
+        x0 = max(int(math.floor(min_x / size)), self.min_x)
+        y0 = int(math.floor(min_y / size))
+        x1 = int(math.ceil(max_x / size))
+        y1 = int(math.ceil(max_y / size))
+
+        found = list()
+        for y in xrange(y0, max(y1, y0 + 1)):
+            row = self.rows.get(y, 0) >> (x0 - self.min_x)
+            x = x0
+            while row and x < x1:
+                if row & 1:
+                    found.append((x, y))
+                row >>= 1
+                x += 1
+        return found
+
+
+    def resolve(self, min_x, min_y, max_x, max_y):
+        """vector that pushes the box out of the tiles it overlaps, or
+        None if it overlaps none. each tile pushes across its shallowest
+        face that is not shared with another solid tile; the deepest
+        push along each axis is kept"""
+        push_x = push_y = 0
+        hit = False
+        for x,y in self.tiles_in(min_x, min_y, max_x, max_y):
+            left = x * self.size
+            bottom = y * self.size
+
+            faces = ((max_x - left, -1, 0, x - 1, y),
+                     (left + self.size - min_x, 1, 0, x + 1, y),
+                     (max_y - bottom, 0, -1, x, y - 1),
+                     (bottom + self.size - min_y, 0, 1, x, y + 1))
+
+            best = None
+            for depth,dx,dy,nx,ny in faces:
+                if self.solid(nx, ny):
+                    continue
+                if best is None or depth < best[0]:
+                    best = depth, dx, dy
+            if best is None:
+                # buried; any face will do
+                best = min(faces)[:3]
+
+            depth,dx,dy = best
+            hit = True
+            if dx and depth > abs(push_x):
+                push_x = depth * dx
+            if dy and depth > abs(push_y):
+                push_y = depth * dy
+
+        if not hit:
+            return None
+        return vector.Vector(push_x, push_y)
@@ -0,0 +1,306 @@
+import math
+
+from ..net import serializedobject
+
+
+# 16.16 fixed point: a value v is stored as the int round(v * ONE).
+# sums, products and square roots of these are done on ints only, so
+# the same inputs give bit for bit the same results on any machine,
+# however the values got there. that is what lockstep and prediction
+# replay need and floats can not promise
+FRACTION_BITS = 16
+ONE = 1 << FRACTION_BITS
+_HALF = ONE >> 1
+
+
+def from_float(f):
+    return int(round(f * ONE))
+
+
+def to_float(raw):
+    return raw / float(ONE)
+
+
+def mul(a, b):
+    return (a * b + _HALF) >> FRACTION_BITS
+
+
+def div(a, b):
+    return (a << FRACTION_BITS) // b
+
+
+def _isqrt(n):
+    """largest int whose square is at most n"""
+    if n <= 0:
+        return 0
+    x = 1 << ((n.bit_length() + 1) >> 1)
+    while True:
+        y = (x + n // x) >> 1
+        if y >= x:
+            return x
+        x = y
+
+
+def sqrt(a):
+    return _isqrt(a << FRACTION_BITS)
+
+
+# cos_sin works with this many fraction bits so the rounding in its
+# series stays well below the 16 bits it returns
+_TRIG_BITS = 30
+_TRIG_ONE = 1 << _TRIG_BITS
+_PI = int(round(math.pi * _TRIG_ONE))
+_HALF_PI = _PI >> 1
+
+
+def cos_sin(angle):
+    """cos and sin of the fixed point angle in radians, as fixed point.
+    worked out on ints from a taylor series rather than taken from libm,
+    whose last bits are up to the platform"""
+    x = angle << (_TRIG_BITS - FRACTION_BITS)
+
+    # bring x into [-pi/2, pi/2]; past that, cos changes sign
+    x = (x + _PI) % (2 * _PI) - _PI
+    cos_sign = 1
+    if x > _HALF_PI:
+        x = _PI - x
+        cos_sign = -1
+    elif x < -_HALF_PI:
+        x = -_PI - x
+        cos_sign = -1
+
+    x_sqr = (x * x) >> _TRIG_BITS
+    cos = sin = 0
+    cos_term = _TRIG_ONE
+    sin_term = x
+    # the terms past x**14 / 14! are under 2**-30 for |x| <= pi/2
+    for n in xrange(2, 16, 2):
+        cos += cos_term
+        sin += sin_term
+        cos_term = -((cos_term * x_sqr) >> _TRIG_BITS) // ((n - 1) * n)
+        sin_term = -((sin_term * x_sqr) >> _TRIG_BITS) // (n * (n + 1))
+
+    shift = _TRIG_BITS - FRACTION_BITS
+    half = 1 << (shift - 1)
+    return cos_sign * ((cos + half) >> shift), (sin + half) >> shift
+
+
+def _raw(x):
+    # scalars may come in as floats, which are snapped to the grid first
+    if isinstance(x, (int, long)):
+        return x << FRACTION_BITS
+    return from_float(x)
+
+
+class FixedVector(serializedobject.SerializedObject):
+    """Vector with fixed point components. x and y read and write as
+    floats so it can go wherever a Vector goes, but every result is
+    rounded to 1/65536 and computed on ints. raw_x and raw_y are what
+    gets stored and sent"""
+    _SERIALIZED_MEMBERS = {
+        'raw_x' : serializedobject.int,
+        'raw_y' : serializedobject.int }
+
+    def __init__(self, x=0., y=0.):
+        super(FixedVector, self).__init__()
+        self.raw_x = _raw(x)
+        self.raw_y = _raw(y)
+
+
+    @staticmethod
+    def from_raw(raw_x, raw_y):
+        # skips __init__; this is what every operator returns through
+        v = object.__new__(FixedVector)
+        v.raw_x = raw_x
+        v.raw_y = raw_y
+        return v
+
+
+    def _get_x(self):
+        return self.raw_x / float(ONE)
+
+
+    def _set_x(self, x):
+        self.raw_x = _raw(x)
+
+
+    def _get_y(self):
+        return self.raw_y / float(ONE)
+
+
+    def _set_y(self, y):
+        self.raw_y = _raw(y)
+
+
+    x = property(_get_x, _set_x)
+    y = property(_get_y, _set_y)
+
+
+    def magnitude(self):
+        return to_float(self.raw_magnitude())
+
+
+    def raw_magnitude(self):
+        return _isqrt(self.raw_x * self.raw_x + self.raw_y * self.raw_y)
+
+
+    def magnitude_sqr(self):
+        return to_float(self.raw_dot(self))
+
+
+    def __add__(self, v):
+        v = fixed(v)
+        return FixedVector.from_raw(self.raw_x + v.raw_x, self.raw_y + v.raw_y)
+
+
+    __radd__ = __add__
+
+
+    def __iadd__(self, v):
+        v = fixed(v)
+        self.raw_x += v.raw_x
+        self.raw_y += v.raw_y
+        return self
+
+
+    def __sub__(self, v):
+        v = fixed(v)
+        return FixedVector.from_raw(self.raw_x - v.raw_x, self.raw_y - v.raw_y)
+
+
+    def __rsub__(self, v):
+        return fixed(v) - self
+
+
+    def __mul__(self, scalar):
+        s = _raw(scalar)
+        return FixedVector.from_raw(mul(self.raw_x, s), mul(self.raw_y, s))
+
+
+    __rmul__ = __mul__
+
+
+    def __imul__(self, scalar):
+        s = _raw(scalar)
+        self.raw_x = mul(self.raw_x, s)
+        self.raw_y = mul(self.raw_y, s)
+        return self
+
+
+    def __div__(self, scalar):
+        s = _raw(scalar)
+        return FixedVector.from_raw(div(self.raw_x, s), div(self.raw_y, s))
+
+
+    def __neg__(self):
+        return FixedVector.from_raw(-self.raw_x, -self.raw_y)
+
+
+    def __eq__(self, other):
+        try:
+            other = fixed(other)
+        except AttributeError:
+            return False
+        return self.raw_x == other.raw_x and self.raw_y == other.raw_y
+
+
+    def __ne__(self, other):
+        return not self == other
+
+
+    def __str__(self):
+        return "(" + str(self.x) + ", " + str(self.y) + ")"
+
+
+    def dot(self, v):
+        return to_float(self.raw_dot(fixed(v)))
+
+
+    def raw_dot(self, v):
+        return mul(self.raw_x, v.raw_x) + mul(self.raw_y, v.raw_y)
+
+
+    def distance_sqr(self, v):
+        return (self - v).magnitude_sqr()
+
+
+    def distance(self, v):
+        return (self - v).magnitude()
+
+
+    def normalized(self):
+        mag = self.raw_magnitude()
+        if mag == 0:
+            return FixedVector()
+        return FixedVector.from_raw(div(self.raw_x, mag), div(self.raw_y, mag))
+
+
+    def to_radians(self):
+        # a float for display and the like; not something to simulate on
+        return math.atan2(self.raw_y, self.raw_x)
+
+
+    def rotate(self, angle):
+        cos, sin = cos_sin(_raw(angle))
+        return FixedVector.from_raw(mul(self.raw_x, cos) - mul(self.raw_y, sin),
+                                    mul(self.raw_x, sin) + mul(self.raw_y, cos))
+
+
+    def copy(self):
+        return FixedVector.from_raw(self.raw_x, self.raw_y)
+
+
+    def _change_key(self):
+        # cheaper than the packed bytes SerializedObject compares
+        return (self.raw_x, self.raw_y)
+
+
+    def set(self, x, y):
+        self.raw_x = _raw(x)
+        self.raw_y = _raw(y)
+        return self
+
+
+    def iadd(self, v):
+        return self.__iadd__(v)
+
+
+    def isub(self, v):
+        v = fixed(v)
+        self.raw_x -= v.raw_x
+        self.raw_y -= v.raw_y
+        return self
+
+
+    def imul(self, scalar):
+        return self.__imul__(scalar)
+
+
+    def closer_than(self, v, dist):
+        d = _raw(dist)
+        delta = self - v
+        return delta.raw_dot(delta) < mul(d, d)
+
+
+    def shorter_than(self, mag):
+        m = _raw(mag)
+        return self.raw_dot(self) < mul(m, m)
+
+
+def fixed(v):
+    """v as a FixedVector; v itself if it already is one"""
+    if type(v) is FixedVector or isinstance(v, FixedVector):
+        return v
+    return FixedVector(v.x, v.y)
+
+
+def zero():
+    return FixedVector()
+
+
+def interpolate(one, two, interp_time):
+    one = fixed(one)
+    two = fixed(two)
+    t = _raw(interp_time)
+    return FixedVector.from_raw(one.raw_x + mul(two.raw_x - one.raw_x, t),
+                                one.raw_y + mul(two.raw_y - one.raw_y, t))
@@ -0,0 +1,45 @@
+import math
+
+
+# the eight directions 45 degrees apart come up all the time (facings,
+# projectiles and the hitboxes turned with them), so their cos and sin
+# are kept in a table. the values are exact: cos of 90 degrees is 0
+# here, not 6.1e-17 as math.cos has it
+_STEP = math.pi / 4
+_H = math.sqrt(0.5)
+directions = ((1., 0.), (_H, _H), (0., 1.), (-_H, _H),
+              (-1., 0.), (-_H, -_H), (0., -1.), (_H, -_H))
+
+# angles closer than this to a multiple of 45 degrees use the table
+_SNAP = 1e-9
+
+# angles remembered by cos_sin() before it starts over
+_CACHE_SIZE = 256
+_cache = dict()
+
+
+def direction(step):
+    """(cos, sin) of step * 45 degrees"""
+    return directions[step % 8]
+
+
+def cos_sin(angle):
+    """(cos, sin) of angle in radians. results are remembered, so shapes
+    and abilities that keep turning to the same few angles only pay for
+    the trig once"""
+    try:
+        return _cache[angle]
+    except KeyError:
+        pass
+
+    steps = angle / _STEP
+    nearest = round(steps)
+    if abs(steps - nearest) < _SNAP:
+        result = directions[int(nearest) % 8]
+    else:
+        result = math.cos(angle), math.sin(angle)
+
+    if len(_cache) >= _CACHE_SIZE:
+        _cache.clear()
+    _cache[angle] = result
+    return result
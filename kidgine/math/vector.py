@@ -1,6 +1,7 @@
 import math
 import operator
 
+import trig
 from ..net import serializedobject
 
 
@@ -53,23 +54,29 @@ class Vector(object):#serializedobject.SerializedObject):
 
 
     def __sub__(self, x):
+        if isinstance(x, Vector):
+            return Vector(self.x - x.x, self.y - x.y)
         return self._do_operation(operator.sub, x)
 
     __rsub__ = __sub__
 
 
     def __div__(self, x):
+        if isinstance(x, _scalars):
+            return Vector(self.x / x, self.y / x)
         return self._do_operation(operator.div, x)
 
     __rdiv__ = __div__
 
 
     def __mul__(self, x):
+        if isinstance(x, _scalars):
+            return Vector(self.x * x, self.y * x)
         return self._do_operation(operator.mul, x)
 
     __rmul__ = __mul__
-	
-	
+
+
     def __imul__(self, x):
         self.x *= x
         self.y *= x
@@ -96,8 +103,9 @@ class Vector(object):#serializedobject.SerializedObject):
 
 
     def distance_sqr(self, v):
-        d = self - v
-        return d.x * d.x + d.y * d.y
+        dx = self.x - v.x
+        dy = self.y - v.y
+        return dx * dx + dy * dy
 
 
     def distance(self, v):
@@ -118,14 +126,68 @@ class Vector(object):#serializedobject.SerializedObject):
     def rotate(self, angle):
         #"""roates the current vector around the origin by angle
         #radians and return the result"""
-        return Vector(self.x * math.cos(angle) - self.y * math.sin(angle),
-                      self.x * math.sin(angle) + self.y * math.cos(angle))
+        cos = math.cos(angle)
+        sin = math.sin(angle)
+        return Vector(self.x * cos - self.y * sin,
+                      self.x * sin + self.y * cos)
 
 
     def copy(self):
         return Vector(self.x, self.y)
 
 
+    # in-place versions of the operators above. they change this vector
+    # and return it, so temporaries can be reused instead of allocated
+
+    def set(self, x, y):
+        self.x = x
+        self.y = y
+        return self
+
+
+    def iadd(self, v):
+        self.x += v.x
+        self.y += v.y
+        return self
+
+
+    def isub(self, v):
+        self.x -= v.x
+        self.y -= v.y
+        return self
+
+
+    def imul(self, scalar):
+        self.x *= scalar
+        self.y *= scalar
+        return self
+
+
+    def iadd_scaled(self, v, scalar):
+        """self += v * scalar"""
+        self.x += v.x * scalar
+        self.y += v.y * scalar
+        return self
+
+
+    def inormalize(self):
+        mag = self.magnitude()
+        if mag == 0.0:
+            self.x = self.y = 0.
+        else:
+            self.x /= mag
+            self.y /= mag
+        return self
+
+
+    def irotate(self, angle):
+        cos = math.cos(angle)
+        sin = math.sin(angle)
+        self.x, self.y = (self.x * cos - self.y * sin,
+                          self.x * sin + self.y * cos)
+        return self
+
+
     def closer_than(self, v, dist):
         return self.distance_sqr(v) < (dist * dist)
 
@@ -134,6 +196,40 @@ class Vector(object):#serializedobject.SerializedObject):
         return self.magnitude_sqr() < (mag * mag)
 
 
+_scalars = (int, long, float)
+
+
+class ScratchPool(object):
+    """vectors for temporaries that do not outlive a call. take the
+    mark() before get()ting any and release(mark) when done with them;
+    everything handed out since the mark is reused by later calls"""
+
+    def __init__(self):
+        self._vectors = list()
+        self._used = 0
+
+
+    def mark(self):
+        return self._used
+
+
+    def get(self, x=0., y=0.):
+        if self._used == len(self._vectors):
+            self._vectors.append(Vector())
+        v = self._vectors[self._used]
+        self._used += 1
+        v.x = x
+        v.y = y
+        return v
+
+
+    def release(self, mark):
+        self._used = mark
+
+
+# shared by everything running on the game thread
+scratch = ScratchPool()
+
 
 def zero():
     return Vector()
@@ -158,7 +254,8 @@ constant_up    = up()
 
 def from_radians(direction):
     #"""takes a direction in radians"""
-    return Vector(math.cos(direction), math.sin(direction))
+    cos, sin = trig.cos_sin(direction)
+    return Vector(cos, sin)
 
 
 def interpolate(one, two, interp_time):
@@ -0,0 +1,128 @@
+import array
+
+from .math import vector
+
+# numpy is optional; integrate() falls back to a plain loop without it
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class StoredVector(vector.Vector):
+    """a Vector whose x and y live in a slot of two Movers columns.
+    reads and writes go straight to the arrays, so it can stand in for
+    an entity's own position or forces"""
+    __slots__ = ('_xs', '_ys', '_index')
+
+    def __init__(self, xs, ys, index):
+        self._xs = xs
+        self._ys = ys
+        self._index = index
+
+
+    def _get_x(self):
+        return self._xs[self._index]
+
+
+    def _set_x(self, x):
+        self._xs[self._index] = x
+
+
+    def _get_y(self):
+        return self._ys[self._index]
+
+
+    def _set_y(self, y):
+        self._ys[self._index] = y
+
+
+    x = property(_get_x, _set_x)
+    y = property(_get_y, _set_y)
+
+
+class Movers(object):
+    """positions, velocities and accumulated forces of moving entities,
+    stored column by column with one slot per entity. entities keep
+    their slot and use the views returned by position(), velocity(),
+    forces() and motion(). integrate() advances every slot at once"""
+    _COLUMNS = ('x', 'y', 'vx', 'vy', 'fx', 'fy', 'mx', 'my')
+
+    def __init__(self):
+        for name in Movers._COLUMNS:
+            setattr(self, name, array.array('d'))
+        self._free = list()
+
+
+    def size(self):
+        return len(self.x) - len(self._free)
+
+
+    def add(self, position):
+        """new slot starting at position, at rest. returns its index"""
+        if self._free:
+            index = self._free.pop()
+        else:
+            index = len(self.x)
+            for name in Movers._COLUMNS:
+                getattr(self, name).append(0.)
+
+        for name in Movers._COLUMNS:
+            getattr(self, name)[index] = 0.
+        self.x[index] = position.x
+        self.y[index] = position.y
+        return index
+
+
+    def remove(self, index):
+        # a free slot has no velocity or forces, so integrate() leaves
+        # it alone until it is reused
+        for name in Movers._COLUMNS:
+            getattr(self, name)[index] = 0.
+        self._free.append(index)
+
+
+    def position(self, index):
+        return StoredVector(self.x, self.y, index)
+
+
+    def velocity(self, index):
+        return StoredVector(self.vx, self.vy, index)
+
+
+    def forces(self, index):
+        return StoredVector(self.fx, self.fy, index)
+
+
+    def motion(self, index):
+        """how far the slot moved in the last integrate()"""
+        return StoredVector(self.mx, self.my, index)
+
+
+    def integrate(self, dt):
+        """motion = velocity * dt + forces and position += motion for
+        every slot, then clear the forces"""
+        if len(self.x) == 0:
+            return
+
+        if numpy is not None:
+            x, y, vx, vy, fx, fy, mx, my = [numpy.frombuffer(getattr(self, name), dtype=numpy.float64)
+                                            for name in Movers._COLUMNS]
+            numpy.multiply(vx, dt, out=mx)
+            mx += fx
+            numpy.multiply(vy, dt, out=my)
+            my += fy
+            x += mx
+            y += my
+            fx.fill(0.)
+            fy.fill(0.)
+            return
+
+        x, y, vx, vy, fx, fy, mx, my = [getattr(self, name) for name in Movers._COLUMNS]
+        for i in xrange(len(x)):
+            mx[i] = vx[i] * dt + fx[i]
+            my[i] = vy[i] * dt + fy[i]
+            x[i] += mx[i]
+            y[i] += my[i]
+            fx[i] = 0.
+            fy[i] = 0.
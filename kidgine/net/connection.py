@@ -4,6 +4,7 @@ import time
 
 import flowcontrol
 import packet
+import serializedobject
 from .. import utils
 
 
@@ -70,8 +71,11 @@ class Connection(object):
         # set up some hidden state
         # objects to notify on connect/disconnect
         self._callbacks = list()
-        # mapping of sequence, data of packets that must be delivered reliably
+        # mapping of sequence, parts of packets that must be delivered reliably
         self._reliable_packets = dict()
+        # every outgoing packet is assembled here and sent straight from it
+        self._header = packet.Packet(protocol)
+        self._buffer = bytearray(1500)
         # queues to keep track of packet size
         self._sent_size_queue     = collections.deque(maxlen=64)
         self._received_size_queue = collections.deque(maxlen=64)
@@ -86,27 +90,55 @@ class Connection(object):
 
 
     def send_data(self, data):
-        p = packet.Packet.create_from_data(
-            self.protocol,
-            data,
+        return self.send_parts((data,))
+
+
+    def send_parts(self, parts):
+        """send one packet whose payload is parts laid end to end. each
+        part is a SerializedObject or a string (or any buffer). the packet
+        header and every part are written into one buffer that is reused
+        for each packet, and the datagram is sent from a view of it
+
+        """
+        header = self._header
+        header.set_header(
             self.sequence,
             self.last_received_sequences,
             self.last_packet_acked_time)
 
-        self._sent_size_queue.append((time.time(), len(p.data)))
-        self.last_sent_size = len(p.data)
+        buffer = self._buffer
+        end = header.pack_into(buffer)
+        for part in parts:
+            if isinstance(part, serializedobject.SerializedObject):
+                end = part.pack_into(buffer, end)
+            else:
+                start = end
+                end += len(part)
+                if len(buffer) < end:
+                    serializedobject.reserve(buffer, end)
+                buffer[start:end] = part
+
+        self._sent_size_queue.append((time.time(), end))
+        self.last_sent_size = end
 
         self.packets_sent += 1
 
         self.packet_times[self.sequence] = time.time()
         sent_sequence = self.sequence
         self.last_packet_send_time = time.time()
-        self.socket.sendto(p.data, self.peer)
+        self.socket.sendto(memoryview(buffer)[:end], self.peer)
         self.sequence = packet.next_sequence(self.sequence)
 
         return sent_sequence
 
 
+    def send_parts_reliable(self, parts):
+        """send_parts(), resending when the packet is lost. see
+        send_data_reliable()"""
+        sequence = self.send_parts(parts)
+        self._reliable_packets[sequence] = parts
+
+
     def send_data_reliable(self, data):
         """attempts to send data, and resends it when we detect it is lost.
         note that no effort is made to disambiguate the same packet received
@@ -116,8 +148,7 @@ class Connection(object):
         process it on the receiving end once.
 
         """
-        sequence = self.send_data(data)
-        self._reliable_packets[sequence] = data
+        self.send_parts_reliable((data,))
 
 
     def receive_data(self, peer, data):
@@ -239,7 +270,7 @@ class Connection(object):
             # the function is only to establish that we are connected
             # and everything is working properly - no data is necessary
             if time.time() - self.last_packet_send_time > flowcontrol.HEARTBEAT_TIME:
-                self.send_data('')
+                self.send_parts(())
 
 
     def disconnect(self):
@@ -261,10 +292,9 @@ class Connection(object):
 
                 # is this reliable? need to resend and update state
                 if sequence in self._reliable_packets:
-                    data = self._reliable_packets[sequence]
+                    parts = self._reliable_packets[sequence]
                     del self._reliable_packets[sequence]
-                    new_sequence = self.send_data(data)
-                    self._reliable_packets[new_sequence] = data
+                    self.send_parts_reliable(parts)
 
 
     def format_connection_stats(self):
@@ -7,6 +7,16 @@ import serializedobject
 
 logger = logging.getLogger(__name__)
 
+
+def bytes_payload(handler):
+    """wrap a message handler so it gets its payload as a str rather
+    than a view into the received datagram"""
+    def wrapper(id, payload, addr):
+        if isinstance(payload, memoryview):
+            payload = payload.tobytes()
+        return handler(id, payload, addr)
+    return wrapper
+
 class MessageHeader(serializedobject.SerializedObject):
     _SERIALIZED_MEMBERS = {
         'type'         : serializedobject.uchar,
@@ -63,19 +73,23 @@ class Dispatcher(object):
 
 
     def receive(self, data, addr):
+        # headers are read in place and payloads are views into data,
+        # so nothing after the datagram itself gets copied
+        data = memoryview(data)
         total_length = len(data)
-        while len(data) > 0:
+        offset = 0
+        while offset < total_length:
             header = MessageHeader()
-            data = header.unpack(data)
-            payload = data[:header.message_size]
-            data = data[header.message_size:]
+            offset = header.unpack_from(data, offset)
+            payload = data[offset:offset + header.message_size]
+            offset += header.message_size
             if header.num_parts != 1:
                 if header.id not in self._multipart_messages:
                     self._multipart_messages[header.id] = _MultipartMessage(
                         header.type, header.id, addr, header.num_parts)
                 msg = self._multipart_messages[header.id]
                 if header.index < msg.length and msg.addr == addr:
-                    msg.parts[header.index] = payload
+                    msg.parts[header.index] = payload.tobytes()
 
                     if not any(x == None for x in msg.parts):
                         # we have all parts
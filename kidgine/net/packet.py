@@ -70,24 +70,19 @@ class Packet(serializedobject.SerializedObject):
             self.packet_sent_time += (1 << 16)
 
 
-    @staticmethod
-    def create_from_data(protocol, data, sequence, acks, ack_received_time):
-        p = Packet(protocol)
-        p.sequence = sequence
-        p.acks = acks
-        p.ack_received_time = ack_received_time
-        p.packet_sent_time = time.time() # assume now is when the packet is sent
-        p.payload = data
-        p.data = p.pack() + data
-        return p
+    def set_header(self, sequence, acks, ack_received_time):
+        self.sequence = sequence
+        self.acks = acks
+        self.ack_received_time = ack_received_time
+        self.packet_sent_time = time.time() # assume now is when the packet is sent
 
 
     @staticmethod
     def create_from_network(protocol, data):
         p = Packet(protocol)
         p.data = data
-        data = p.unpack(data)
-        p.payload = data
+        # the payload is a view into the datagram, not a copy of it
+        p.payload = memoryview(data)[p.unpack_from(data):]
         return p
 
 
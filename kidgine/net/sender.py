@@ -22,6 +22,8 @@ class Sender(object):
 
         # maximum size for bundling packets
         self.MAXIMUM_PACKET_SIZE = 1400 - packet.Packet.static_size
+        # maximum size of the data following each message header
+        self.MAXIMUM_CHUNK_SIZE = self.MAXIMUM_PACKET_SIZE - dispatcher.MessageHeader.static_size
 
 
     def queue(self, type, data):
@@ -36,7 +38,7 @@ class Sender(object):
         packets = self._build_packets(type, sent_id, data)
 
         for p in packets:
-            if len(p) > self.MAXIMUM_PACKET_SIZE:
+            if p[0].message_size > self.MAXIMUM_CHUNK_SIZE:
                 raise RuntimeError("Message is too large!")
 
             list_to_append.append(p)
@@ -51,29 +53,31 @@ class Sender(object):
         packets = self._build_packets(type, sent_id, data)
 
         for p in packets:
-            if len(p) > self.MAXIMUM_PACKET_SIZE:
+            if p[0].message_size > self.MAXIMUM_CHUNK_SIZE:
                 raise RuntimeError("Message is too large!")
 
             if is_reliable:
-                self.connection.send_data_reliable(p)
+                self.connection.send_parts_reliable(p)
             else:
-                self.connection.send_data(p)
+                self.connection.send_parts(p)
 
         return sent_id
 
 
     def _build_packets(self, type, id, data):
-        """Take a string of data and pack into n chunks, where each fits into
-        one UDP packet. Return these in a list
+        """Take a string of data and split it into n chunks, where each fits
+        into one UDP packet. Return these in a list, each as a [header, chunk]
+        pair. Nothing is packed or copied here: the connection writes both
+        into its send buffer
 
         """
         packets = list()
 
-        chunk_size = self.MAXIMUM_PACKET_SIZE - dispatcher.MessageHeader().static_size
+        chunk_size = self.MAXIMUM_CHUNK_SIZE
         num_chunks = (len(data) + chunk_size - 1) / chunk_size
         for i, chunk in enumerate(_chunks(data, chunk_size)):
             header = dispatcher.MessageHeader(type, id, len(chunk), i, num_chunks)
-            packets.append(header.pack() + chunk)
+            packets.append([header, chunk])
 
         return packets
 
@@ -92,34 +96,43 @@ class Sender(object):
     def send_all(self):
         for packet in self._bundle_packets(self.message_queue):
             if len(packet) > 0:
-                self.connection.send_data(packet)
+                self.connection.send_parts(packet)
         for packet in self._bundle_packets(self.reliable_message_queue):
             if len(packet) > 0:
-                self.connection.send_data_reliable(packet)
+                self.connection.send_parts_reliable(packet)
         self.message_queue = []
         self.reliable_message_queue = []
 
 
     def _bundle_packets(self, messages_list):
         total_length = 0
-        packet = ''
+        packet = []
+
+        header_size = dispatcher.MessageHeader.static_size
 
         for message in messages_list:
-            if total_length + len(message) > self.MAXIMUM_PACKET_SIZE:
+            message_size = header_size + message[0].message_size
+            if total_length + message_size > self.MAXIMUM_PACKET_SIZE:
                 final_message = packet
-                packet = ''
+                packet = []
                 total_length = 0
                 yield final_message
 
-            total_length += len(message)
+            total_length += message_size
             packet += message
 
         yield packet
 
 
 def _chunks(l, n):
-    """Yield successive n-sized chunks from l.
+    """Yield successive n-sized chunks from l, as views rather than
+    copies.
 
     """
+    if len(l) <= n:
+        yield l
+        return
+
+    view = memoryview(l)
     for i in xrange(0, len(l), n):
-        yield l[i:i+n]
+        yield view[i:i+n]
@@ -180,6 +180,14 @@ class Array(object):
         return x,data
 
 
+    def unpack_item_from(self, data, offset):
+        """returns item, offset past it"""
+        x,offset = _create_from(self._type(), data, offset)
+        if x is not None:
+            offset = x.unpack_from(data, offset)
+        return x,offset
+
+
     def add(self, container, item):
         container.append(item)
 
@@ -219,6 +227,12 @@ class Dict(object):
         return obj,data
 
 
+    def unpack_item_from(self, data, offset):
+        obj = self._type()
+        offset = obj.unpack_from(data, offset)
+        return obj,offset
+
+
     def add(self, container, item):
         container[item.key] = item.value
 
@@ -272,6 +286,13 @@ def _DictHolder(key_type, value_type):
 
 _polymorphic_packer = struct.Struct('!B')
 
+
+def reserve(buffer, size):
+    """make the bytearray buffer at least size bytes long. it at least
+    doubles, so filling a buffer a piece at a time stays cheap"""
+    if len(buffer) < size:
+        buffer.extend(bytearray(max(size - len(buffer), len(buffer))))
+
 class Polymorphic(object):
     static_size = 0
 
@@ -296,13 +317,41 @@ class Polymorphic(object):
         return [obj, data]
 
 
+    def _create_from(self, data, offset):
+        [key] = _polymorphic_packer.unpack_from(data, offset)
+        obj = _classtags.tag_to_class(key)()
+        if isinstance(obj, classtags.NoneType):
+            obj = None
+        return [obj, offset + _polymorphic_packer.size]
+
+
+
+def _create_from(creator, data, offset):
+    """creator._create() reading data from offset on. returns the new
+    object and the offset past what was read"""
+    if isinstance(creator, Polymorphic):
+        return creator._create_from(data, offset)
+    if _plain_create(type(creator)):
+        return [creator.__class__(), offset]
+
+    rest = data[offset:]
+    obj,rest = creator._create(rest)
+    return [obj, len(data) - len(rest)]
+
+
 
 class _SerializedObjectMetaclass(type):
     def __new__(cls, name, bases, dct):
         if name != 'SerializedObject':
             # only do things if initializing a subclass of SerializedObject
             dct = _SerializedObjectMetaclass.create(cls, name, bases, dct)
-        return super(_SerializedObjectMetaclass, cls).__new__(cls, name, bases, dct)
+        c = super(_SerializedObjectMetaclass, cls).__new__(cls, name, bases, dct)
+        if name != 'SerializedObject':
+            _compile(c, dct)
+            # subclasses of a class passed to track_changes() track too
+            if getattr(c, '_TRACK_CHANGES', False):
+                _track(c)
+        return c
 
 
     @staticmethod
@@ -348,6 +397,11 @@ class _SerializedObjectMetaclass(type):
         dct['serialized_members'] = serialized_members
         dct['serialized_packable_members'] = serialized_packable_members
         dct['serialized_array_members'] = serialized_array_members
+        # every member, in the order pack() writes them
+        dct['serialized_member_names'] = (
+            serialized_members +
+            [name for name,_ in serialized_packable_members] +
+            [name for name,_ in serialized_array_members])
 
         return dct
 
@@ -505,6 +559,46 @@ class SerializedObject(object):
         return self._packed_log
 
 
+    def changes(self):
+        """bitmask of the members changed since the last _clear_changes(),
+        with a bit per member of serialized_member_names. classes not
+        passed to track_changes() compare _change_key() instead, so for
+        them any change sets every bit"""
+        if self._change_key() == self.__dict__.get('_clean_key'):
+            return 0
+        return (1 << len(self.serialized_member_names)) - 1
+
+
+    def _change_key(self):
+        """a value that differs whenever the packed bytes do"""
+        return self.pack()
+
+
+    def _clear_changes(self):
+        # only gamestate.snapshot_fields() calls this: the fields it
+        # keeps for each entity are only right if nothing else does
+        self._clean_key = self._change_key()
+
+
+    def pack_into(self, buffer, offset=0):
+        """pack into the bytearray buffer at offset, growing it if it is
+        too short. returns the offset just past what was written"""
+        data = self.pack()
+        end = offset + len(data)
+        if len(buffer) < end:
+            reserve(buffer, end)
+        buffer[offset:end] = data
+        return end
+
+
+    def unpack_from(self, data, offset=0):
+        """unpack from data (a str, bytearray or memoryview) starting at
+        offset, without copying the rest of it like unpack() does.
+        returns the offset just past what was read"""
+        rest = self.unpack(data[offset:])
+        return len(data) - len(rest)
+
+
     def unpack(self, data_to_unpack):
         array_sizes = list()
         if self._packer.size > 0:
@@ -545,3 +639,416 @@ class SerializedObject(object):
             fn()
 
         return data
+
+
+
+#
+# generated pack() and unpack()
+#
+# SerializedObject.pack() and unpack() work out what to do with every
+# member on every call. _compile() works it out once per class instead
+# and generates a pack() and unpack() with the members, struct calls,
+# nested objects and containers spelled out. the generated functions
+# give exactly the same bytes; with _DEBUG on they hand over to the
+# generic versions, which do the logging
+#
+
+def _is_polymorphic(datatype):
+    return inspect.isclass(datatype) and issubclass(datatype, Polymorphic)
+
+
+def _plain_create(datatype):
+    """true if datatype()._create(data) is just datatype()"""
+    return (inspect.isclass(datatype) and issubclass(datatype, SerializedObject) and
+            datatype._create.im_func is SerializedObject._create.im_func)
+
+
+class _Source(object):
+    """lines of generated code, and the values they refer to, which are
+    passed in as arguments of the function wrapping them"""
+
+    def __init__(self, constants, writer=None):
+        self.lines = list()
+        self.constants = constants
+        self.writer = writer
+        self._unique = 0
+
+
+    def add(self, indent, line):
+        self.lines.append('    ' * indent + line)
+
+
+    def constant(self, value):
+        for name,existing in self.constants.iteritems():
+            if existing is value:
+                return name
+        name = '_c{}'.format(len(self.constants))
+        self.constants[name] = value
+        return name
+
+
+    def unique(self, prefix):
+        self._unique += 1
+        return '{}{}'.format(prefix, self._unique)
+
+
+class _AppendWriter(object):
+    """code for pack(): appends the pieces to the list out"""
+
+    def struct(self, src, indent, packer, items):
+        src.add(indent, 'out.append({}.pack({}))'.format(packer, ', '.join(items)))
+
+
+    def nested(self, src, indent, var):
+        src.add(indent, 'out.append({}.pack(False))'.format(var))
+
+
+class _BufferWriter(object):
+    """code for pack_into(): writes the pieces into buffer at offset,
+    growing it as needed"""
+
+    def struct(self, src, indent, packer, items):
+        src.add(indent, 'end = offset + {}.size'.format(packer))
+        src.add(indent, 'if len(buffer) < end:')
+        src.add(indent + 1, 'reserve(buffer, end)')
+        src.add(indent, '{}.pack_into(buffer, offset, {})'.format(packer, ', '.join(items)))
+        src.add(indent, 'offset = end')
+
+
+    def nested(self, src, indent, var):
+        src.add(indent, 'offset = {}.pack_into(buffer, offset)'.format(var))
+
+
+def _pack_members(src, indent, cls, get):
+    """code packing cls's primitives and nested objects, with get(name)
+    the expression for a member"""
+    if cls._packer.size > 0:
+        items = [get(name) for name in cls.serialized_members]
+        items += ['len({})'.format(get(name)) for name,_ in cls.serialized_array_members]
+        src.writer.struct(src, indent, src.constant(cls._packer), items)
+
+    for name,datatype in cls.serialized_packable_members:
+        var = src.unique('obj')
+        src.add(indent, '{} = {}'.format(var, get(name)))
+        _pack_object(src, indent, datatype, var)
+
+
+def _pack_object(src, indent, datatype, var):
+    if _is_polymorphic(datatype):
+        src.add(indent, 'if {} is None:'.format(var))
+        src.writer.struct(src, indent + 1, '_polymorphic_packer',
+                          ['_classtags.class_to_tag(classtags.NoneType)'])
+        src.add(indent, 'else:')
+        src.writer.struct(src, indent + 1, '_polymorphic_packer',
+                          ['_classtags.class_to_tag({}.__class__)'.format(var)])
+        src.writer.nested(src, indent + 1, var)
+    else:
+        src.add(indent, 'if {} is not None:'.format(var))
+        src.writer.nested(src, indent + 1, var)
+
+
+def _pack_container(src, indent, name, datatype, container):
+    item = src.unique('item')
+    if type(datatype) is Array:
+        src.add(indent, 'for {} in {}:'.format(item, container))
+        _pack_object(src, indent + 1, datatype.packer_type(), item)
+    elif (type(datatype) is Dict and
+          not datatype.packer_type().serialized_array_members):
+        key = src.unique('key')
+        src.add(indent, 'for {},{} in {}.iteritems():'.format(key, item, container))
+        holder = {'key' : key, 'value' : item}
+        _pack_members(src, indent + 1, datatype.packer_type(), holder.get)
+    else:
+        src.add(indent, 'for {} in {}.iterator({}):'.format(
+            item, src.constant(datatype), container))
+        _pack_object(src, indent + 1, datatype.packer_type(), item)
+
+
+def _unpack_members(src, indent, cls, set):
+    """code reading cls's primitives and nested objects from data at
+    offset, with set(name, value) the statement storing a member.
+    returns the expressions for the array lengths"""
+    lengths = list()
+    if cls._packer.size > 0:
+        raw = src.unique('raw')
+        src.add(indent, '{} = {}.unpack_from(data, offset)'.format(
+            raw, src.constant(cls._packer)))
+        i = 0
+        for name in cls.serialized_members:
+            src.add(indent, set(name, '{}[{}]'.format(raw, i)))
+            i += 1
+        for name,_ in cls.serialized_array_members:
+            lengths.append('{}[{}]'.format(raw, i))
+            i += 1
+        src.add(indent, 'offset += {}'.format(cls._packer.size))
+
+    for name,datatype in cls.serialized_packable_members:
+        var = src.unique('obj')
+        _unpack_object(src, indent, datatype, var)
+        src.add(indent, set(name, var))
+
+    return lengths
+
+
+def _unpack_object(src, indent, datatype, var):
+    if _is_polymorphic(datatype):
+        src.add(indent, '{} = _classtags.tag_to_class('
+                '_polymorphic_packer.unpack_from(data, offset)[0])()'.format(var))
+        src.add(indent, 'offset += {}'.format(_polymorphic_packer.size))
+        src.add(indent, 'if isinstance({}, classtags.NoneType):'.format(var))
+        src.add(indent + 1, '{} = None'.format(var))
+        src.add(indent, 'else:')
+        src.add(indent + 1, 'offset = {}.unpack_from(data, offset)'.format(var))
+    elif _plain_create(datatype):
+        src.add(indent, '{} = {}()'.format(var, src.constant(datatype)))
+        src.add(indent, 'offset = {}.unpack_from(data, offset)'.format(var))
+    else:
+        src.add(indent, '{},offset = _create_from({}(), data, offset)'.format(
+            var, src.constant(datatype)))
+        src.add(indent, 'if {} is not None:'.format(var))
+        src.add(indent + 1, 'offset = {}.unpack_from(data, offset)'.format(var))
+
+
+def _unpack_container(src, indent, name, datatype, length, container):
+    item = src.unique('item')
+    src.add(indent, '{} = {}.create()'.format(container, src.constant(datatype)))
+    src.add(indent, 'for _ in xrange({}):'.format(length))
+    if type(datatype) is Array:
+        _unpack_object(src, indent + 1, datatype.packer_type(), item)
+        src.add(indent + 1, '{}.append({})'.format(container, item))
+    elif (type(datatype) is Dict and
+          not datatype.packer_type().serialized_array_members):
+        key = src.unique('key')
+        holder = {'key' : key, 'value' : item}
+        _unpack_members(src, indent + 1, datatype.packer_type(),
+                        lambda name, value: '{} = {}'.format(holder[name], value))
+        src.add(indent + 1, '{}[{}] = {}'.format(container, key, item))
+    elif hasattr(datatype, 'unpack_item_from'):
+        dt = src.constant(datatype)
+        src.add(indent + 1, '{},offset = {}.unpack_item_from(data, offset)'.format(item, dt))
+        src.add(indent + 1, '{}.add({}, {})'.format(dt, container, item))
+    else:
+        dt = src.constant(datatype)
+        src.add(indent + 1, '{},rest = {}.unpack_item(data[offset:])'.format(item, dt))
+        src.add(indent + 1, 'offset = len(data) - len(rest)')
+        src.add(indent + 1, '{}.add({}, {})'.format(dt, container, item))
+
+
+def _compile(cls, dct):
+    """give cls a generated pack(), pack_into(), unpack() and
+    unpack_from(), unless it defines its own"""
+    constants = dict()
+
+    src = _Source(constants, _AppendWriter())
+    src.add(0, 'def pack(self, top=True, level=\'\'):')
+    src.add(1, 'if _DEBUG:')
+    src.add(2, 'return SerializedObject.pack(self, top, level)')
+    if hasattr(cls, 'before_pack'):
+        src.add(1, 'self.before_pack()')
+    src.add(1, 'out = []')
+    _pack_members(src, 1, cls, lambda name: 'self.' + name)
+    for name,datatype in cls.serialized_array_members:
+        _pack_container(src, 1, name, datatype, 'self.' + name)
+    src.add(1, 'return \'\'.join(out)')
+    src.add(0, '')
+
+    src.writer = _BufferWriter()
+    src.add(0, 'def pack_into(self, buffer, offset=0):')
+    src.add(1, 'if _DEBUG:')
+    src.add(2, 'return SerializedObject.pack_into(self, buffer, offset)')
+    if hasattr(cls, 'before_pack'):
+        src.add(1, 'self.before_pack()')
+    _pack_members(src, 1, cls, lambda name: 'self.' + name)
+    for name,datatype in cls.serialized_array_members:
+        _pack_container(src, 1, name, datatype, 'self.' + name)
+    src.add(1, 'return offset')
+    pack_lines = src.lines
+
+    src = _Source(constants)
+    src.add(0, 'def unpack(self, data):')
+    src.add(1, 'if _DEBUG:')
+    src.add(2, 'return SerializedObject.unpack(self, data)')
+    src.add(1, 'return data[self.unpack_from(data):]')
+    src.add(0, '')
+    src.add(0, 'def unpack_from(self, data, offset=0):')
+    src.add(1, 'if _DEBUG:')
+    src.add(2, 'return SerializedObject.unpack_from(self, data, offset)')
+    lengths = _unpack_members(src, 1, cls,
+                              lambda name, value: 'self.{} = {}'.format(name, value))
+    for (name,datatype),length in zip(cls.serialized_array_members, lengths):
+        container = src.unique('container')
+        _unpack_container(src, 1, name, datatype, length, container)
+        src.add(1, 'self.{} = {}'.format(name, container))
+    if hasattr(cls, 'after_unpack'):
+        src.add(1, 'self.after_unpack()')
+    src.add(1, 'return offset')
+    unpack_lines = src.lines
+
+    # the constants become arguments of a function returning these,
+    # so the generated code sees them as fast locals of its closure and
+    # this module's globals (_DEBUG, _classtags) as they are at the time
+    names = sorted(constants)
+    code = ['def _make({}):'.format(', '.join(names))]
+    code += ['    ' + line for line in pack_lines + [''] + unpack_lines]
+    code += ['    return pack, pack_into, unpack, unpack_from']
+    code = '\n'.join(code) + '\n'
+
+    namespace = dict()
+    exec compile(code, '<serializedobject {}>'.format(cls.__name__), 'exec') in globals(), namespace
+    pack, pack_into, unpack, unpack_from = namespace['_make'](**constants)
+    for fn in pack, pack_into, unpack, unpack_from:
+        fn.source = code
+
+    if 'pack' not in dct:
+        cls.pack = pack
+        # as with unpack_from(), a class with its own pack() keeps the
+        # pack_into() that goes through it
+        if 'pack_into' not in dct:
+            cls.pack_into = pack_into
+    if 'unpack' not in dct:
+        cls.unpack = unpack
+        # a class with its own unpack() keeps the slicing unpack_from()
+        # that goes through it
+        if 'unpack_from' not in dct:
+            cls.unpack_from = unpack_from
+
+
+
+
+#
+# members one at a time
+#
+# pack_member() and unpack_member() send a member on its own, so that
+# e.g. only the members that changed since the receiver's last copy of
+# an object go out. each (class, member) pair gets a holder object with
+# just that member, whose generated pack() and unpack_from() do the work
+#
+
+_member_holders = dict()
+
+
+def _member_holder(cls, name):
+    try:
+        return _member_holders[(cls, name)]
+    except KeyError:
+        pass
+
+    datatype = getattr(cls, _SERIALIZED_MEMBERS_ATTR_NAME)[name]
+    holder_class = _SerializedObjectMetaclass(
+        '_MemberHolder', (SerializedObject,),
+        { _SERIALIZED_MEMBERS_ATTR_NAME : { name : datatype } })
+    holder = holder_class()
+    _member_holders[(cls, name)] = holder
+    return holder
+
+
+def pack_member(obj, name):
+    """obj's member name packed on its own. before_pack() is not
+    called; that is up to the caller"""
+    holder = _member_holder(type(obj), name)
+    setattr(holder, name, getattr(obj, name))
+    return holder.pack()
+
+
+def unpack_member(cls, name, data, offset=0):
+    """read a member of a cls packed by pack_member(). returns the value
+    and the offset past it"""
+    holder = _member_holder(cls, name)
+    offset = holder.unpack_from(data, offset)
+    return [getattr(holder, name), offset]
+
+
+_mask_packers = [struct.Struct('!' + code) for code in 'BHIQ']
+
+
+def mask_packer(count):
+    """struct for a bitmask with a bit for each of count members"""
+    for packer in _mask_packers:
+        if count <= packer.size * 8:
+            return packer
+    raise RuntimeError('Can only mask 64 members')
+
+
+
+#
+# change tracking
+#
+# a class passed to track_changes() records which members are assigned
+# in a __setattr__ of its own. that costs a python call on every
+# assignment, unpacking included, so it is left to the side that
+# packs changes (the server) to turn it on. nested objects and
+# containers can change without being assigned: they count as changed
+# when their _change_key() or packed bytes differ from those at the
+# last _clear_changes(). that state is kept on the object tracking the
+# changes, never on the nested objects, which may be shared
+#
+
+def _change_key(value):
+    if value is None:
+        return None
+    return value._change_key()
+
+
+def track_changes(cls):
+    """from now on, assigning a member of cls or of any subclass of it
+    (including ones defined later) sets the member's bit for changes().
+    call before snapshotting any instance"""
+    cls._TRACK_CHANGES = True
+    classes = [cls]
+    while classes:
+        c = classes.pop()
+        _track(c)
+        classes.extend(c.__subclasses__())
+
+
+def _track(cls):
+    names = cls.serialized_member_names
+    bits = dict((name, 1 << i) for i,name in enumerate(names))
+
+    # this runs on every assignment, so it writes to __dict__ itself
+    # unless the class has a descriptor (property, slot) by that name
+    descriptors = set()
+    for c in inspect.getmro(cls):
+        descriptors.update(name for name,value in vars(c).iteritems()
+                           if hasattr(value, '__set__'))
+
+    def __setattr__(self, name, value, bits=bits, descriptors=descriptors):
+        if name in bits:
+            self.__dict__['_changed'] = self._changed | bits[name]
+        if name in descriptors:
+            object.__setattr__(self, name, value)
+        else:
+            self.__dict__[name] = value
+
+    cls._changed = 0
+    cls._nested_bits = [(name, bits[name]) for name,_ in cls.serialized_packable_members]
+    cls._container_bits = [(name, bits[name]) for name,_ in cls.serialized_array_members]
+    cls.__setattr__ = __setattr__
+    cls.changes = _tracked_changes
+    cls._clear_changes = _tracked_clear_changes
+
+
+def _tracked_changes(self):
+    mask = self._changed
+    if self._nested_bits:
+        clean = self.__dict__.get('_clean_nested', {})
+        for name,bit in self._nested_bits:
+            if not mask & bit and _change_key(getattr(self, name)) != clean.get(name):
+                mask |= bit
+    if self._container_bits:
+        clean = self.__dict__.get('_clean_containers', {})
+        for name,bit in self._container_bits:
+            if not mask & bit and pack_member(self, name) != clean.get(name):
+                mask |= bit
+    return mask
+
+
+def _tracked_clear_changes(self):
+    d = self.__dict__
+    d['_changed'] = 0
+    if self._nested_bits:
+        d['_clean_nested'] = dict((name, _change_key(getattr(self, name)))
+                                  for name,_ in self._nested_bits)
+    if self._container_bits:
+        d['_clean_containers'] = dict((name, pack_member(self, name))
+                                      for name,_ in self._container_bits)
@@ -13,6 +13,8 @@ import entity
 import gamestate
 import level
 import messages
+import prediction
+from ..net import dispatcher
 from ..net import networkmanager
 from ..renderer import debug
 
@@ -98,25 +100,26 @@ class Client(object):
         self.handler = Queue.Queue()
 
         # register RPC functions
-        self.register_receive_handler(
+        self._networkmanager.register_receive_handler(
             messages.default_messages.types.GAMESTATE_UPDATE, self._on_gamestate_update)
-        self.register_receive_handler(
+        self._networkmanager.register_receive_handler(
             messages.default_messages.types.INIT_LEVEL, self._on_init_level)
-        self.register_receive_handler(
+        self._networkmanager.register_receive_handler(
             messages.default_messages.types.TIMESTAMP, self._on_timestamp)
-        self.register_receive_handler(
+        self._networkmanager.register_receive_handler(
             messages.default_messages.types.SVAR_UPDATE, self._on_svar_update)
-        self.register_receive_handler(
+        self._networkmanager.register_receive_handler(
             messages.default_messages.types.INVALID_CMD, self._on_invalid_cmd)
 
         self._remote_address = None
 
-        self._input_commands = deque()
-
         # keep track of time
         self._localtime = 0
         self._accumulator = 0
 
+        # updates received, for applying the deltas that follow them
+        self._snapshots = gamestate.ReceivedSnapshots()
+
         # keep a queue of gamestates around for interpolating
         # entities
         self._states = deque()
@@ -125,6 +128,8 @@ class Client(object):
         # interpolation between old state and new state, plus
         # client side prediction for the current player
         self._interpolated_state = gamestate.Gamestate(self._configs)
+        # input commands sent but not yet acknowledged by the server
+        self._prediction = prediction.InputPrediction(self._interpolated_state)
 
         self._gamerenderer = None
 
@@ -133,7 +138,9 @@ class Client(object):
     #
 
     def register_receive_handler(self, type, method):
-        self._networkmanager.register_receive_handler(type, method)
+        # internal handlers read views of the datagram; subclass
+        # handlers get a str they can keep
+        self._networkmanager.register_receive_handler(type, dispatcher.bytes_payload(method))
 
 
     def add_drawable(self, order, drawable):
@@ -144,6 +151,18 @@ class Client(object):
         self._renderer.remove_drawable(drawable)
 
 
+    @_playing_function
+    def send_input(self, player_id, input_command):
+        """send an input command to the server and run it on our player
+        right away, ahead of the server. it is kept for replaying until
+        the server acknowledges it, so pass a new one each time"""
+        msg_id = self._networkmanager.queue(
+            self._remote_address,
+            messages.default_messages.types.INPUT_COMMAND,
+            input_command.pack())
+        self._prediction.predict(self._localtime, player_id, msg_id, input_command)
+
+
     @_playing_function
     def do_update(self, inputs, player_id, t, dt):
         """override this to perform logic on each update step"""
@@ -164,6 +183,9 @@ class Client(object):
 
 
     def on_connect(self, addr):
+        # the server starts over with updates against nothing
+        self._snapshots.clear()
+
         conn = self._networkmanager.get_connection(addr)
         if self._debug_overlay:
             self._debug_overlay.set_connection(conn)
@@ -173,15 +195,29 @@ class Client(object):
     # RPC functions
     #
 
-    @_playing_function
-    def _on_gamestate_update(self, player_id, msg_id, data, addr):
+    def _on_gamestate_update(self, msg_id, data, addr):
         update_msg = messages.GamestateUpdateMsg
-        data = update_msg.unpack(data)
+        update_msg.unpack_from(data)
+
+        # rebuilt even when we are not playing yet: once we confirm it,
+        # the server sends deltas against this update
+        dynamic = self._snapshots.receive(
+            update_msg.snapshot_id, update_msg.baseline_id, update_msg.state)
+        if dynamic is None:
+            logger.warning('dropping gamestate update {}: no baseline {}'.format(
+                    update_msg.snapshot_id, update_msg.baseline_id))
+            return
+
+        self._networkmanager.queue(
+            addr,
+            messages.default_messages.types.SNAPSHOT_ACK,
+            messages.SnapshotAckMsg.set(update_msg.snapshot_id).pack())
 
-        dynamic = update_msg.state
-        life_msgs = update_msg.life_msgs
-        last_input_command_ack = update_msg.last_input_ack
+        self._apply_gamestate_update(dynamic, update_msg.life_msgs, update_msg.last_input_ack)
 
+
+    @_playing_function
+    def _apply_gamestate_update(self, player_id, dynamic, life_msgs, last_input_command_ack):
         new_state =  (dynamic, self._last_server_time, life_msgs)
         self._states.append(new_state)
 
@@ -197,24 +233,10 @@ class Client(object):
             old_player = self._interpolated_state._dynamic.entities[player_id].copy()
 
         if player_id in new_state[0].entities:
-            player_character = new_state[0].entities[player_id].copy()
-            self._interpolated_state.set_entity(player_id, player_character)
-            # replay input commands
-            to_pop = 0
-            for msg_id, input_command in self._input_commands:
-                if msg_id <= last_input_command_ack:
-                    to_pop += 1
-                    continue
-
-                self._interpolated_state.simulate_player_input(
-                    self._localtime, player_id, input_command)
-
-            while to_pop > 0:
-                self._input_commands.popleft()
-                to_pop -= 1
-
+            replayed = self._prediction.reconcile(
+                self._localtime, player_id, new_state[0].entities[player_id], last_input_command_ack)
 
-            if old_player is not None:
+            if replayed and old_player is not None:
                 new_player = self._interpolated_state._dynamic.entities[player_id]
                 if not new_player.position.closer_than(old_player.position, 10):
                     logger.info('WARPING from {} to {}'.format(old_player.position, new_player.position))
@@ -222,19 +244,22 @@ class Client(object):
                     # if we are pretty close to server position, just move a bit closer
                     self._interpolated_state.set_entity(player_id,
                                                         old_player.interpolate(new_player, .1))
+                    # what we predicted is no longer what we show
+                    self._prediction.forget_digests()
 
         delta = self._localtime - new_state[1]
 
 
     def _on_init_level(self, msg_id, data, addr):
         msg = messages.InitLevelMsg
-        msg.unpack(data)
+        msg.unpack_from(data)
 
         self._player_id = msg.player_id
 
         logger.info('init level {}. player id is {}'.format(msg.level_path, self._player_id))
         # clear old state
         self._states.clear()
+        self._prediction.clear()
         self._last_server_time = 0
 
         l = level.load(msg.level_path)
@@ -254,7 +279,7 @@ class Client(object):
 
     def _on_timestamp(self, msg_id, data, addr):
         msg = messages.TimestampMsg
-        msg.unpack(data)
+        msg.unpack_from(data)
         latency = self._networkmanager.get_connection(addr).rtt / 2000.0
         self._localtime = msg.timestamp + latency
         self._last_server_time = msg.timestamp
@@ -262,7 +287,7 @@ class Client(object):
 
     def _on_svar_update(self, msg_id, data, addr):
         msg = messages.SetSvarMsg
-        msg.unpack(data)
+        msg.unpack_from(data)
         self._configs.server.set(msg.name, msg.value)
         logger.debug('got svar update; {} = {}'.format(
             msg.name, self._configs.server.get(msg.name)))
@@ -270,7 +295,7 @@ class Client(object):
 
     def _on_invalid_cmd(self, msg_id, data, addr):
         msg = messages.InvalidCmdMsg
-        msg.unpack(data)
+        msg.unpack_from(data)
         logger.warning(msg.message)
 
 
@@ -1,5 +1,5 @@
 from .. import utils
-from ..math import vector
+from ..math import fixed
 from ..net import serializedobject
 
 
@@ -54,13 +54,15 @@ prediction_type = utils.enum(
 
 class Entity(serializedobject.SerializedObject):
     _SERIALIZED_MEMBERS = {
-        'position' : vector.Vector,
+        'position' : fixed.FixedVector,
         'collidable' : serializedobject.Polymorphic }
 
-    def __init__(self, position=vector.zero):
+    def __init__(self, position=None):
         super(Entity, self).__init__()
 
         self.alive = True
+        if position is None:
+            position = fixed.zero()
         self.position = position
         self.collidable = None
         self.collidable_token = None
@@ -68,6 +70,20 @@ class Entity(serializedobject.SerializedObject):
         self.id = 0 # not serialized; only set when added/removed from gamestate
 
 
+    def _get_position(self):
+        return self._position
+
+
+    def _set_position(self, position):
+        # always fixed point, whatever is assigned, so the client's
+        # prediction of an entity comes out exactly like the server's
+        # simulation of it
+        self._position = fixed.fixed(position)
+
+
+    position = property(_get_position, _set_position)
+
+
     # how is the entity displayed on the client? predicted, interpolated?
     def prediction_type(self, controlling_player):
         # by default, predicted if we're controlling this entity, otherwise interpolated
@@ -127,7 +143,7 @@ class Entity(serializedobject.SerializedObject):
 
 
     def interpolate(self, new, interp_time):
-        e = type(self)(vector.interpolate(self.position, new.position, interp_time))
+        e = type(self)(fixed.interpolate(self.position, new.position, interp_time))
         return e
 
 
@@ -1,6 +1,7 @@
 import collections
 import logging
 import random
+import struct
 
 import level
 from ..collision import CollisionDetector
@@ -47,7 +48,7 @@ class StaticGamestate(object):
         id = 0
         for entity in level_obj.static_entities:
             if entity.collidable is not None:
-                collision_detector.update_collidable(id, entity.collidable)
+                collision_detector.add_static_collidable(id, entity.collidable)
             self.entities[id] = entity
             id += 1
 
@@ -63,6 +64,292 @@ class DynamicGamestate(serializedobject.SerializedObject):
 
 
 
+# gamestate updates are sent as deltas against the newest update the
+# receiver is known to have: the server remembers what it sent in each
+# update (SentSnapshots), and once the receiver confirms it applied an
+# update, it becomes the baseline for the next ones. an entity is
+# described by its class and the packed bytes of each of its members
+# (its fields); the delta carries the entities removed since the
+# baseline, whole entities that are new or changed class, and for the
+# rest only the fields that changed. entities that did not change at
+# all are left out
+
+# updates remembered per player, waiting to be confirmed
+SNAPSHOT_HISTORY = 32
+
+_count_packer = struct.Struct('!H')
+_id_packer = struct.Struct('!I')
+# entity id and class tag, followed by a bitmask of the fields sent and
+# then those fields. a whole entity has every bit set
+_record_packer = struct.Struct('!IB')
+
+
+def _entity_fields(e):
+    """(class, packed bytes of each member) of entity e. the result is
+    kept on e with its changes cleared, so the next call only packs the
+    members changed since"""
+    try:
+        fn = e.before_pack
+    except AttributeError:
+        pass
+    else:
+        fn()
+
+    cls = type(e)
+    names = cls.serialized_member_names
+    previous = e.__dict__.get('_snapshot_fields')
+    if previous is None:
+        fields = (cls, tuple(serializedobject.pack_member(e, name) for name in names))
+    else:
+        mask = e.changes()
+        if mask == 0:
+            return previous
+        packed = list(previous[1])
+        for i,name in enumerate(names):
+            if mask & (1 << i):
+                packed[i] = serializedobject.pack_member(e, name)
+        fields = (cls, tuple(packed))
+
+    e._clear_changes()
+    e.__dict__['_snapshot_fields'] = fields
+    return fields
+
+
+def snapshot_fields(dynamic):
+    """id -> (class, packed bytes of each member) of every entity in the
+    DynamicGamestate. this is the server's snapshot step, and the only
+    place entities' changes are cleared"""
+    return dict((id, _entity_fields(e)) for id,e in dynamic.entities.iteritems())
+
+
+def entity_from_fields(cls, fields):
+    e = cls()
+    for name,data in zip(cls.serialized_member_names, fields):
+        value,_ = serializedobject.unpack_member(cls, name, data)
+        setattr(e, name, value)
+
+    try:
+        fn = e.after_unpack
+    except AttributeError:
+        pass
+    else:
+        fn()
+    return e
+
+
+def _bytes(data):
+    if isinstance(data, memoryview):
+        return data.tobytes()
+    return str(data)
+
+
+def _all_fields(cls):
+    return (1 << len(cls.serialized_member_names)) - 1
+
+
+class GamestateDelta(serializedobject.SerializedObject):
+    """the entities of an update as the changes from a baseline. removed
+    is a list of ids; records maps id -> (class, mask, fields), where
+    mask has a bit set for each member in fields"""
+    _SERIALIZED_MEMBERS = {}
+
+    def __init__(self):
+        super(GamestateDelta, self).__init__()
+        self.removed = list()
+        self.records = dict()
+
+
+    @staticmethod
+    def create(fields, baseline):
+        """delta taking the snapshot_fields() baseline (None for no
+        baseline) to fields"""
+        delta = GamestateDelta()
+        if baseline is None:
+            baseline = dict()
+
+        for id in baseline:
+            if id not in fields:
+                delta.removed.append(id)
+
+        for id,current in fields.iteritems():
+            old = baseline.get(id)
+            if old == current:
+                continue
+
+            cls, new_fields = current
+            if old is None or old[0] is not cls:
+                delta.records[id] = (cls, _all_fields(cls), new_fields)
+                continue
+
+            mask = 0
+            changed = list()
+            for i,(a,b) in enumerate(zip(old[1], new_fields)):
+                if a != b:
+                    mask |= 1 << i
+                    changed.append(b)
+            delta.records[id] = (cls, mask, changed)
+
+        return delta
+
+
+    def apply(self, baseline_entities, baseline_fields):
+        """the (entities, fields) this delta makes of a baseline's. the
+        dicts passed in are not changed, and entities that did not change
+        are shared with them"""
+        entities = dict(baseline_entities)
+        fields = dict(baseline_fields)
+
+        for id in self.removed:
+            entities.pop(id, None)
+            fields.pop(id, None)
+
+        for id,(cls, mask, changed) in self.records.iteritems():
+            if mask != _all_fields(cls):
+                merged = list(fields[id][1])
+                changed = iter(changed)
+                for i in xrange(len(merged)):
+                    if mask & (1 << i):
+                        merged[i] = next(changed)
+                changed = tuple(merged)
+            changed = tuple(changed)
+            entities[id] = entity_from_fields(cls, changed)
+            fields[id] = (cls, changed)
+
+        return entities, fields
+
+
+    def pack(self, top=True, level=''):
+        out = [_count_packer.pack(len(self.removed))]
+        for id in self.removed:
+            out.append(_id_packer.pack(id))
+
+        out.append(_count_packer.pack(len(self.records)))
+        for id,(cls, mask, fields) in self.records.iteritems():
+            out.append(_record_packer.pack(id, serializedobject._classtags.class_to_tag(cls)))
+            out.append(serializedobject.mask_packer(len(cls.serialized_member_names)).pack(mask))
+            out.extend(fields)
+
+        return ''.join(out)
+
+
+    def unpack(self, data):
+        return data[self.unpack_from(data):]
+
+
+    def unpack_from(self, data, offset=0):
+        self.removed = list()
+        self.records = dict()
+
+        [count] = _count_packer.unpack_from(data, offset)
+        offset += _count_packer.size
+        for i in xrange(count):
+            self.removed.append(_id_packer.unpack_from(data, offset)[0])
+            offset += _id_packer.size
+
+        [count] = _count_packer.unpack_from(data, offset)
+        offset += _count_packer.size
+        for i in xrange(count):
+            id,tag = _record_packer.unpack_from(data, offset)
+            offset += _record_packer.size
+            cls = serializedobject._classtags.tag_to_class(tag)
+            names = cls.serialized_member_names
+            mask_packer = serializedobject.mask_packer(len(names))
+            [mask] = mask_packer.unpack_from(data, offset)
+            offset += mask_packer.size
+
+            fields = list()
+            for bit,name in enumerate(names):
+                if mask & (1 << bit):
+                    start = offset
+                    _,offset = serializedobject.unpack_member(cls, name, data, offset)
+                    fields.append(_bytes(data[start:offset]))
+            self.records[id] = (cls, mask, fields)
+
+        return offset
+
+
+
+class SentSnapshots(object):
+    """the updates sent to one player, by snapshot id, until the player
+    confirms it applied one of them and it becomes the baseline for the
+    next"""
+    def __init__(self):
+        self._sent = collections.OrderedDict()
+        self._next_id = 1
+        self.baseline_id = 0
+        self.baseline = None
+
+
+    def next_id(self):
+        id = self._next_id
+        self._next_id += 1
+
+        # the player may no longer have a baseline this old, so the
+        # update goes out against nothing
+        if id - self.baseline_id >= min(SNAPSHOT_HISTORY, ReceivedSnapshots.HISTORY):
+            self.baseline_id = 0
+            self.baseline = None
+        return id
+
+
+    def add(self, id, fields):
+        """fields went out in update id"""
+        self._sent[id] = fields
+        while len(self._sent) > SNAPSHOT_HISTORY:
+            self._sent.popitem(last=False)
+
+
+    def confirm(self, id):
+        """the player applied update id; it becomes the baseline unless
+        a newer one already is"""
+        if id <= self.baseline_id or id not in self._sent:
+            return
+
+        self.baseline_id = id
+        self.baseline = self._sent[id]
+
+        # older updates will never be the baseline again
+        for id in self._sent.keys():
+            if id > self.baseline_id:
+                break
+            del self._sent[id]
+
+
+
+class ReceivedSnapshots(object):
+    """the updates received, by snapshot id, so deltas against them can
+    be applied. keeps more than SNAPSHOT_HISTORY, so any baseline the
+    server picks is still here"""
+    HISTORY = 2 * SNAPSHOT_HISTORY
+
+    def __init__(self):
+        self._received = collections.OrderedDict()
+
+
+    def clear(self):
+        self._received.clear()
+
+
+    def receive(self, id, baseline_id, delta):
+        """the DynamicGamestate of update id, or None if its baseline is
+        not known"""
+        if baseline_id == 0:
+            entities, fields = delta.apply(dict(), dict())
+        elif baseline_id in self._received:
+            entities, fields = delta.apply(*self._received[baseline_id])
+        else:
+            return None
+
+        self._received[id] = (entities, fields)
+        while len(self._received) > ReceivedSnapshots.HISTORY:
+            self._received.popitem(last=False)
+
+        state = DynamicGamestate()
+        state.entities = dict(entities)
+        return state
+
+
+
 class Gamestate(object):
     def __init__(self, configs):
         self.configs = configs
@@ -14,6 +14,7 @@ default_messages.add_reliable_message_type('INVALID_CMD')
 
 # client input commands
 default_messages.add_unreliable_message_type('INPUT_COMMAND',     -1)
+default_messages.add_unreliable_message_type('SNAPSHOT_ACK',      -1)
 
 # server updates - unreliable
 default_messages.add_unreliable_message_type('GAMESTATE_UPDATE',   0)
@@ -96,18 +97,24 @@ TimestampMsg = _TimestampMsg()
 
 
 class _GamestateUpdateMsg(serializedobject.SerializedObject):
+    # state is a delta against update baseline_id, or against nothing if
+    # baseline_id is 0
     _SERIALIZED_MEMBERS = {
         'last_input_ack' : serializedobject.uint,
-        'state'          : gamestate.DynamicGamestate,
+        'snapshot_id'    : serializedobject.uint,
+        'baseline_id'    : serializedobject.uint,
+        'state'          : gamestate.GamestateDelta,
         'life_msgs'      : gamestate.LifeMessages }
 
-    def __init__(self, ack_id=0, state=None, life_msgs=None):
+    def __init__(self, ack_id=0, snapshot_id=0, baseline_id=0, state=None, life_msgs=None):
         super(_GamestateUpdateMsg, self).__init__()
-        self.set(ack_id, state, life_msgs)
+        self.set(ack_id, snapshot_id, baseline_id, state, life_msgs)
 
 
-    def set(self, ack_id, state, life_msgs):
+    def set(self, ack_id, snapshot_id, baseline_id, state, life_msgs):
         self.last_input_ack = ack_id
+        self.snapshot_id = snapshot_id
+        self.baseline_id = baseline_id
         self.state = state
         self.life_msgs = life_msgs
 
@@ -117,6 +124,26 @@ class _GamestateUpdateMsg(serializedobject.SerializedObject):
 GamestateUpdateMsg = _GamestateUpdateMsg()
 
 
+# the client applied update snapshot_id, so the server may send deltas
+# against it
+class _SnapshotAckMsg(serializedobject.SerializedObject):
+    _SERIALIZED_MEMBERS = {
+        'snapshot_id' : serializedobject.uint }
+
+    def __init__(self, snapshot_id=0):
+        super(_SnapshotAckMsg, self).__init__()
+        self.set(snapshot_id)
+
+
+    def set(self, snapshot_id):
+        self.snapshot_id = snapshot_id
+
+        return self
+
+
+SnapshotAckMsg = _SnapshotAckMsg()
+
+
 class _InitLevelMsg(serializedobject.SerializedObject):
     _SERIALIZED_MEMBERS = {
         'level_path' : serializedobject.String(255),
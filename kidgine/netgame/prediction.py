@@ -0,0 +1,74 @@
+from collections import deque
+
+
+def state_digest(entity):
+    """hash of everything about entity the server sends us. with fixed
+    point positions, equal digests mean equal simulations"""
+    return hash(entity.pack())
+
+
+class InputPrediction(object):
+    """input commands run on the local player ahead of the server, kept
+    until the server acknowledges them. each one remembers the digest of
+    the player right after it ran, so when the server's player for an
+    acknowledged command digests the same, replaying the rest can be
+    skipped"""
+    def __init__(self, state):
+        # the Gamestate the local player is predicted in
+        self._state = state
+        # (msg id, input command, digest of the player after it or None)
+        self._commands = deque()
+
+
+    def __len__(self):
+        return len(self._commands)
+
+
+    def clear(self):
+        self._commands.clear()
+
+
+    def predict(self, t, player_id, msg_id, input_command):
+        """run input_command, sent to the server as msg_id, on the local
+        player"""
+        self._state.simulate_player_input(t, player_id, input_command)
+        self._commands.append((msg_id, input_command, self._digest(player_id)))
+
+
+    def reconcile(self, t, player_id, server_player, last_ack):
+        """bring the local player in line with server_player, the
+        server's player after input command last_ack. returns False if
+        what we predicted for last_ack matched and the local player was
+        left alone, True if the commands after last_ack were replayed
+        from server_player"""
+        predicted = None
+        while self._commands and self._commands[0][0] <= last_ack:
+            msg_id, _, digest = self._commands.popleft()
+            if msg_id == last_ack:
+                predicted = digest
+
+        if (predicted is not None and player_id in self._state._dynamic.entities and
+            predicted == state_digest(server_player)):
+            # we predicted the acknowledged input exactly as the server
+            # ran it, so replaying the rest from the server's state
+            # would get us right back to where we are
+            return False
+
+        self._state.set_entity(player_id, server_player.copy())
+        replayed = deque()
+        for msg_id, input_command, _ in self._commands:
+            self._state.simulate_player_input(t, player_id, input_command)
+            replayed.append((msg_id, input_command, self._digest(player_id)))
+        self._commands = replayed
+        return True
+
+
+    def forget_digests(self):
+        """the local player was moved by something other than prediction,
+        so no digest describes it any more"""
+        self._commands = deque((msg_id, input_command, None)
+                               for msg_id, input_command, _ in self._commands)
+
+
+    def _digest(self, player_id):
+        return state_digest(self._state._dynamic.entities[player_id])
@@ -2,9 +2,12 @@ import logging
 import time
 
 import download_server
+import entity
 import gamestate
 import messages
+from ..net import dispatcher
 from ..net import networkmanager
+from ..net import serializedobject
 
 
 logger = logging.getLogger(__name__)
@@ -29,6 +32,7 @@ class _PlayerData(object):
         self.last_input_acks        = 0
         self.last_update_time       = 0
         self.last_update_entity_set = set()
+        self.snapshots              = gamestate.SentSnapshots()
 
 
 class _AllPlayers(object):
@@ -67,13 +71,19 @@ class Server(object):
         self._controller = controller
         self.configs = configs
 
+        # entities record which members they assign, so each update
+        # only repacks those. clients, which never pack entities, skip
+        # the cost of that on every assignment
+        serializedobject.track_changes(entity.Entity)
+
         addr = (addr, port)
 
         self._networkmanager = networkmanager.NetworkManager(protocol, message_types, addr)
 
-        self.register_receive_handler(messages.default_messages.types.INPUT_COMMAND, self._on_input_update)
-        self.register_receive_handler(messages.default_messages.types.SET_SVAR, self._on_set_svar)
-        self.register_receive_handler(messages.default_messages.types.LOAD_LEVEL, self._on_load_level)
+        self._networkmanager.register_receive_handler(messages.default_messages.types.INPUT_COMMAND, self._on_input_update)
+        self._networkmanager.register_receive_handler(messages.default_messages.types.SNAPSHOT_ACK, self._on_snapshot_ack)
+        self._networkmanager.register_receive_handler(messages.default_messages.types.SET_SVAR, self._on_set_svar)
+        self._networkmanager.register_receive_handler(messages.default_messages.types.LOAD_LEVEL, self._on_load_level)
 
         self._networkmanager.register_connection_callbacks(self)
 
@@ -95,7 +105,9 @@ class Server(object):
     #
 
     def register_receive_handler(self, type, method):
-        self._networkmanager.register_receive_handler(type, method)
+        # internal handlers read views of the datagram; subclass
+        # handlers get a str they can keep
+        self._networkmanager.register_receive_handler(type, dispatcher.bytes_payload(method))
 
 
     def load_level(self, name, addr = None):
@@ -122,13 +134,25 @@ class Server(object):
 
     @_valid_player_function
     def _on_input_update(self, msg_id, payload, addr, player_data):
+        # sent back with each gamestate update, so the client knows
+        # which of its predicted commands the state already includes
+        player_data.last_input_acks = max(player_data.last_input_acks, msg_id)
+        if isinstance(payload, memoryview):
+            payload = payload.tobytes()
         self.do_on_input_update(msg_id, payload, addr, player_data)
 
 
+    @_valid_player_function
+    def _on_snapshot_ack(self, msg_id, payload, addr, player_data):
+        msg = messages.SnapshotAckMsg
+        msg.unpack_from(payload)
+        player_data.snapshots.confirm(msg.snapshot_id)
+
+
     @_valid_player_function
     def _on_set_svar(self, msg_id, payload, addr, player_data):
         msg = messages.SetSvarMsg
-        msg.unpack(payload)
+        msg.unpack_from(payload)
 
         # TODO: check for player permissions to set svars here
         self._set_svar(addr, player_data.id, msg.name, msg.value)
@@ -137,7 +161,7 @@ class Server(object):
     @_valid_player_function
     def _on_load_level(self, msg_id, payload, addr, player_data):
         msg = messages.LoadLevelMsg
-        msg.unpack(payload)
+        msg.unpack_from(payload)
 
         self.load_level(msg.name, addr)
 
@@ -296,6 +320,8 @@ class Server(object):
 
 
     def _sent_client_updates(self):
+        # packed once, and shared by every player updated this frame
+        fields = None
         for addr in self._networkmanager.connected_peers():
             player_data = self._all_players.get(addr)
             conn = self._networkmanager.get_connection(addr)
@@ -320,14 +346,23 @@ class Server(object):
                     else: # death
                         msgs.deaths[e] = holder
 
-                update_msg = messages.GamestateUpdateMsg.set(player_data.last_input_acks,
-                                                             self._controller.state._dynamic,
-                                                             msgs)
+                if fields is None:
+                    fields = gamestate.snapshot_fields(self._controller.state._dynamic)
+
+                snapshots = player_data.snapshots
+                snapshot_id = snapshots.next_id()
+                update_msg = messages.GamestateUpdateMsg.set(
+                    player_data.last_input_acks,
+                    snapshot_id,
+                    snapshots.baseline_id,
+                    gamestate.GamestateDelta.create(fields, snapshots.baseline),
+                    msgs)
                 data = update_msg.pack()
 
                 self._networkmanager.queue(
                     addr, messages.default_messages.types.GAMESTATE_UPDATE, data)
                 self._networkmanager.send_all(addr)
+                snapshots.add(snapshot_id, fields)
 
                 player_data.last_update_time = self._gametime
                 player_data.last_update_entity_set = entities
@@ -0,0 +1,28 @@
+"""an entity for the netgame tests, registered with the class tags once
+for all of them"""
+from kidgine.math.fixed import FixedVector
+from kidgine.net import classtags
+from kidgine.net import serializedobject
+from kidgine.netgame import entity
+
+
+class Walker(entity.Entity):
+    """moves by the move of each input command it is given"""
+    _SERIALIZED_MEMBERS = dict(entity.Entity._SERIALIZED_MEMBERS)
+
+    def copy(self):
+        return Walker(self.position.copy())
+
+
+    def simulate_input(self, t, inputs, collision_detector):
+        self.position = self.position + inputs.move
+
+
+    def after_unpack(self):
+        # no collidable to hand ourselves to
+        pass
+
+
+serializedobject.set_class_tags(classtags.ClassTags(
+        [classtags.NoneType, Walker, FixedVector]))
+serializedobject.track_changes(Walker)
@@ -0,0 +1,49 @@
+"""random scenes for the differential tests"""
+import math
+
+from kidgine.collision import circle
+from kidgine.collision import rectangle
+from kidgine.math import vector
+from kidgine.math.vector import Vector
+
+
+class Body(object):
+    """owner of a collidable; shapes read its position"""
+    def __init__(self, x, y):
+        self.position = Vector(x, y)
+
+
+def rectangles(rng, count, side, min_size=8, max_size=48, rotated=False):
+    """{token: collidable} of count rectangles with their own owners,
+    spread over a side x side square"""
+    all = dict()
+    for token in xrange(count):
+        body = Body(rng.uniform(0, side), rng.uniform(0, side))
+        half_w = rng.uniform(min_size, max_size) / 2
+        half_h = rng.uniform(min_size, max_size) / 2
+        c = rectangle.Rectangle(body, Vector(-half_w, -half_h), Vector(half_w, half_h))
+        if rotated and token % 3 == 0:
+            c.rotation = rng.uniform(0, 2 * math.pi)
+        all[token] = c
+    return all
+
+
+def shapes(rng, count, side, min_size=8, max_size=48):
+    """like rectangles(), with every other one a circle"""
+    all = rectangles(rng, count, side, min_size, max_size)
+    for token in xrange(0, count, 2):
+        radius = rng.uniform(min_size, max_size) / 2
+        all[token] = circle.Circle(all[token].owner, vector.zero(), radius)
+    return all
+
+
+def jiggle(rng, collidables, distance):
+    """move every owner by up to distance along each axis"""
+    for c in collidables.itervalues():
+        c.owner.position.x += rng.uniform(-distance, distance)
+        c.owner.position.y += rng.uniform(-distance, distance)
+
+
+def pairs(collisions):
+    """the unordered token pairs of some CollisionInfos"""
+    return set(frozenset((c.token1, c.token2)) for c in collisions)
@@ -0,0 +1,64 @@
+"""the vectorized rectangle narrow phase against pairwise collides()"""
+import random
+import unittest
+
+import kidgine.collision
+from kidgine.collision import batch
+
+import scenes
+
+
+@unittest.skipUnless(batch.available(), 'needs numpy')
+class BatchNarrowPhaseTest(unittest.TestCase):
+    def test_rectangle_collisions_match_collides(self):
+        rng = random.Random(4)
+        all = scenes.rectangles(rng, 400, 200, rotated=True)
+        for c in all.itervalues():
+            c.update()
+
+        candidates = [(all[i], all[i + 1]) for i in xrange(0, 400, 2)]
+        colliding, distance, translation = batch.rectangle_collisions(candidates)
+
+        hits = 0
+        for i,(a,b) in enumerate(candidates):
+            expected = kidgine.collision.collides(a, b)
+            self.assertEqual(bool(colliding[i]), expected is not None)
+            if expected is None:
+                continue
+
+            hits += 1
+            self.assertEqual(float(distance[i]), expected.distance)
+            self.assertEqual(float(translation[i][0]), expected.translation_vector.x)
+            self.assertEqual(float(translation[i][1]), expected.translation_vector.y)
+
+        # the scene is dense enough that both outcomes are covered
+        self.assertTrue(0 < hits < len(candidates))
+
+
+    def test_all_collisions_match_scalar_detector(self):
+        # shapes are only refreshed once per move, so each detector
+        # gets its own copy of the scene
+        scalar = kidgine.collision.CollisionDetector()
+        batched = kidgine.collision.CollisionDetector(batch_narrow_phase=True)
+        worlds = [(scalar, scenes.rectangles(random.Random(5), 300, 600, rotated=True), random.Random(6)),
+                  (batched, scenes.rectangles(random.Random(5), 300, 600, rotated=True), random.Random(6))]
+
+        for frame in xrange(3):
+            for detector,all,rng in worlds:
+                for token,c in all.iteritems():
+                    detector.update_collidable(token, c)
+
+            expected = dict(((c.token1, c.token2), c) for c in scalar.all_collisions())
+            found = dict(((c.token1, c.token2), c) for c in batched.all_collisions())
+            self.assertTrue(len(expected) > kidgine.collision.CollisionDetector.BATCH_MIN_PAIRS)
+            self.assertEqual(sorted(found), sorted(expected))
+            for key,c in found.iteritems():
+                self.assertEqual(c.distance, expected[key].distance)
+                self.assertEqual(c.translation_vector, expected[key].translation_vector)
+
+            for detector,all,rng in worlds:
+                scenes.jiggle(rng, all, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
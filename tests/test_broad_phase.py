@@ -0,0 +1,90 @@
+"""the broad phase backends against the original SpatialHash, or
+against SortAndSweep for shapes too large for the hash: the same scene
+must give the same collisions whichever backend finds them"""
+import random
+import unittest
+
+import kidgine.collision
+from kidgine.collision import shape
+
+import scenes
+
+
+TAG = 1
+
+
+def world(backend, seed, count=300, side=800, max_size=48):
+    """a detector with the given backend and its own copy of the scene
+    for seed; shapes are refreshed once per move, so detectors can not
+    share them"""
+    detector = kidgine.collision.CollisionDetector(broad_phase=backend())
+    all = scenes.shapes(random.Random(seed), count, side, max_size=max_size)
+    for token,c in all.iteritems():
+        if token % 3 == 0:
+            c.tags = set([TAG])
+    return detector, all
+
+
+def overlapping(found, aabb):
+    """tokens among (token, collidable) candidates whose bounding box
+    really overlaps aabb; backends may report more than that"""
+    return set(token for token,c in found if shape.aabb_overlap(aabb, c.aabb))
+
+
+class BroadPhaseTest(unittest.TestCase):
+    def assert_same(self, backend, reference=kidgine.collision.SpatialHash, max_size=48):
+        worlds = [world(reference, 3, max_size=max_size),
+                  world(backend, 3, max_size=max_size)]
+        moves = [random.Random(4), random.Random(4)]
+        removed = set()
+
+        for frame in xrange(5):
+            for (detector,all),rng in zip(worlds, moves):
+                scenes.jiggle(rng, all, 6)
+                for token,c in all.iteritems():
+                    if token not in removed:
+                        detector.update_collidable(token, c)
+
+            (expected,expected_all),(found,found_all) = worlds
+            self.assertEqual(scenes.pairs(found.all_collisions()),
+                             scenes.pairs(expected.all_collisions()))
+            self.assertEqual(scenes.pairs(found.all_collisions(filters=set([TAG]))),
+                             scenes.pairs(expected.all_collisions(filters=set([TAG]))))
+
+            for token in xrange(0, len(found_all), 7):
+                if token in removed:
+                    continue
+                self.assertEqual(scenes.pairs(found.collides(token=token)),
+                                 scenes.pairs(expected.collides(token=token)))
+
+            rng = random.Random(frame)
+            for i in xrange(20):
+                x, y = rng.uniform(0, 800), rng.uniform(0, 800)
+                aabb = (x, y, x + rng.uniform(0, 200), y + rng.uniform(0, 200))
+                self.assertEqual(overlapping(found.backend.collidables_in(*aabb), aabb),
+                                 overlapping(expected.backend.collidables_in(*aabb), aabb))
+
+            # some leave, so removal is covered too
+            for token in xrange(frame, len(found_all), 11):
+                if token not in removed:
+                    removed.add(token)
+                    expected.remove_collidable(token)
+                    found.remove_collidable(token)
+
+
+    def test_sort_and_sweep(self):
+        self.assert_same(kidgine.collision.SortAndSweep)
+
+
+    def test_hierarchical_grid(self):
+        self.assert_same(kidgine.collision.HierarchicalGrid)
+
+
+    def test_hierarchical_grid_large_shapes(self):
+        # too large for the hash's cells
+        self.assert_same(kidgine.collision.HierarchicalGrid,
+                         reference=kidgine.collision.SortAndSweep, max_size=400)
+
+
+if __name__ == '__main__':
+    unittest.main()
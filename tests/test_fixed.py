@@ -0,0 +1,105 @@
+"""FixedVector against Vector doing the same sums in floats"""
+import math
+import random
+import unittest
+
+from kidgine.math import fixed
+from kidgine.math import vector
+from kidgine.math.fixed import FixedVector
+from kidgine.math.vector import Vector
+
+
+def snapped(f):
+    """f rounded to the fixed point grid, so only the operation's own
+    rounding is compared"""
+    return fixed.to_float(fixed.from_float(f))
+
+
+def pair(rng, side=1000):
+    """the same random point as a FixedVector and a Vector"""
+    v = FixedVector(rng.uniform(-side, side), rng.uniform(-side, side))
+    return v, Vector(v.x, v.y)
+
+
+class FixedVectorTest(unittest.TestCase):
+    def assert_close(self, found, expected, scale):
+        # a few units in the last place of 16.16, relative to the size
+        # of what went in
+        tolerance = 1e-4 * (1 + scale)
+        if isinstance(expected, Vector):
+            self.assertTrue(abs(found.x - expected.x) <= tolerance, (found, expected))
+            self.assertTrue(abs(found.y - expected.y) <= tolerance, (found, expected))
+        else:
+            self.assertTrue(abs(found - expected) <= tolerance, (found, expected))
+
+
+    def test_operations_match_floats(self):
+        rng = random.Random(1)
+        for i in xrange(2000):
+            a, fa = pair(rng)
+            b, fb = pair(rng)
+            s = snapped(rng.uniform(-10, 10))
+            d = snapped(rng.choice((-1, 1)) * rng.uniform(0.5, 10))
+            angle = snapped(rng.uniform(-20, 20))
+            t = snapped(rng.uniform(0, 1))
+            size = max(fa.magnitude(), fb.magnitude())
+
+            self.assert_close(a + b, fa + fb, size)
+            self.assert_close(a - b, fa - fb, size)
+            self.assert_close(-a, -fa, size)
+            self.assert_close(a * s, fa * s, size * abs(s))
+            self.assert_close(a / d, fa / d, size / abs(d))
+            self.assert_close(a.dot(b), fa.dot(fb), size * size)
+            self.assert_close(a.magnitude(), fa.magnitude(), size)
+            self.assert_close(a.distance(b), fa.distance(fb), size)
+            self.assert_close(a.normalized(), fa.normalized(), 1)
+            self.assert_close(a.rotate(angle), fa.rotate(angle), size)
+            self.assert_close(fixed.interpolate(a, b, t), vector.interpolate(fa, fb, t), size)
+
+            c = a.copy()
+            c.iadd(b).isub(b)
+            self.assertEqual(c, a)
+
+            # well clear of the boundary, the comparisons agree
+            dist = fa.distance(fb)
+            if dist > 1:
+                self.assertTrue(a.closer_than(b, dist + 0.5))
+                self.assertFalse(a.closer_than(b, dist - 0.5))
+                self.assertTrue(a.shorter_than(fa.magnitude() + 0.5))
+
+
+    def test_cos_sin_match_floats(self):
+        for i in xrange(-4000, 4000):
+            angle = i / 100.0
+            cos, sin = fixed.cos_sin(fixed.from_float(angle))
+            raw = fixed.to_float(fixed.from_float(angle))
+            self.assertTrue(abs(fixed.to_float(cos) - math.cos(raw)) <= 2.0 / fixed.ONE)
+            self.assertTrue(abs(fixed.to_float(sin) - math.sin(raw)) <= 2.0 / fixed.ONE)
+
+
+    def test_sums_do_not_depend_on_order(self):
+        # what floats can not promise and lockstep needs
+        rng = random.Random(2)
+        vectors = [pair(rng, 1e4)[0] * rng.uniform(0, 1) for i in xrange(500)]
+        total = fixed.zero()
+        for v in vectors:
+            total += v
+        for i in xrange(5):
+            rng.shuffle(vectors)
+            shuffled = fixed.zero()
+            for v in vectors:
+                shuffled += v
+            self.assertEqual((shuffled.raw_x, shuffled.raw_y), (total.raw_x, total.raw_y))
+
+
+    def test_pack_round_trip(self):
+        rng = random.Random(3)
+        for i in xrange(200):
+            v = pair(rng, 3e4)[0]
+            copy = FixedVector()
+            self.assertEqual(copy.unpack(v.pack() + 'rest'), 'rest')
+            self.assertEqual((copy.raw_x, copy.raw_y), (v.raw_x, v.raw_y))
+
+
+if __name__ == '__main__':
+    unittest.main()
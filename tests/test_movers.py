@@ -0,0 +1,95 @@
+"""Movers.integrate() against moving each entity's own Vectors"""
+import random
+import unittest
+
+from kidgine import movers
+from kidgine.math.vector import Vector
+
+
+class Mover(object):
+    """the per entity state Movers replaces"""
+    def __init__(self, rng):
+        self.position = Vector(rng.uniform(-500, 500), rng.uniform(-500, 500))
+        self.velocity = Vector()
+        self.forces = Vector()
+        self.motion = Vector()
+
+
+    def integrate(self, dt):
+        self.motion = self.velocity * dt + self.forces
+        self.position += self.motion
+        self.forces = Vector()
+
+
+class MoversTest(unittest.TestCase):
+    def assert_same(self, found, expected):
+        self.assertAlmostEqual(found.x, expected.x, places=9)
+        self.assertAlmostEqual(found.y, expected.y, places=9)
+
+
+    def check_integrate(self):
+        rng = random.Random(1)
+        stored = movers.Movers()
+        all = dict()
+
+        for frame in xrange(30):
+            # some come and go, so freed slots get reused
+            for i in xrange(5):
+                m = Mover(rng)
+                all[stored.add(m.position)] = m
+            for index in rng.sample(sorted(all), 3):
+                stored.remove(index)
+                del all[index]
+            self.assertEqual(stored.size(), len(all))
+
+            for index,m in all.iteritems():
+                if rng.random() < 0.7:
+                    m.velocity = Vector(rng.uniform(-100, 100), rng.uniform(-100, 100))
+                    stored.velocity(index).set(m.velocity.x, m.velocity.y)
+                if rng.random() < 0.3:
+                    push = Vector(rng.uniform(-5, 5), rng.uniform(-5, 5))
+                    m.forces += push
+                    stored.forces(index).iadd(push)
+
+            dt = rng.uniform(0.01, 0.05)
+            stored.integrate(dt)
+            for m in all.itervalues():
+                m.integrate(dt)
+
+            for index,m in all.iteritems():
+                self.assert_same(stored.position(index), m.position)
+                self.assert_same(stored.motion(index), m.motion)
+                self.assert_same(stored.forces(index), Vector())
+
+        self.assertTrue(len(stored.x) < 5 * 30)
+
+
+    @unittest.skipUnless(movers.numpy is not None, 'needs numpy')
+    def test_integrate_with_numpy(self):
+        self.check_integrate()
+
+
+    def test_integrate_without_numpy(self):
+        saved = movers.numpy
+        movers.numpy = None
+        try:
+            self.check_integrate()
+        finally:
+            movers.numpy = saved
+
+
+    def test_reused_slot_starts_at_rest(self):
+        stored = movers.Movers()
+        index = stored.add(Vector(1, 2))
+        stored.velocity(index).set(10, 10)
+        stored.forces(index).set(3, 3)
+        stored.remove(index)
+
+        self.assertEqual(stored.add(Vector(5, 6)), index)
+        stored.integrate(1.0)
+        self.assert_same(stored.position(index), Vector(5, 6))
+        self.assert_same(stored.motion(index), Vector())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+"""the client's input prediction: replay skipped when the server's
+player matches what was predicted, replayed from the server otherwise"""
+import unittest
+
+from kidgine.math.fixed import FixedVector
+from kidgine.netgame import gamestate
+from kidgine.netgame import prediction
+
+from entities import Walker
+
+
+PLAYER = 7
+
+
+class Move(object):
+    def __init__(self, x, y):
+        self.move = FixedVector(x, y)
+
+
+class PredictionTest(unittest.TestCase):
+    def setUp(self):
+        self.state = gamestate.Gamestate(None)
+        self.state.set_entity(PLAYER, Walker(FixedVector(10, 10)))
+        self.prediction = prediction.InputPrediction(self.state)
+        for msg_id,move in ((1, Move(1, 0)), (2, Move(0, 2)), (3, Move(3, 3))):
+            self.prediction.predict(0, PLAYER, msg_id, move)
+
+
+    def player(self):
+        return self.state._dynamic.entities[PLAYER]
+
+
+    def test_skips_replay_when_prediction_matches(self):
+        shown = self.player()
+        self.assertFalse(self.prediction.reconcile(0, PLAYER, Walker(FixedVector(11, 10)), 1))
+
+        # left alone, with the commands after the ack still pending
+        self.assertTrue(self.player() is shown)
+        self.assertEqual(self.player().position, FixedVector(14, 15))
+        self.assertEqual(len(self.prediction), 2)
+
+
+    def test_replays_when_prediction_differs(self):
+        self.assertTrue(self.prediction.reconcile(0, PLAYER, Walker(FixedVector(11.5, 10)), 1))
+        self.assertEqual(self.player().position, FixedVector(14.5, 15))
+        self.assertEqual(len(self.prediction), 2)
+
+        # the replay recorded new digests, so once the server agrees
+        # with it there is nothing to replay again
+        self.assertFalse(self.prediction.reconcile(0, PLAYER, Walker(FixedVector(11.5, 12)), 2))
+        self.assertEqual(self.player().position, FixedVector(14.5, 15))
+        self.assertEqual(len(self.prediction), 1)
+
+
+    def test_replays_after_digests_are_forgotten(self):
+        self.prediction.forget_digests()
+        self.assertTrue(self.prediction.reconcile(0, PLAYER, Walker(FixedVector(11, 10)), 1))
+        self.assertEqual(self.player().position, FixedVector(14, 15))
+
+
+    def test_everything_acknowledged(self):
+        self.assertFalse(self.prediction.reconcile(0, PLAYER, Walker(FixedVector(14, 15)), 3))
+        self.assertEqual(len(self.prediction), 0)
+
+        self.assertTrue(self.prediction.reconcile(0, PLAYER, Walker(FixedVector(20, 20)), 3))
+        self.assertEqual(self.player().position, FixedVector(20, 20))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+"""raycasts through the detector against casting the ray at every
+collidable in the scene"""
+import math
+import random
+import unittest
+
+import kidgine.collision
+from kidgine.collision import rectangle
+from kidgine.math.vector import Vector
+
+import scenes
+
+
+TAG = 1
+
+
+def world(backend, seed):
+    """a detector with the given backend holding rotated rectangles
+    and circles, every third one tagged, and some ownerless walls in
+    the static layer. returns it with {token: collidable} of all of
+    them"""
+    rng = random.Random(seed)
+    detector = kidgine.collision.CollisionDetector(broad_phase=backend())
+    all = scenes.shapes(rng, 300, 800)
+    for token,c in all.iteritems():
+        if token % 3 == 0:
+            c.tags = set([TAG])
+        if token % 4 == 1:
+            c.rotation = rng.uniform(0, 2 * math.pi)
+        detector.update_collidable(token, c)
+
+    for i in xrange(30):
+        half = Vector(16 * rng.randint(1, 4), 16 * rng.randint(1, 4))
+        center = Vector(32 * rng.randint(0, 25), 32 * rng.randint(0, 25))
+        token = 'wall{}'.format(i)
+        all[token] = rectangle.Rectangle(None, -half, half, center=center)
+        detector.add_static_collidable(token, all[token])
+    return detector, all
+
+
+def rays(rng, count):
+    """(origin, direction, max_distance) of count rays, some starting
+    outside the scene. directions are not unit length"""
+    all = list()
+    for i in xrange(count):
+        angle = rng.uniform(0, 2 * math.pi)
+        length = rng.uniform(0.5, 3)
+        all.append((Vector(rng.uniform(-100, 900), rng.uniform(-100, 900)),
+                    Vector(math.cos(angle) * length, math.sin(angle) * length),
+                    rng.uniform(20, 600)))
+    return all
+
+
+def brute_force(all, origin, direction, max_distance, filters=set(), owner=None):
+    """sorted (distance, token) of every collidable in all the ray hits,
+    with the detector's filtering"""
+    # normalized as the detector does, so distances match exactly
+    direction = direction.normalized()
+    hits = list()
+    for token,c in all.iteritems():
+        if owner is not None and c.owner == owner:
+            continue
+        if not filters <= c.tags:
+            continue
+        hit = c.raycast(origin, direction, max_distance)
+        if hit is not None:
+            hits.append((hit[0], token))
+    return sorted(hits)
+
+
+def found(hits):
+    return sorted((hit.distance, hit.token) for hit in hits)
+
+
+class RaycastTest(unittest.TestCase):
+    def assert_matches(self, backend):
+        detector, all = world(backend, 1)
+        all_rays = rays(random.Random(2), 200)
+        hits = 0
+
+        for origin,direction,max_distance in all_rays:
+            expected = brute_force(all, origin, direction, max_distance)
+            hits += len(expected)
+            self.assertEqual(found(detector.raycast(origin, direction, max_distance)), expected)
+
+            tagged = brute_force(all, origin, direction, max_distance, filters=set([TAG]))
+            self.assertEqual(found(detector.raycast(origin, direction, max_distance,
+                                                    filters=set([TAG]))), tagged)
+
+            # ignoring whoever owns the nearest hit
+            if expected and not isinstance(expected[0][1], str):
+                owner = all[expected[0][1]].owner
+                self.assertEqual(found(detector.raycast(origin, direction, max_distance, owner=owner)),
+                                 brute_force(all, origin, direction, max_distance, owner=owner))
+
+            first = detector.raycast(origin, direction, max_distance, first_only=True)
+            if not expected:
+                self.assertEqual(first, [])
+            else:
+                # any of several hits at the same distance may come first
+                self.assertEqual(len(first), 1)
+                self.assertTrue((first[0].distance, first[0].token) in expected)
+                self.assertEqual(first[0].distance, expected[0][0])
+
+        self.assertTrue(hits > len(all_rays))
+
+        # raycast_all answers each ray as raycast() does
+        for cast,ray in zip(detector.raycast_all(all_rays), all_rays):
+            self.assertEqual(found(cast), brute_force(all, *ray))
+        for cast,ray in zip(detector.raycast_all(all_rays, first_only=True), all_rays):
+            expected = brute_force(all, *ray)
+            self.assertEqual([hit.distance for hit in cast], [distance for distance,token in expected[:1]])
+
+
+    def test_spatial_hash(self):
+        self.assert_matches(kidgine.collision.SpatialHash)
+
+
+    def test_sort_and_sweep(self):
+        self.assert_matches(kidgine.collision.SortAndSweep)
+
+
+    def test_hierarchical_grid(self):
+        self.assert_matches(kidgine.collision.HierarchicalGrid)
+
+
+if __name__ == '__main__':
+    unittest.main()
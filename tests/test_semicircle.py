@@ -0,0 +1,112 @@
+"""the closed form Circle and Semicircle projections against a polygon
+with hundreds of points along the arc"""
+import math
+import random
+import unittest
+
+import kidgine.collision
+from kidgine.collision import circle
+from kidgine.collision import polygon
+from kidgine.collision import semicircle
+from kidgine.collision import shape
+from kidgine.math import vector
+from kidgine.math.vector import Vector
+
+import scenes
+
+
+SAMPLES = 720
+
+
+def fan(s, samples=SAMPLES):
+    """a polygon through the center and samples points along the arc of
+    semicircle s, with the same owner"""
+    points = [vector.zero()]
+    for i in xrange(samples + 1):
+        angle = s.rotation - s.arc / 2 + s.arc * i / samples
+        points.append(vector.from_radians(angle) * s.radius)
+    return polygon.Polygon(s.owner, points)
+
+
+def ring(c):
+    """a polygon through SAMPLES points around circle c"""
+    points = [vector.from_radians(2 * math.pi * i / SAMPLES) * c.radius
+              for i in xrange(SAMPLES)]
+    return polygon.Polygon(c.owner, points)
+
+
+def arcs(rng, count):
+    """count semicircles of random size, arc and rotation"""
+    all = list()
+    for i in xrange(count):
+        body = scenes.Body(rng.uniform(0, 200), rng.uniform(0, 200))
+        s = semicircle.Semicircle(body, vector.zero(), rng.uniform(4, 40),
+                                  rng.uniform(0.2, math.pi), rng.uniform(-10, 10))
+        s.update()
+        all.append(s)
+    return all
+
+
+class SemicircleTest(unittest.TestCase):
+    def assert_encloses(self, found, sampled, radius):
+        # the polygon lies inside the arc, short of it by at most the
+        # sagitta of one sample
+        sagitta = radius * (1 - math.cos(math.pi / SAMPLES)) + 1e-9
+        self.assertTrue(found[0] <= sampled[0] + 1e-9 and sampled[0] - found[0] <= sagitta, (found, sampled))
+        self.assertTrue(found[1] >= sampled[1] - 1e-9 and found[1] - sampled[1] <= sagitta, (found, sampled))
+
+
+    def test_projections_and_bounds(self):
+        rng = random.Random(1)
+        shapes = arcs(rng, 100)
+        for i in xrange(100):
+            body = scenes.Body(rng.uniform(0, 200), rng.uniform(0, 200))
+            c = circle.Circle(body, vector.zero(), rng.uniform(4, 40))
+            c.update()
+            shapes.append(c)
+
+        for s in shapes:
+            p = fan(s) if isinstance(s, semicircle.Semicircle) else ring(s)
+            p.update()
+            for i in xrange(20):
+                axis = vector.from_radians(rng.uniform(0, 2 * math.pi))
+                self.assert_encloses(s.project_onto_axis(None, axis),
+                                     p.project_onto_axis(None, axis), s.radius)
+
+            found, sampled = s.aabb, p.aabb
+            self.assert_encloses((found[0], found[2]), (sampled[0], sampled[2]), s.radius)
+            self.assert_encloses((found[1], found[3]), (sampled[1], sampled[3]), s.radius)
+
+
+    def test_collides_like_the_polygon(self):
+        rng = random.Random(2)
+        others = scenes.shapes(rng, 400, 200)
+        for token,c in others.iteritems():
+            if token % 4 == 1:
+                c.rotation = rng.uniform(0, 2 * math.pi)
+            c.update()
+
+        hits = 0
+        for s in arcs(rng, 40):
+            # coarser, as every edge is another axis to test
+            p = fan(s, 90)
+            p.update()
+            for other in others.itervalues():
+                if not shape.aabb_overlap(s.aabb, other.aabb):
+                    continue
+                expected = kidgine.collision.collides(p, other)
+                found = kidgine.collision.collides(s, other)
+                reverse = kidgine.collision.collides(other, s)
+                # the polygon falls short of the arc by a hair, so only
+                # clear hits and misses have to agree
+                if expected is not None:
+                    hits += 1
+                    self.assertTrue(found is not None and reverse is not None)
+                elif found is not None and found.distance > 0.05:
+                    self.fail('{} overlaps {} only by the arc'.format(s, other))
+
+        self.assertTrue(hits > 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+"""delta gamestate updates between SentSnapshots and ReceivedSnapshots
+over a link that delays, loses and cuts off confirmations"""
+import random
+import unittest
+
+from kidgine.math.fixed import FixedVector
+from kidgine.netgame import gamestate
+from kidgine.netgame import messages
+
+from entities import Walker
+
+
+DELAY = 2
+
+
+def packed(entities):
+    return dict((id, e.pack()) for id,e in entities.iteritems())
+
+
+class SnapshotTest(unittest.TestCase):
+    def run_link(self, ticks, loss, cut):
+        """send an update every tick for ticks ticks, each arriving DELAY
+        ticks later unless lost, and confirmations coming back as late
+        unless lost or sent during the ticks in cut. returns
+        {snapshot id: baseline id} of every update sent, and the set of
+        ids the client applied"""
+        rng = random.Random(1)
+        world = gamestate.DynamicGamestate()
+        for id in xrange(1, 51):
+            world.entities[id] = Walker(FixedVector(rng.uniform(0, 500), rng.uniform(0, 500)))
+
+        sent = gamestate.SentSnapshots()
+        received = gamestate.ReceivedSnapshots()
+        to_client = dict()
+        to_server = dict()
+        baselines = dict()
+        applied = set()
+
+        for tick in xrange(ticks):
+            for e in rng.sample(world.entities.values(), 5):
+                e.position += FixedVector(rng.uniform(-3, 3), rng.uniform(-3, 3))
+
+            for id in to_server.pop(tick, ()):
+                sent.confirm(id)
+
+            fields = gamestate.snapshot_fields(world)
+            snapshot_id = sent.next_id()
+            baselines[snapshot_id] = sent.baseline_id
+            data = messages._GamestateUpdateMsg(
+                0, snapshot_id, sent.baseline_id,
+                gamestate.GamestateDelta.create(fields, sent.baseline),
+                gamestate.LifeMessages()).pack()
+            sent.add(snapshot_id, fields)
+            if rng.random() >= loss:
+                to_client.setdefault(tick + DELAY, []).append((data, packed(world.entities)))
+
+            for data,expected in to_client.pop(tick, ()):
+                msg = messages._GamestateUpdateMsg()
+                msg.unpack_from(memoryview(data))
+                state = received.receive(msg.snapshot_id, msg.baseline_id, msg.state)
+                if state is None:
+                    continue
+                self.assertEqual(packed(state.entities), expected)
+                applied.add(msg.snapshot_id)
+                if tick not in cut and rng.random() >= loss:
+                    to_server.setdefault(tick + DELAY, []).append(msg.snapshot_id)
+
+        return baselines, applied
+
+
+    def test_lossy_link(self):
+        baselines, applied = self.run_link(300, 0.2, set())
+        delivered = len(applied)
+        self.assertTrue(delivered > 200)
+        # nearly everything after the first few goes out as a delta
+        self.assertTrue(sum(1 for id,baseline in baselines.iteritems() if baseline == 0) < 20)
+
+
+    def test_recovers_after_confirmations_stop(self):
+        # longer than either end keeps snapshots for
+        outage = xrange(50, 50 + 3 * gamestate.ReceivedSnapshots.HISTORY)
+        baselines, applied = self.run_link(400, 0.0, set(outage))
+
+        # every update arrived, so every one must have applied
+        self.assertEqual(applied, set(id for id in baselines if id <= 400 - DELAY))
+
+        # full updates kept the gap short during the outage, and deltas
+        # came back after it
+        self.assertTrue(all(id - baseline < gamestate.SNAPSHOT_HISTORY or baseline == 0
+                            for id,baseline in baselines.iteritems()))
+        self.assertTrue(any(baseline == 0 for id,baseline in baselines.iteritems() if id > 100))
+        self.assertTrue(all(baseline != 0 for id,baseline in baselines.iteritems()
+                            if id > outage[-1] + 2 * DELAY + 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
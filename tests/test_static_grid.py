@@ -0,0 +1,65 @@
+"""level geometry in the static layer against the same geometry kept
+with everything else in the SpatialHash"""
+import random
+import unittest
+
+import kidgine.collision
+from kidgine.collision import rectangle
+from kidgine.math.vector import Vector
+
+import scenes
+
+
+def walls(seed):
+    """{token: collidable} of ownerless rectangles of 32-128px, as the
+    level makes. the level makes larger ones too, but the hash can not
+    hold those"""
+    rng = random.Random(seed)
+    all = dict()
+    for i in xrange(60):
+        half = Vector(16 * rng.randint(1, 4), 16 * rng.randint(1, 4))
+        center = Vector(32 * rng.randint(0, 25), 32 * rng.randint(0, 25))
+        all['wall{}'.format(i)] = rectangle.Rectangle(None, -half, half, center=center)
+    return all
+
+
+class StaticGridTest(unittest.TestCase):
+    def test_static_walls_collide_like_dynamic_ones(self):
+        static = kidgine.collision.CollisionDetector()
+        for token,c in walls(1).iteritems():
+            static.add_static_collidable(token, c)
+
+        dynamic = kidgine.collision.CollisionDetector()
+        for token,c in walls(1).iteritems():
+            dynamic.update_collidable(token, c)
+
+        worlds = [(static, scenes.shapes(random.Random(2), 200, 800), random.Random(3)),
+                  (dynamic, scenes.shapes(random.Random(2), 200, 800), random.Random(3))]
+
+        for frame in xrange(5):
+            for detector,all,rng in worlds:
+                scenes.jiggle(rng, all, 6)
+                for token,c in all.iteritems():
+                    detector.update_collidable(token, c)
+
+            # walls have no owner, so the dynamic detector never pairs
+            # two of them either
+            expected = scenes.pairs(dynamic.all_collisions())
+            self.assertTrue(any(isinstance(token, str) for pair in expected for token in pair))
+            self.assertEqual(scenes.pairs(static.all_collisions()), expected)
+
+            for token in xrange(0, 200, 5):
+                self.assertEqual(scenes.pairs(static.collides(token=token)),
+                                 scenes.pairs(dynamic.collides(token=token)))
+
+            # asked about by token, a wall finds what is touching it
+            hits = 0
+            for token in walls(1):
+                found = scenes.pairs(static.collides(token=token))
+                hits += len(found)
+                self.assertEqual(found, scenes.pairs(dynamic.collides(token=token)))
+            self.assertTrue(hits > 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
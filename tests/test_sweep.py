@@ -0,0 +1,102 @@
+"""swept queries against marching the motion in small steps with
+collides()"""
+import random
+import unittest
+
+import kidgine.collision
+from kidgine.math.vector import Vector
+
+import scenes
+
+
+STEPS = 2000
+
+
+def march(shape1, shape2, motion):
+    """(time, penetration) of the first of STEPS positions along motion
+    at which shape1 overlaps shape2, and the deepest penetration along
+    the whole motion"""
+    start = shape1._position()
+    first = None
+    deepest = 0.0
+    for i in xrange(1, STEPS + 1):
+        t = i / float(STEPS)
+        c = kidgine.collision.collides(shape1, shape2, start + motion * t)
+        if c is not None:
+            if first is None:
+                first = t
+            deepest = max(deepest, c.distance)
+    return first, deepest
+
+
+class SweepTest(unittest.TestCase):
+    def test_sweep_matches_marching(self):
+        rng = random.Random(1)
+        hits = 0
+        for trial in xrange(300):
+            # even tokens are circles, so this covers every pairing
+            all = scenes.shapes(rng, 4, 100)
+            moving, still = all[trial % 2], all[2 + trial // 2 % 2]
+            if trial % 8 < 4:
+                moving.rotation = rng.uniform(0, 3)
+                still.rotation = rng.uniform(0, 3)
+            moving.update()
+            still.update()
+            if kidgine.collision.collides(moving, still) is not None:
+                continue
+
+            motion = Vector(rng.uniform(-200, 200), rng.uniform(-200, 200))
+            found = kidgine.collision.sweep(moving, still, motion)
+            first, deepest = march(moving, still, motion)
+
+            if found is None:
+                # stepping may pass over a corner only just grazed
+                self.assertTrue(deepest < 1.0, 'missed a hit {}px deep'.format(deepest))
+                continue
+
+            hits += 1
+            self.assertTrue(first is not None, 'hit at {} that marching never finds'.format(found.time))
+            # never later than the first step that overlaps, and at most
+            # a step and half a pixel earlier
+            self.assertTrue(found.time <= first)
+            slack = 1.0 / STEPS + 0.5 / motion.magnitude()
+            self.assertTrue(first - found.time <= slack)
+
+            # and moving to the reported time must not sink in
+            c = kidgine.collision.collides(moving, still, moving._position() + motion * found.time)
+            self.assertTrue(c is None or c.distance < 1e-6)
+
+        self.assertTrue(hits > 30)
+
+
+    def test_detector_sweep_matches_every_shape(self):
+        rng = random.Random(2)
+        detector = kidgine.collision.CollisionDetector()
+        all = scenes.shapes(rng, 150, 600)
+        for token,c in all.iteritems():
+            detector.update_collidable(token, c)
+
+        hits = 0
+        for token in xrange(0, 150, 3):
+            moving = all[token]
+            motion = Vector(rng.uniform(-150, 150), rng.uniform(-150, 150))
+            first = None
+            for other,c in all.iteritems():
+                if other == token:
+                    continue
+                hit = kidgine.collision.sweep(moving, c, motion)
+                if hit is not None and (first is None or hit.time < first[0]):
+                    first = (hit.time, other)
+
+            found = detector.sweep(token=token, motion=motion)
+            if first is None:
+                self.assertEqual(found, None)
+            else:
+                hits += 1
+                self.assertEqual((found.time, found.token2), first)
+
+        self.assertTrue(hits > 10)
+
+
+if __name__ == '__main__':
+    unittest.main()